@@ -1,7 +1,11 @@
 from fastapi import APIRouter
-from app.api.routes import sources, reports, tickers
+from app.api.routes import sources, reports, tickers, jobs, search, cache, summaries
 
 api_router = APIRouter(prefix="/api")
 api_router.include_router(sources.router, prefix="/sources", tags=["sources"])
 api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
 api_router.include_router(tickers.router, prefix="/tickers", tags=["tickers"])
+api_router.include_router(summaries.router, prefix="/summaries", tags=["summaries"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
+api_router.include_router(cache.router, prefix="/cache", tags=["cache"])
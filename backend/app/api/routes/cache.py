@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from app.core.cache import response_cache
+from app.api.schemas import CacheStatsOut
+
+router = APIRouter()
+
+@router.get("/stats", response_model=CacheStatsOut)
+async def cache_stats():
+    return CacheStatsOut(**response_cache.stats())
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, HTTPException
+
+from app.jobs.manager import jobs, Job
+from app.api.schemas import JobOut, JobStageOut
+
+router = APIRouter()
+
+def job_out(job: Job) -> JobOut:
+    return JobOut(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        stages=[
+            JobStageOut(name=s.name, status=s.status, started_at=s.started_at, finished_at=s.finished_at, elapsed_s=s.elapsed_s, detail=s.detail)
+            for s in job.stages
+        ],
+        result=job.result,
+        error=job.error,
+    )
+
+@router.get("", response_model=list[JobOut])
+async def list_jobs():
+    return [job_out(j) for j in jobs.list()]
+
+@router.get("/{job_id}", response_model=JobOut)
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_out(job)
@@ -1,22 +1,26 @@
-from fastapi import APIRouter
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 
-from app.db.session import get_db
+from app.core.cache import cached_json_async
+from app.db.session import get_async_db
 from app.db import models
 from app.api.schemas import ReportOut
 
 router = APIRouter()
 
-@router.get("", response_model=list[ReportOut])
-def list_reports(days: int = 7):
+async def _list_reports(db: AsyncSession, days: int) -> list[ReportOut]:
     cutoff = datetime.utcnow() - timedelta(days=days)
-    with get_db() as db:
-        rows = (
-            db.query(models.Report)
-            .filter(models.Report.published_at >= cutoff)
-            .order_by(models.Report.published_at.desc())
-            .limit(200)
-            .all()
-        )
-        return [ReportOut(id=r.id, title=r.title, published_at=r.published_at, source_id=r.source_id) for r in rows]
+    rows = await db.execute(
+        select(models.Report.id, models.Report.title, models.Report.published_at, models.Report.source_id)
+        .where(models.Report.published_at >= cutoff)
+        .order_by(models.Report.published_at.desc())
+        .limit(200)
+    )
+    return [ReportOut(id=r.id, title=r.title, published_at=r.published_at, source_id=r.source_id) for r in rows]
+
+@router.get("", response_model=list[ReportOut])
+async def list_reports(request: Request, days: int = 7, db: AsyncSession = Depends(get_async_db)):
+    # the TTL bounds how far the rolling cutoff can lag
+    return await cached_json_async(request, ("reports", days), lambda: _list_reports(db, days))
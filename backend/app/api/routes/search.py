@@ -0,0 +1,44 @@
+from datetime import date, datetime, timedelta
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cached_json_async
+from app.db.session import get_async_db
+from app.db import search as fts
+from app.api.schemas import SearchOut, SearchHitOut
+
+router = APIRouter()
+
+async def _search(db: AsyncSession, q: str, scope: str, ticker: Optional[str], date_from: Optional[date],
+                  date_to: Optional[date], limit: int, cursor: Optional[str]) -> SearchOut:
+    try:
+        # the FTS queries are raw SQL written against a sync Session
+        hits, next_cursor = await db.run_sync(
+            fts.search, q, scope=scope, ticker=ticker,
+            date_from=datetime.combine(date_from, datetime.min.time()) if date_from else None,
+            date_to=datetime.combine(date_to + timedelta(days=1), datetime.min.time()) if date_to else None,
+            limit=limit, cursor=cursor,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return SearchOut(hits=[SearchHitOut(**h) for h in hits], next_cursor=next_cursor)
+
+@router.get("", response_model=SearchOut)
+async def search(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    scope: Literal["reports", "snippets"] = "reports",
+    ticker: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,  # inclusive
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    if db.bind.dialect.name != "sqlite":
+        raise HTTPException(status_code=501, detail="Search requires the SQLite backend")
+    # popular queries repeat, and results only change with the data: cached like the other reads
+    key = ("search", q, scope, ticker, date_from, date_to, limit, cursor)
+    return await cached_json_async(request, key, lambda: _search(db, q, scope, ticker, date_from, date_to, limit, cursor))
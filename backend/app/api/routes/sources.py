@@ -1,25 +1,56 @@
-from fastapi import APIRouter, HTTPException
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+import json
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db, get_db
 from app.db import models
-from app.api.schemas import SourceOut, CreateSourceIn
+from app.api.schemas import ExtractRulesIn, SourceOut, CreateSourceIn
+from app.services.html_extract import compile_rules
 
 router = APIRouter()
 
+def _source_out(s: models.Source) -> SourceOut:
+    rules = ExtractRulesIn(**json.loads(s.extract_rules)) if s.extract_rules else None
+    return SourceOut(id=s.id, name=s.name, kind=s.kind, url=s.url, extract_rules=rules)
+
+def _rules_json(rules: ExtractRulesIn | None) -> str:
+    if rules is None or not any(rules.model_dump().values()):
+        return ""
+    raw = rules.model_dump_json()
+    try:
+        compile_rules(raw)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return raw
+
 @router.get("", response_model=list[SourceOut])
-def list_sources():
-    with get_db() as db:
-        sources = db.query(models.Source).order_by(models.Source.id.desc()).all()
-        return [SourceOut(id=s.id, name=s.name, kind=s.kind, url=s.url) for s in sources]
+async def list_sources(db: AsyncSession = Depends(get_async_db)):
+    sources = await db.scalars(select(models.Source).order_by(models.Source.id.desc()))
+    return [_source_out(s) for s in sources]
 
 @router.post("", response_model=SourceOut)
 def create_source(payload: CreateSourceIn):
+    rules = _rules_json(payload.extract_rules)
     with get_db() as db:
         exists = db.query(models.Source).filter(models.Source.url == payload.url).first()
         if exists:
             raise HTTPException(status_code=409, detail="Source already exists")
-        s = models.Source(name=payload.name, kind=payload.kind, url=payload.url)
+        s = models.Source(name=payload.name, kind=payload.kind, url=payload.url, extract_rules=rules)
         db.add(s)
         db.commit()
         db.refresh(s)
-        return SourceOut(id=s.id, name=s.name, kind=s.kind, url=s.url)
+        return _source_out(s)
+
+@router.put("/{source_id}/extract-rules", response_model=SourceOut)
+def set_extract_rules(source_id: int, payload: ExtractRulesIn):
+    # applies from the next fetch; an empty body switches the source back to generic extraction
+    rules = _rules_json(payload)
+    with get_db() as db:
+        s = db.get(models.Source, source_id)
+        if s is None:
+            raise HTTPException(status_code=404, detail="Source not found")
+        s.extract_rules = rules
+        db.commit()
+        db.refresh(s)
+        return _source_out(s)
@@ -0,0 +1,54 @@
+import json
+from datetime import date
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cached_json_async
+from app.db.base import AsyncSessionLocal
+from app.db.session import get_async_db
+from app.db import models
+from app.api.schemas import TickerSummaryOut
+
+router = APIRouter()
+
+def summary_out(row: models.TickerSummary) -> TickerSummaryOut:
+    return TickerSummaryOut(
+        symbol=row.symbol,
+        asof_date=row.asof_date,
+        summary=row.summary,
+        bullets=json.loads(row.bullets) if row.bullets else [],
+        confidence=row.confidence,
+    )
+
+def _split_symbols(s: str | None) -> list[str]:
+    return sorted({x.strip() for x in (s or "").split(",") if x.strip()})
+
+def _summaries_query(asof_date: str, symbols: list[str]):
+    q = select(models.TickerSummary).where(models.TickerSummary.asof_date == asof_date)
+    if symbols:
+        q = q.where(models.TickerSummary.symbol.in_(symbols))
+    return q.order_by(models.TickerSummary.symbol.asc())
+
+async def _list_summaries(db: AsyncSession, asof_date: str, symbols: list[str]) -> list[TickerSummaryOut]:
+    return [summary_out(r) for r in await db.scalars(_summaries_query(asof_date, symbols))]
+
+async def _ndjson(asof_date: str, symbols: list[str]):
+    # own session: dependency cleanup runs before a streamed body is sent
+    async with AsyncSessionLocal() as db:
+        rows = await db.stream_scalars(_summaries_query(asof_date, symbols).execution_options(yield_per=200))
+        async for row in rows:
+            yield summary_out(row).model_dump_json() + "\n"
+
+@router.get("", response_model=list[TickerSummaryOut])
+async def list_summaries(request: Request, asof_date: str | None = None, symbols: str | None = None, format: str = "json",
+                         db: AsyncSession = Depends(get_async_db)):
+    # symbols: comma separated, empty = every ticker summarized that day
+    if asof_date is None:
+        asof_date = date.today().isoformat()
+    wanted = _split_symbols(symbols)
+    if format == "ndjson" or "application/x-ndjson" in request.headers.get("accept", ""):
+        return StreamingResponse(_ndjson(asof_date, wanted), media_type="application/x-ndjson")
+    return await cached_json_async(request, ("summaries", asof_date, tuple(wanted)), lambda: _list_summaries(db, asof_date, wanted))
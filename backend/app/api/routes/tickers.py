@@ -1,20 +1,33 @@
-import json
-from fastapi import APIRouter, HTTPException
-from datetime import date
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from datetime import date, datetime, timedelta
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.core.cache import cached_json_async
+from app.db.session import get_async_db, get_db
 from app.db import models
-from app.api.schemas import TickerOut, CreateTickerIn, TickerSummaryOut, RunDailyOut
-from app.jobs.run_daily import run_daily_pipeline
+from app.api.schemas import TickerOut, CreateTickerIn, TickerSummaryOut, RunDailyOut, JobOut, TrendingTickerOut, MentionPointOut
+from app.api.routes.jobs import job_out
+from app.api.routes.summaries import summary_out
+from app.jobs.backfill import backfill_mentions
+from app.jobs.manager import jobs
+from app.jobs.run_daily import run_daily_pipeline_async
 
 router = APIRouter()
 
+# every job that writes mentions (and their rollups) runs alone
+MENTION_WRITERS = "mentions"
+
+def _split_aliases(s: str) -> list[str]:
+    return [x.strip() for x in (s or "").split(",") if x.strip()]
+
+async def _list_tickers(db: AsyncSession) -> list[TickerOut]:
+    rows = await db.scalars(select(models.Ticker).order_by(models.Ticker.name.asc()))
+    return [TickerOut(symbol=t.symbol, name=t.name, aliases=_split_aliases(t.aliases)) for t in rows]
+
 @router.get("", response_model=list[TickerOut])
-def list_tickers():
-    with get_db() as db:
-        rows = db.query(models.Ticker).order_by(models.Ticker.name.asc()).all()
-        return [TickerOut(symbol=t.symbol, name=t.name) for t in rows]
+async def list_tickers(request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await cached_json_async(request, ("tickers",), lambda: _list_tickers(db))
 
 @router.post("", response_model=TickerOut)
 def create_ticker(payload: CreateTickerIn):
@@ -22,34 +35,132 @@ def create_ticker(payload: CreateTickerIn):
         exists = db.query(models.Ticker).filter(models.Ticker.symbol == payload.symbol).first()
         if exists:
             raise HTTPException(status_code=409, detail="Ticker already exists")
-        t = models.Ticker(symbol=payload.symbol, name=payload.name)
+        aliases = [a.strip() for a in payload.aliases if a.strip()]
+        t = models.Ticker(symbol=payload.symbol, name=payload.name, aliases=",".join(aliases))
         db.add(t)
         db.commit()
-        return TickerOut(symbol=t.symbol, name=t.name)
+        # scan stored reports for the new ticker in the background
+        jobs.submit("backfill-mentions", _backfill_job, group=MENTION_WRITERS)
+        return TickerOut(symbol=t.symbol, name=t.name, aliases=aliases)
+
+# Mention dashboards, served from mention_rollups only (app.db.rollups): a date range costs
+# one index range scan over ticker x day x source rows, whatever the size of mentions.
+
+_MAX_DAYS = 3660
+
+def _window_days(window: str) -> int:
+    n = int(window[:-1]) * (7 if window.endswith("w") else 1)
+    if not 1 <= n <= _MAX_DAYS:
+        raise HTTPException(status_code=422, detail=f"window must be between 1d and {_MAX_DAYS}d")
+    return n
+
+def _utc_today() -> date:
+    # rollup days are dates of the naive-UTC published_at
+    return datetime.utcnow().date()
+
+async def _trending(db: AsyncSession, days: int, asof: date, source_id: int | None, sort: str, limit: int) -> list[TrendingTickerOut]:
+    start = asof - timedelta(days=days - 1)
+    previous_start = start - timedelta(days=days)
+    r = models.MentionRollup
+    current = r.day >= start
+
+    def window_sum(col, in_window):
+        return func.sum(case((in_window, col), else_=0))
+
+    sums = (
+        select(r.ticker_id,
+               window_sum(r.mentions, current).label("mentions"), window_sum(r.reports, current).label("reports"),
+               window_sum(r.snippets, current).label("snippets"),
+               window_sum(r.mentions, ~current).label("previous_mentions"), window_sum(r.reports, ~current).label("previous_reports"))
+        .where(r.day >= previous_start, r.day <= asof)
+        .group_by(r.ticker_id)
+    )
+    if source_id is not None:
+        sums = sums.where(r.source_id == source_id)
+    sums = sums.subquery()
+    # sum per ticker id first, then one ticker lookup per result row
+    q = select(models.Ticker.symbol, models.Ticker.name, sums.c.mentions, sums.c.reports, sums.c.snippets,
+               sums.c.previous_mentions, sums.c.previous_reports).join(models.Ticker, models.Ticker.id == sums.c.ticker_id)
+    out = [
+        TrendingTickerOut(symbol=symbol, name=name, mentions=m, reports=n, snippets=sn, previous_mentions=pm,
+                          previous_reports=pn, change=round((m - pm) / pm, 4) if pm else None)
+        for symbol, name, m, n, sn, pm, pn in await db.execute(q)
+        if n
+    ]
+    if sort == "change":
+        # new names (no mentions before) first, then by growth
+        out.sort(key=lambda t: (t.change is not None, -(t.change or 0.0), -t.mentions, t.symbol))
+    else:
+        out.sort(key=lambda t: (-t.mentions, -t.reports, t.symbol))
+    return out[:limit]
+
+@router.get("/trending", response_model=list[TrendingTickerOut])
+async def trending(request: Request, window: str = Query("7d", pattern=r"^\d+[dw]$"), asof_date: date | None = None,
+                   source_id: int | None = None, sort: str = Query("mentions", pattern="^(mentions|change)$"),
+                   limit: int = Query(20, ge=1, le=500), db: AsyncSession = Depends(get_async_db)):
+    """Most mentioned tickers over the `window` ending asof_date (default today, UTC), with the
+    counts of the window before it."""
+    days, asof = _window_days(window), asof_date or _utc_today()
+    return await cached_json_async(request, ("trending", days, asof, source_id, sort, limit),
+                                   lambda: _trending(db, days, asof, source_id, sort, limit))
+
+async def _timeseries(db: AsyncSession, symbol: str, start: date, end: date, source_id: int | None) -> list[MentionPointOut]:
+    ticker_id = await db.scalar(select(models.Ticker.id).where(models.Ticker.symbol == symbol))
+    if ticker_id is None:
+        raise HTTPException(status_code=404, detail="Ticker not found")
+    r = models.MentionRollup
+    q = (
+        select(r.day, func.sum(r.mentions), func.sum(r.reports), func.sum(r.snippets))
+        .where(r.ticker_id == ticker_id, r.day >= start, r.day <= end)
+        .group_by(r.day)
+    )
+    if source_id is not None:
+        q = q.where(r.source_id == source_id)
+    found = {day: (m, n, sn) for day, m, n, sn in await db.execute(q)}
+    # one point per day, zeros included
+    points = []
+    for i in range((end - start).days + 1):
+        day = start + timedelta(days=i)
+        m, n, sn = found.get(day, (0, 0, 0))
+        points.append(MentionPointOut(day=day, mentions=m, reports=n, snippets=sn))
+    return points
+
+@router.get("/{symbol}/mentions/timeseries", response_model=list[MentionPointOut])
+async def mention_timeseries(request: Request, symbol: str, start: date | None = None, end: date | None = None,
+                             source_id: int | None = None, db: AsyncSession = Depends(get_async_db)):
+    """Daily mention counts for one ticker, start..end inclusive (default: the last 90 days)."""
+    end = end or _utc_today()
+    start = start or end - timedelta(days=89)
+    if not 0 <= (end - start).days < _MAX_DAYS:
+        raise HTTPException(status_code=422, detail=f"start must be on or before end, at most {_MAX_DAYS} days apart")
+    return await cached_json_async(request, ("mention_timeseries", symbol, start, end, source_id),
+                                   lambda: _timeseries(db, symbol, start, end, source_id))
+
+async def _get_summary(db: AsyncSession, symbol: str, asof_date: str) -> TickerSummaryOut:
+    row = await db.scalar(
+        select(models.TickerSummary)
+        .where(models.TickerSummary.symbol == symbol, models.TickerSummary.asof_date == asof_date)
+        .limit(1)
+    )
+    if not row:
+        raise HTTPException(status_code=404, detail="Summary not found")
+    return summary_out(row)
 
 @router.get("/{symbol}/summary", response_model=TickerSummaryOut)
-def get_summary(symbol: str, asof_date: str | None = None):
+async def get_summary(request: Request, symbol: str, asof_date: str | None = None, db: AsyncSession = Depends(get_async_db)):
     if asof_date is None:
         asof_date = date.today().isoformat()
-    with get_db() as db:
-        row = (
-            db.query(models.TickerSummary)
-            .filter(models.TickerSummary.symbol == symbol, models.TickerSummary.asof_date == asof_date)
-            .first()
-        )
-        if not row:
-            raise HTTPException(status_code=404, detail="Summary not found")
-        bullets = json.loads(row.bullets) if row.bullets else []
-        return TickerSummaryOut(
-            symbol=row.symbol,
-            asof_date=row.asof_date,
-            summary=row.summary,
-            bullets=bullets,
-            confidence=row.confidence,
-        )
-
-@router.post("/run-daily", response_model=RunDailyOut)
+    return await cached_json_async(request, ("summary", symbol, asof_date), lambda: _get_summary(db, symbol, asof_date))
+
+async def _backfill_job(job) -> dict:
+    with get_db() as db, job.stage("backfill") as st:
+        return backfill_mentions(db, progress=st.detail)
+
+async def _run_daily_job(job) -> dict:
+    return RunDailyOut(**await run_daily_pipeline_async(job)).model_dump()
+
+@router.post("/run-daily", response_model=JobOut, status_code=202)
 def run_daily():
-    # For local manual triggering.
-    result = run_daily_pipeline()
-    return result
+    # For local manual triggering. Runs in the background; poll GET /api/jobs/{id}.
+    job = jobs.submit("run-daily", _run_daily_job, group=MENTION_WRITERS)
+    return job_out(job)
@@ -1,12 +1,20 @@
 from pydantic import BaseModel
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+class ExtractRulesIn(BaseModel):
+    # CSS selectors, or XPath when starting with "/", "./" or "("; empty = generic extraction
+    content: str = ""
+    title: str = ""
+    date: str = ""
+    remove: List[str] = []
 
 class SourceOut(BaseModel):
     id: int
     name: str
     kind: str
     url: str
+    extract_rules: Optional[ExtractRulesIn] = None
 
 class ReportOut(BaseModel):
     id: int
@@ -17,6 +25,23 @@ class ReportOut(BaseModel):
 class TickerOut(BaseModel):
     symbol: str
     name: str
+    aliases: List[str] = []
+
+class TrendingTickerOut(BaseModel):
+    symbol: str
+    name: str
+    mentions: int  # term matches in the window
+    reports: int
+    snippets: int
+    previous_mentions: int  # the window before it, same length
+    previous_reports: int
+    change: Optional[float] = None  # mentions vs the previous window; None when it had none
+
+class MentionPointOut(BaseModel):
+    day: date
+    mentions: int
+    reports: int
+    snippets: int
 
 class TickerSummaryOut(BaseModel):
     symbol: str
@@ -28,14 +53,67 @@ class TickerSummaryOut(BaseModel):
 class CreateTickerIn(BaseModel):
     symbol: str
     name: str
+    aliases: List[str] = []
 
 class CreateSourceIn(BaseModel):
     name: str
     kind: str
     url: str
+    extract_rules: Optional[ExtractRulesIn] = None
 
 class RunDailyOut(BaseModel):
+    run_id: int = 0
+    status: str = ""  # succeeded | partial | failed (items left to retry)
+    failed_items: int = 0
     fetched_reports: int
     mentions_created: int
     summaries_created: int
     asof_date: str
+    llm_stats: Dict[str, float] = {}
+    summary_cache_hits: int = 0
+    summary_cache_misses: int = 0
+
+class JobStageOut(BaseModel):
+    name: str
+    status: str
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    elapsed_s: float
+    detail: Dict[str, Any] = {}
+
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    status: str
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    stages: List[JobStageOut] = []
+    result: Optional[Dict[str, Any]] = None  # RunDailyOut fields for run-daily jobs
+    error: Optional[str] = None
+
+class SearchHitOut(BaseModel):
+    report_id: int
+    title: str
+    published_at: datetime
+    source_id: int
+    symbol: Optional[str] = None      # snippets scope
+    mention_id: Optional[int] = None  # snippets scope
+    score: float
+    highlight: str
+
+class SearchOut(BaseModel):
+    hits: List[SearchHitOut]
+    next_cursor: Optional[str] = None
+
+class CacheStatsOut(BaseModel):
+    generation: int
+    db_generation: Optional[int] = None
+    entries: int
+    max_entries: int
+    bytes: int
+    hits: int
+    misses: int
+    hit_rate: float
+    evicted: int
+    ttl_seconds: float
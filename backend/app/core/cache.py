@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+# In-process response cache for the read-heavy routes.
+# Entries are tagged with a generation; any committed DB write bumps it (see app.db.base),
+# so the data changing once per daily run invalidates everything at once, and the TTL
+# bounds staleness for time-relative queries such as "reports from the last N days".
+# Writes from other processes (queue workers, run_daily, backfills) are seen through the
+# data_version counter they increment in the same transaction: lookups poll it at most every
+# RESPONSE_CACHE_DB_POLL_S (a primary-key read) and bump when it moved.
+
+@dataclass
+class CachedBody:
+    body: bytes
+    etag: str
+    generation: int
+    expires_at: float
+
+class ResponseCache:
+    def __init__(self, max_entries: int | None = None, ttl_seconds: float | None = None):
+        self.max_entries = max_entries or settings.RESPONSE_CACHE_MAX_ENTRIES
+        self.ttl = ttl_seconds if ttl_seconds is not None else settings.RESPONSE_CACHE_TTL_SECONDS
+        self.generation = 0
+        self.db_generation: Optional[int] = None  # last data_version seen
+        self.source: Optional[Callable[[], int]] = None  # reads data_version (set by app.db.base)
+        self._polled = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, CachedBody] = OrderedDict()
+        self._building: Dict[Hashable, asyncio.Future] = {}  # async misses being built, by key
+
+    def bump(self, db_generation: Optional[int] = None):
+        """Drop every entry; `db_generation` is the data_version a write of this process committed."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            if db_generation is not None and (self.db_generation is None or db_generation > self.db_generation):
+                self.db_generation = db_generation
+
+    def poll(self):
+        """Bump when data_version moved since it was last seen (rate-limited; errors keep the cache)."""
+        now = time.monotonic()
+        if self.source is None or now - self._polled < settings.RESPONSE_CACHE_DB_POLL_S:
+            return
+        self._polled = now
+        try:
+            current = self.source()
+        except Exception:
+            return  # e.g. not migrated yet; the TTL still bounds staleness
+        with self._lock:
+            if current == self.db_generation:
+                return
+            self.db_generation = current
+        self.bump()
+
+    def get(self, key: Hashable) -> CachedBody | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.generation != self.generation or entry.expires_at < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, body: bytes, generation: int) -> CachedBody:
+        entry = CachedBody(body=body, etag=_etag(body), generation=generation, expires_at=time.monotonic() + self.ttl)
+        with self._lock:
+            if generation != self.generation:
+                return entry  # data changed while we were building it; serve but don't keep
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "generation": self.generation,
+                "db_generation": self.db_generation,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": sum(len(e.body) for e in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evicted": self.evicted,
+                "ttl_seconds": self.ttl,
+            }
+
+response_cache = ResponseCache()
+
+def _etag(body: bytes) -> str:
+    # weak: GZipMiddleware serves the same entity gzipped or not, under this one tag
+    return 'W/"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def _not_modified(request: Request, etag: str) -> bool:
+    # weak comparison, as If-None-Match calls for
+    header = request.headers.get("if-none-match", "")
+    return header.strip() == "*" or etag.removeprefix("W/") in [t.strip().removeprefix("W/") for t in header.split(",")]
+
+def _gzipped(request: Request, body: bytes) -> bool:
+    # GZipMiddleware's own test; it adds Vary: Accept-Encoding to the responses it compresses
+    return "gzip" in request.headers.get("accept-encoding", "") and len(body) >= settings.GZIP_MIN_BYTES
+
+def _encode(value: Any) -> bytes:
+    # pydantic's serializer is ~10x faster than jsonable_encoder, and async routes encode on the event loop
+    if isinstance(value, BaseModel):
+        return value.model_dump_json().encode("utf-8")
+    if isinstance(value, list) and all(isinstance(v, BaseModel) for v in value):
+        return b"[" + b",".join(v.model_dump_json().encode("utf-8") for v in value) + b"]"
+    return json.dumps(jsonable_encoder(value), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _respond(request: Request, entry: CachedBody) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": settings.RESPONSE_CACHE_CONTROL}
+    if _not_modified(request, entry.etag):
+        headers["Vary"] = "Accept-Encoding"  # as the 200 would have had
+        return Response(status_code=304, headers=headers)
+    if not _gzipped(request, entry.body):
+        headers["Vary"] = "Accept-Encoding"
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+def cached_json(request: Request, key: Hashable, build: Callable[[], Any], cache: ResponseCache | None = None) -> Response:
+    """Serve build() as JSON from the cache, with a weak ETag and 304 on a matching If-None-Match."""
+    cache = cache or response_cache
+    cache.poll()
+    entry = cache.get(key)
+    if entry is None:
+        generation = cache.generation  # read before building so a concurrent bump wins
+        entry = cache.put(key, _encode(build()), generation)
+    return _respond(request, entry)
+
+async def cached_json_async(request: Request, key: Hashable, build: Callable[[], Awaitable[Any]],
+                            cache: ResponseCache | None = None) -> Response:
+    """cached_json() for async routes: build is awaited only on a miss, and only once per key
+    at a time; concurrent misses wait for that build instead of each querying the database
+    (a cold or just-invalidated cache under load would otherwise queue hundreds of them on
+    the small connection pool). With the cache disabled (TTL 0) every request builds."""
+    cache = cache or response_cache
+    cache.poll()
+    entry = cache.get(key)
+    if entry is not None:
+        return _respond(request, entry)
+    if cache.ttl <= 0:
+        return _respond(request, cache.put(key, _encode(await build()), cache.generation))
+    while key in cache._building:
+        entry = await asyncio.shield(cache._building[key])  # None if that build failed
+        if entry is not None:
+            return _respond(request, entry)
+    building = cache._building[key] = asyncio.get_running_loop().create_future()
+    try:
+        generation = cache.generation
+        entry = cache.put(key, _encode(await build()), generation)
+    finally:
+        del cache._building[key]
+        building.set_result(entry)
+    return _respond(request, entry)
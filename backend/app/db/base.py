@@ -1,15 +1,77 @@
-from sqlalchemy import create_engine
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
-from app.core.config import settings
+from app.core.cache import response_cache
+from app.core.metrics import CALL_SECONDS
+from app.db.engine import make_async_engine, make_engine
 
 class Base(DeclarativeBase):
     pass
 
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {})
+engine = make_engine()
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# The async engine opens no connection until first use. Its sessions run on SessionLocal's
+# session class, so the listeners below apply to them as well.
+async_engine = make_async_engine()
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False, sync_session_class=SessionLocal.class_
+)
+
+# Committed writes invalidate cached API responses. ORM flushes and bulk
+# insert/update/delete statements both mark the session; read-only sessions never bump, and
+# neither do writes to bookkeeping tables the API does not serve (queue leases, run
+# checkpoints). A marked commit also increments data_version in the same transaction, which
+# API processes poll (app.core.cache), so writes by workers in other processes invalidate too.
+_UNSERVED = frozenset({"work_items", "run_items", "pipeline_runs", "summary_cache", "data_version"})
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_flush(session, flush_context):
+    if any(getattr(obj, "__tablename__", None) not in _UNSERVED
+           for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["wrote"] = True
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _mark_execute(state):
+    if (state.is_insert or state.is_update or state.is_delete) \
+            and getattr(getattr(state.statement, "table", None), "name", None) not in _UNSERVED:
+        state.session.info["wrote"] = True
+
+@event.listens_for(SessionLocal, "before_commit")
+def _commit_started(session):
+    session.info["commit_t0"] = time.perf_counter()
+    session.flush()  # commit flushes after this hook; the flush may be what marks the session
+    if session.info.get("wrote"):
+        from app.db import models
+        from app.db.bulk import upsert
+        row = upsert(session, models.DataVersion, [{"id": 1, "generation": 1}], ["id"],
+                     increment_cols=["generation"], returning=[models.DataVersion.generation])
+        session.info["db_generation"] = row[0].generation
+
+@event.listens_for(SessionLocal, "after_commit")
+def _bump_generation(session):
+    t0 = session.info.pop("commit_t0", None)
+    if t0 is not None:
+        CALL_SECONDS.observe(time.perf_counter() - t0, call="db_commit")
+    db_generation = session.info.pop("db_generation", None)
+    if session.info.pop("wrote", False):
+        response_cache.bump(db_generation)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _clear_mark(session):
+    session.info.pop("wrote", None)
+    session.info.pop("db_generation", None)
+
+def _db_generation() -> int:
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT generation FROM data_version WHERE id = 1")).scalar() or 0
+
+response_cache.source = _db_generation
+
 def init_db():
-    # Import models to register metadata
-    from app.db import models  # noqa: F401
-    Base.metadata.create_all(bind=engine)
+    # Import models to register metadata; migrate adds tables, columns and indexes
+    from app.db.migrate import upgrade
+    upgrade(engine)
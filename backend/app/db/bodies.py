@@ -0,0 +1,197 @@
+import argparse
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.db import models
+from app.db.bulk import chunked, upsert
+
+try:
+    import zstandard
+except ImportError:  # optional: bodies fall back to zlib without it
+    zstandard = None
+
+# Report bodies live in report_bodies, apart from the metadata in reports, so listing and
+# filtering reports never pages document text in. Every row names its codec (and dictionary),
+# so changing REPORT_BODY_CODEC or training a new dictionary applies to new reports without
+# rewriting old ones:
+#   plain   utf-8 bytes
+#   zlib    zlib stream of the utf-8 bytes
+#   zstd    one zstandard frame; with dict_id > 0 compressed against body_dictionaries[dict_id]
+#
+# Broker reports share a lot of boilerplate (disclaimers, table headers, stock phrases), which
+# a per-document compressor cannot exploit on short texts; a dictionary trained on our own
+# corpus (python -m app.db.bodies --train) can, and is used for every body written after it.
+
+_local = threading.local()  # zstandard (de)compressors are not thread-safe
+_dictionaries: Dict[int, "zstandard.ZstdCompressionDict"] = {}
+
+def _compressor(dict_id: int = 0):
+    cache = _local.__dict__.setdefault("compressors", {})
+    c = cache.get(dict_id)
+    if c is None:
+        kw = {"dict_data": _dictionaries[dict_id]} if dict_id else {}
+        c = cache[dict_id] = zstandard.ZstdCompressor(level=settings.REPORT_BODY_ZSTD_LEVEL, **kw)
+    return c
+
+def _decompressor(dict_id: int = 0):
+    cache = _local.__dict__.setdefault("decompressors", {})
+    d = cache.get(dict_id)
+    if d is None:
+        kw = {"dict_data": _dictionaries[dict_id]} if dict_id else {}
+        d = cache[dict_id] = zstandard.ZstdDecompressor(**kw)
+    return d
+
+def _load_dictionaries(db: Session, dict_ids: Iterable[int]):
+    missing = {i for i in dict_ids if i and i not in _dictionaries}
+    if not missing:
+        return
+    if zstandard is None:
+        raise RuntimeError("report bodies use a zstd dictionary but the zstandard package is not installed")
+    rows = db.execute(select(models.BodyDictionary.id, models.BodyDictionary.data).where(models.BodyDictionary.id.in_(missing)))
+    for dict_id, data in rows:
+        _dictionaries[dict_id] = zstandard.ZstdCompressionDict(bytes(data))
+
+def codec() -> str:
+    """The codec new bodies are written with."""
+    if settings.REPORT_BODY_CODEC == "zstd" and zstandard is None:
+        return "zlib"
+    return settings.REPORT_BODY_CODEC
+
+def active_dictionary(db: Session) -> int:
+    """Id of the newest trained dictionary, 0 if none (or the codec does not use one)."""
+    if codec() != "zstd":
+        return 0
+    dict_id = db.scalar(select(func.max(models.BodyDictionary.id))) or 0
+    _load_dictionaries(db, [dict_id])
+    return dict_id
+
+def encode(text: str, dict_id: int = 0) -> Tuple[str, bytes]:
+    data = text.encode("utf-8")
+    name = codec()
+    if name == "zstd":
+        return name, _compressor(dict_id).compress(data)
+    if name == "zlib":
+        return name, zlib.compress(data, 6)
+    return "plain", data
+
+def decode(name: str, data: bytes, dict_id: int = 0) -> str:
+    """Decode one body; dictionaries must have been loaded (load_bodies/iter_texts do that)."""
+    if name == "plain":
+        return bytes(data).decode("utf-8")
+    if name == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    if name == "zstd":
+        if zstandard is None:
+            raise RuntimeError("report body is zstd-compressed but the zstandard package is not installed")
+        return _decompressor(dict_id).decompress(data).decode("utf-8")
+    raise ValueError(f"unknown report body codec {name!r}")
+
+def body_row(report_id: int, text: str, dict_id: int = 0) -> Dict:
+    name, data = encode(text, dict_id)
+    return {"report_id": report_id, "codec": name, "dict_id": dict_id if name == "zstd" else 0,
+            "size": len(text.encode("utf-8")), "data": data}
+
+def body_text(body: Optional[models.ReportBody]) -> str:
+    """Decoded text of a loaded ReportBody (backs Report.raw_text)."""
+    if body is None:
+        return ""
+    if body.dict_id:
+        _load_dictionaries(object_session(body), [body.dict_id])
+    return decode(body.codec, body.data, body.dict_id)
+
+def store_bodies(db: Session, bodies: Iterable[Tuple[int, str]]):
+    """(report_id, text) -> report_bodies, replacing existing bodies. Does not commit."""
+    dict_id = active_dictionary(db)
+    rows = [body_row(rid, text, dict_id) for rid, text in bodies]
+    upsert(db, models.ReportBody, rows, ["report_id"], update_cols=["codec", "dict_id", "size", "data"])
+
+def load_bodies(db: Session, report_ids: Iterable[int]) -> Dict[int, str]:
+    out: Dict[int, str] = {}
+    for batch in chunked(list(report_ids)):
+        rows = db.execute(
+            select(models.ReportBody.report_id, models.ReportBody.codec, models.ReportBody.dict_id, models.ReportBody.data)
+            .where(models.ReportBody.report_id.in_(batch))
+        )
+        out.update(iter_texts(db, rows))
+    return out
+
+def iter_texts(db: Session, rows: Iterable) -> Iterator[Tuple]:
+    """Rows ending in (codec, dict_id, data) -> the same rows with the decoded text in their place.
+
+    This is how the mention scanner and backfill read bodies: streamed, one decode per row.
+    """
+    for *head, name, dict_id, data in rows:
+        if dict_id and dict_id not in _dictionaries:
+            _load_dictionaries(db, [dict_id])
+        yield (*head, decode(name, data, dict_id))
+
+# --- dictionary training ------------------------------------------------------
+
+def train_dictionary(db: Session, samples: Optional[int] = None, size_kb: Optional[int] = None) -> int:
+    """Train a zstd dictionary on the newest `samples` bodies and make it the active one."""
+    if zstandard is None:
+        raise RuntimeError("training a dictionary needs the zstandard package")
+    samples = samples or settings.REPORT_BODY_DICT_SAMPLES
+    ids = list(db.scalars(select(models.ReportBody.report_id).order_by(models.ReportBody.report_id.desc()).limit(samples)))
+    texts = [t.encode("utf-8") for t in load_bodies(db, ids).values() if t]
+    if len(texts) < 10:
+        raise ValueError(f"need at least 10 stored reports to train a dictionary, have {len(texts)}")
+    trained = zstandard.train_dictionary((size_kb or settings.REPORT_BODY_DICT_SIZE_KB) * 1024, texts,
+                                         level=settings.REPORT_BODY_ZSTD_LEVEL)
+    row = models.BodyDictionary(data=trained.as_bytes(), samples=len(texts), created_at=datetime.utcnow())
+    db.add(row)
+    db.commit()
+    return row.id
+
+def recompress(db: Session, batch_size: int = 500) -> int:
+    """Rewrite bodies not yet using the current codec/dictionary; commits per batch."""
+    dict_id = active_dictionary(db)
+    name = codec()
+    done = 0
+    after = 0
+    while True:
+        ids: List[int] = list(db.scalars(
+            select(models.ReportBody.report_id)
+            .where(models.ReportBody.report_id > after,
+                   (models.ReportBody.codec != name) | (models.ReportBody.dict_id != dict_id))
+            .order_by(models.ReportBody.report_id)
+            .limit(batch_size)
+        ))
+        if not ids:
+            return done
+        store_bodies(db, load_bodies(db, ids).items())
+        db.commit()
+        done += len(ids)
+        after = ids[-1]
+
+def stats(db: Session) -> List[Dict]:
+    rows = db.execute(
+        select(models.ReportBody.codec, models.ReportBody.dict_id, func.count(),
+               func.sum(models.ReportBody.size), func.sum(func.length(models.ReportBody.data)))
+        .group_by(models.ReportBody.codec, models.ReportBody.dict_id)
+    )
+    return [
+        {"codec": name, "dict_id": dict_id, "bodies": n, "raw_bytes": raw or 0, "stored_bytes": stored or 0,
+         "ratio": round((raw or 0) / stored, 2) if stored else 0.0}
+        for name, dict_id, n, raw, stored in rows
+    ]
+
+if __name__ == "__main__":
+    from app.db.session import get_db
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--train", action="store_true", help="train a new dictionary on the stored bodies")
+    ap.add_argument("--recompress", action="store_true", help="rewrite old bodies with the current codec/dictionary")
+    args = ap.parse_args()
+    with get_db() as db:
+        if args.train:
+            print(f"trained dictionary {train_dictionary(db)}")
+        if args.recompress:
+            print(f"recompressed {recompress(db)} bodies")
+        for row in stats(db):
+            print(row)
@@ -0,0 +1,49 @@
+from typing import Iterable, Iterator, Sequence
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+# Set-based write helpers: INSERT ... ON CONFLICT for SQLite and Postgres, in batches.
+
+def chunked(rows: Sequence, size: int | None = None) -> Iterator[Sequence]:
+    size = size or settings.DB_BATCH_SIZE
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+def _insert(db: Session, model):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise NotImplementedError(f"ON CONFLICT is not supported for dialect {dialect!r}")
+
+def upsert(db: Session, model, rows: list[dict], conflict_cols: Iterable[str],
+           update_cols: Iterable[str] | None = None, returning=None, increment_cols: Iterable[str] | None = None) -> list:
+    """Insert rows, skipping (no update_cols) or updating conflicting ones.
+
+    ``increment_cols`` are added to the existing values instead of replacing them (counters).
+    With ``returning`` (columns), returns the rows actually inserted or updated.
+    Does not commit.
+    """
+    if not rows:
+        return []
+    conflict_cols = list(conflict_cols)
+    table = model.__table__
+    out = []
+    for batch in chunked(rows):
+        stmt = _insert(db, model).values(list(batch))
+        set_ = {c: getattr(stmt.excluded, c) for c in update_cols or ()}
+        set_.update({c: table.c[c] + getattr(stmt.excluded, c) for c in increment_cols or ()})
+        if set_:
+            stmt = stmt.on_conflict_do_update(index_elements=conflict_cols, set_=set_)
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=conflict_cols)
+        if returning is not None:
+            stmt = stmt.returning(*returning)
+            out.extend(db.execute(stmt).all())
+        else:
+            db.execute(stmt)
+    return out
@@ -0,0 +1,69 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+
+# Engine configuration. SQLite gets WAL so API readers are not blocked by the run-daily writer,
+# plus pragmas that trade a little durability (synchronous=NORMAL is still safe under WAL) for speed.
+
+def _sqlite_pragmas() -> list[str]:
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_MB * 1024}",  # negative = KiB
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+def _on_connect(dbapi_conn, _record):
+    cur = dbapi_conn.cursor()
+    for pragma in _sqlite_pragmas():
+        cur.execute(pragma)
+    cur.close()
+
+def _pool_args() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_S,
+        "pool_recycle": settings.DB_POOL_RECYCLE_S,
+        "pool_pre_ping": True,
+    }
+
+def make_engine(url: str | None = None) -> Engine:
+    url = url or settings.DATABASE_URL
+    if not url.startswith("sqlite"):
+        return create_engine(url, **_pool_args())
+
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", _on_connect)
+    return engine
+
+# Async drivers for the same database, used by the read API so requests wait on the event
+# loop instead of holding a threadpool worker each.
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+def async_url(url: str) -> str:
+    """sqlite:///x.db -> sqlite+aiosqlite:///x.db, postgresql+psycopg://... -> postgresql+asyncpg://..."""
+    u = make_url(url)
+    driver = ASYNC_DRIVERS.get(u.get_backend_name())
+    if driver is None:
+        raise ValueError(f"no async driver configured for {u.get_backend_name()!r}")
+    return u.set(drivername=f"{u.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+def make_async_engine(url: str | None = None) -> AsyncEngine:
+    url = async_url(url or settings.DATABASE_URL)
+    if not url.startswith("sqlite"):
+        return create_async_engine(url, **_pool_args())
+
+    # aiosqlite defaults to NullPool (a new connection, thread and pragma round per request);
+    # every connection is a worker thread and SQLite runs one writer anyway, so keep it small
+    engine = create_async_engine(
+        url, poolclass=AsyncAdaptedQueuePool, pool_size=settings.SQLITE_ASYNC_POOL_SIZE,
+        max_overflow=settings.SQLITE_ASYNC_MAX_OVERFLOW,
+    )
+    event.listen(engine.sync_engine, "connect", _on_connect)
+    return engine
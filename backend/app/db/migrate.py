@@ -0,0 +1,205 @@
+import sys
+
+from sqlalchemy import and_, inspect, or_, select, func, text
+from sqlalchemy.engine import Engine
+
+from app.db.base import Base, engine as default_engine
+from app.db.bodies import body_row
+from app.db.partitions import create_tables, ensure_partitions
+from app.db.search import ensure_search_tables
+
+# Lightweight, idempotent schema migration (no Alembic dependency):
+# - create_all for missing tables (partitioned on Postgres, see app.db.partitions)
+# - ALTER TABLE ADD COLUMN for columns added to models after a DB was created
+# - data steps for changes that move data between columns/tables
+# - CREATE INDEX for indexes declared on models but missing in the DB
+# - FTS5 search tables (SQLite only), Postgres partitions
+
+def _add_missing_columns(engine: Engine) -> list[str]:
+    insp = inspect(engine)
+    applied = []
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in existing:
+                    continue
+                ddl = col.type.compile(dialect=engine.dialect)
+                default = col.default.arg if col.default is not None and col.default.is_scalar else None
+                clause = ""
+                if default is not None:
+                    clause = f" NOT NULL DEFAULT '{default}'" if isinstance(default, str) else f" NOT NULL DEFAULT {default}"
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {col.name} {ddl}{clause}"))
+                applied.append(f"add column {table.name}.{col.name}")
+    return applied
+
+def _add_missing_indexes(engine: Engine) -> list[str]:
+    insp = inspect(engine)
+    applied = []
+    for table in Base.metadata.sorted_tables:
+        existing = {ix["name"] for ix in insp.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+                applied.append(f"create index {index.name}")
+    return applied
+
+def _move_report_bodies(engine: Engine) -> list[str]:
+    # reports.raw_text -> report_bodies (encoded with the configured codec), then drop the column
+    if "raw_text" not in {c["name"] for c in inspect(engine).get_columns("reports")}:
+        return []
+    moved = 0
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            "SELECT id, raw_text FROM reports WHERE id NOT IN (SELECT report_id FROM report_bodies)"
+        )).yield_per(1000)
+        for batch in rows.partitions():
+            conn.execute(text(
+                "INSERT INTO report_bodies (report_id, codec, dict_id, size, data) VALUES (:report_id, :codec, :dict_id, :size, :data)"
+            ), [body_row(rid, raw_text or "") for rid, raw_text in batch])
+            moved += len(batch)
+        conn.execute(text("ALTER TABLE reports DROP COLUMN raw_text"))
+    return [f"move {moved} report bodies to report_bodies", "drop column reports.raw_text"]
+
+def _fill_mention_dates(engine: Engine) -> list[str]:
+    with engine.begin() as conn:
+        n = conn.execute(text(
+            "UPDATE mentions SET published_at = (SELECT published_at FROM reports WHERE reports.id = mentions.report_id) "
+            "WHERE published_at IS NULL"
+        )).rowcount
+    return [f"fill mentions.published_at ({n} rows)"] if n else []
+
+def _fill_mention_rollups(engine: Engine) -> list[str]:
+    # mention_rollups added to a database that already has mentions
+    from sqlalchemy.orm import Session
+    from app.db import models, rollups
+    with Session(engine) as db:
+        if db.scalar(select(models.MentionRollup.ticker_id).limit(1)) is not None or db.scalar(select(models.Mention.id).limit(1)) is None:
+            return []
+        n = rollups.rebuild(db)
+        db.commit()
+    return [f"fill mention_rollups ({n} rows)"]
+
+def upgrade(engine: Engine | None = None) -> list[str]:
+    from app.db import models  # noqa: F401
+    engine = engine or default_engine
+    create_tables(engine)
+    applied = _add_missing_columns(engine)
+    applied += _move_report_bodies(engine) + _fill_mention_dates(engine) + _fill_mention_rollups(engine)
+    return applied + _add_missing_indexes(engine) + ensure_search_tables(engine) + ensure_partitions(engine)
+
+# --- query plan guard -------------------------------------------------------
+
+def hot_queries() -> dict:
+    """The statements behind list_reports, get_summary, create_summaries, the mention dashboards,
+    near-duplicate lookup, the mention backfill and the worker queue."""
+    from datetime import date, datetime
+    from app.db import models
+
+    ranked = (
+        select(
+            models.Mention.ticker_id,
+            models.Mention.report_id,
+            models.Mention.published_at,
+            models.Mention.snippets,
+            func.row_number().over(partition_by=models.Mention.ticker_id, order_by=models.Mention.published_at.desc()).label("rn"),
+        )
+        .where(models.Mention.ticker_id.in_([1, 2, 3]))
+        .subquery()
+    )
+    rollup_sums = (
+        select(models.MentionRollup.ticker_id, func.sum(models.MentionRollup.mentions).label("mentions"))
+        .where(models.MentionRollup.day >= date(2024, 1, 1), models.MentionRollup.day <= date(2024, 1, 14))
+        .group_by(models.MentionRollup.ticker_id)
+        .subquery()
+    )
+    return {
+        "list_reports": (
+            select(models.Report.id, models.Report.title, models.Report.published_at, models.Report.source_id)
+            .where(models.Report.published_at >= datetime(2024, 1, 1))
+            .order_by(models.Report.published_at.desc())
+            .limit(200)
+        ),
+        "get_summary": (
+            select(models.TickerSummary)
+            .where(models.TickerSummary.symbol == "005930", models.TickerSummary.asof_date == "2024-01-01")
+        ),
+        "create_summaries.done": (
+            select(models.TickerSummary.symbol).where(models.TickerSummary.asof_date == "2024-01-01")
+        ),
+        "create_summaries.latest_mentions": (
+            select(ranked.c.ticker_id, ranked.c.published_at, ranked.c.snippets, models.Report.id, models.Report.source_id)
+            .join(models.Report, models.Report.id == ranked.c.report_id)
+            .where(ranked.c.rn <= 50)
+        ),
+        "tickers.trending": (
+            select(models.Ticker.symbol, rollup_sums.c.mentions)
+            .join(models.Ticker, models.Ticker.id == rollup_sums.c.ticker_id)
+        ),
+        "tickers.mention_timeseries": (
+            select(models.MentionRollup.day, func.sum(models.MentionRollup.mentions))
+            .where(models.MentionRollup.ticker_id == 1, models.MentionRollup.day >= date(2024, 1, 1), models.MentionRollup.day <= date(2024, 3, 31))
+            .group_by(models.MentionRollup.day)
+        ),
+        "store_reports.existing_hashes": (
+            select(models.Report.source_id, models.Report.raw_hash).where(models.Report.raw_hash.in_(["a", "b"]))
+        ),
+        "near_dup.candidates": (
+            select(models.ReportBucket.bucket, models.ReportBucket.report_id).where(models.ReportBucket.bucket.in_([1, 2, 3]))
+        ),
+        "backfill.pending": (
+            select(func.count()).select_from(models.Report).where(models.Report.scanned_ticker_id < 10)
+        ),
+        "backfill.chunk": (
+            select(models.Report.id, models.Report.scanned_ticker_id,
+                   models.ReportBody.codec, models.ReportBody.dict_id, models.ReportBody.data)
+            .join(models.ReportBody, models.ReportBody.report_id == models.Report.id)
+            .where(models.Report.scanned_ticker_id < 10, models.Report.id > 0)
+            .order_by(models.Report.id)
+            .limit(500)
+        ),
+        "queue.claim": (
+            select(models.WorkItem.id)
+            .where(or_(
+                and_(models.WorkItem.status == "pending", models.WorkItem.available_at <= datetime(2024, 1, 1)),
+                and_(models.WorkItem.status == "leased", models.WorkItem.lease_expires_at < datetime(2024, 1, 1)),
+            ))
+            .order_by(models.WorkItem.id)
+            .limit(8)
+        ),
+        "queue.stage_items": (
+            select(func.count()).select_from(models.WorkItem)
+            .where(models.WorkItem.run_id == 1, models.WorkItem.kind == "fetch")
+        ),
+    }
+
+def check_query_plans(engine: Engine | None = None) -> list[str]:
+    """Return the hot queries whose SQLite plan falls back to a full table scan."""
+    engine = engine or default_engine
+    if engine.dialect.name != "sqlite":
+        return []
+    queries = hot_queries()
+    tables = set(Base.metadata.tables)
+    problems = []
+    with engine.connect() as conn:
+        for name, stmt in queries.items():
+            sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")):
+                detail = row[-1]
+                words = detail.split()
+                # any SCAN of a real table (with or without an index) walks all of it;
+                # indexed lookups show up as SEARCH
+                if len(words) >= 2 and words[0] == "SCAN" and words[1] in tables:
+                    problems.append(f"{name}: {detail}")
+    return problems
+
+if __name__ == "__main__":
+    for step in upgrade():
+        print(step)
+    if "--check-plans" in sys.argv:
+        problems = check_query_plans()
+        for p in problems:
+            print(f"table scan: {p}")
+        sys.exit(1 if problems else 0)
@@ -1,6 +1,6 @@
-from sqlalchemy import String, Text, DateTime, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy import String, Text, Date, DateTime, Integer, BigInteger, ForeignKey, LargeBinary, UniqueConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from datetime import datetime
+from datetime import date, datetime
 
 from app.db.base import Base
 
@@ -12,12 +12,22 @@ class Source(Base):
     kind: Mapped[str] = mapped_column(String(50), nullable=False)  # html | pdf
     url: Mapped[str] = mapped_column(Text, nullable=False, unique=True)
 
+    # validators from the last successful fetch (conditional GET / unchanged-body skip)
+    etag: Mapped[str] = mapped_column(String(200), nullable=False, default="")
+    last_modified: Mapped[str] = mapped_column(String(100), nullable=False, default="")
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False, default="")  # sha256 of raw bytes
+    # JSON selectors for the article body/title/date on this source's pages (app.services.html_extract)
+    extract_rules: Mapped[str] = mapped_column(Text, nullable=False, default="")
+
     reports: Mapped[list["Report"]] = relationship(back_populates="source")
 
 class Report(Base):
     __tablename__ = "reports"
     __table_args__ = (
         UniqueConstraint("source_id", "published_at", name="uq_report_source_pub"),
+        Index("ix_reports_published_at", "published_at"),              # list_reports
+        Index("ix_reports_raw_hash_source", "raw_hash", "source_id"),  # dedup preload
+        Index("ix_reports_scanned_ticker", "scanned_ticker_id", "id"),  # mention backfill
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -26,13 +36,61 @@ class Report(Base):
     title: Mapped[str] = mapped_column(String(400), nullable=False, default="")
     published_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
 
-    raw_text: Mapped[str] = mapped_column(Text, nullable=False)
     raw_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    # highest Ticker.id this report has been scanned against (mention backfill watermark)
+    scanned_ticker_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # canonical report of this one's near-duplicate cluster; NULL for canonical reports, the
+    # only ones scanned for mentions (see app.db.near_dup)
+    duplicate_of: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # publish date stated on the page itself, when the extractor found one; published_at is the
+    # time it was fetched (one report per source and fetch)
+    article_published_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
 
     source: Mapped["Source"] = relationship(back_populates="reports")
     mentions: Mapped[list["Mention"]] = relationship(back_populates="report", cascade="all, delete-orphan")
+    # the document text lives in report_bodies; loaded only when raw_text is read
+    body: Mapped["ReportBody"] = relationship(back_populates="report", cascade="all, delete-orphan", lazy="select")
+
+    @property
+    def raw_text(self) -> str:
+        from app.db.bodies import body_text  # bodies imports models
+        return body_text(self.body)
+
+# document text, kept out of reports so metadata scans never page it in (see app.db.bodies)
+class ReportBody(Base):
+    __tablename__ = "report_bodies"
+
+    report_id: Mapped[int] = mapped_column(ForeignKey("reports.id"), primary_key=True, autoincrement=False)
+    codec: Mapped[str] = mapped_column(String(20), nullable=False)  # plain | zlib | zstd
+    dict_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # body_dictionaries.id, 0 = none
+    size: Mapped[int] = mapped_column(Integer, nullable=False)  # uncompressed bytes
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False, deferred=True)
+
+    report: Mapped["Report"] = relationship(back_populates="body")
+
+# near-duplicate index: a MinHash signature per report plus one row per LSH band bucket
+class ReportSignature(Base):
+    __tablename__ = "report_signatures"
+
+    report_id: Mapped[int] = mapped_column(ForeignKey("reports.id"), primary_key=True, autoincrement=False)
+    signature: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+class ReportBucket(Base):
+    __tablename__ = "report_buckets"
+
+    bucket: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    report_id: Mapped[int] = mapped_column(ForeignKey("reports.id"), primary_key=True, autoincrement=False)
+
+class BodyDictionary(Base):
+    __tablename__ = "body_dictionaries"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    codec: Mapped[str] = mapped_column(String(20), nullable=False, default="zstd")
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    samples: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # bodies it was trained on
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
 
 class Ticker(Base):
     __tablename__ = "tickers"
@@ -40,29 +98,53 @@ class Ticker(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     symbol: Mapped[str] = mapped_column(String(20), unique=True, nullable=False)  # e.g., 005930
     name: Mapped[str] = mapped_column(String(200), nullable=False)               # e.g., 삼성전자
+    aliases: Mapped[str] = mapped_column(Text, nullable=False, default="")       # comma separated, e.g., 삼전,Samsung Electronics
 
     mentions: Mapped[list["Mention"]] = relationship(back_populates="ticker")
 
 class Mention(Base):
     __tablename__ = "mentions"
     __table_args__ = (
-        UniqueConstraint("report_id", "ticker_id", name="uq_mention_report_ticker"),
+        # upsert target; carries published_at so it stays valid on partitioned Postgres tables
+        Index("uq_mentions_report_ticker_pub", "report_id", "ticker_id", "published_at", unique=True),
+        Index("ix_mentions_ticker_report", "ticker_id", "report_id"),
+        Index("ix_mentions_ticker_pub", "ticker_id", "published_at"),  # latest mentions per ticker
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     report_id: Mapped[int] = mapped_column(ForeignKey("reports.id"), nullable=False)
     ticker_id: Mapped[int] = mapped_column(ForeignKey("tickers.id"), nullable=False)
+    # copied from the report: the partition key on Postgres, and orders mentions without a join
+    published_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
 
     # extracted snippets (lightweight)
     snippets: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    hits: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # term matches in the report
 
     report: Mapped["Report"] = relationship(back_populates="mentions")
     ticker: Mapped["Ticker"] = relationship(back_populates="mentions")
 
+class MentionRollup(Base):
+    # per ticker, day (of the report's published_at) and source; kept in step with mentions
+    # by app.db.rollups
+    __tablename__ = "mention_rollups"
+    __table_args__ = (
+        # trending: every ticker over a date range, summed from the index alone
+        Index("ix_mention_rollups_day", "day", "ticker_id", "source_id", "mentions", "reports", "snippets"),
+    )
+
+    ticker_id: Mapped[int] = mapped_column(ForeignKey("tickers.id"), primary_key=True, autoincrement=False)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    source_id: Mapped[int] = mapped_column(ForeignKey("sources.id"), primary_key=True, autoincrement=False)
+    mentions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # term matches
+    reports: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    snippets: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
 class TickerSummary(Base):
     __tablename__ = "ticker_summaries"
     __table_args__ = (
-        UniqueConstraint("symbol", "asof_date", name="uq_summary_symbol_date"),
+        UniqueConstraint("symbol", "asof_date", name="uq_summary_symbol_date"),  # also serves get_summary
+        Index("ix_summaries_asof_date", "asof_date"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -74,3 +156,87 @@ class TickerSummary(Base):
     confidence: Mapped[int] = mapped_column(Integer, nullable=False, default=50)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+class SummaryCacheEntry(Base):
+    __tablename__ = "summary_cache"
+
+    # sha256 over normalized snippets + the prompt that produced the result + OPENAI_MODEL
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    model: Mapped[str] = mapped_column(String(100), nullable=False)
+
+    summary: Mapped[str] = mapped_column(Text, nullable=False)
+    bullets: Mapped[str] = mapped_column(Text, nullable=False, default="[]")  # json list
+    confidence: Mapped[int] = mapped_column(Integer, nullable=False, default=50)
+
+    hits: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+# committed writes to the tables the API serves count up `generation` (app.db.base), so every API
+# process drops its cached responses after writes made by workers and jobs in other processes
+class DataVersion(Base):
+    __tablename__ = "data_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)  # a single row, id 1
+    generation: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+# one daily pipeline run; a failed run for the same asof_date is resumed instead of restarted
+class PipelineRun(Base):
+    __tablename__ = "pipeline_runs"
+    __table_args__ = (Index("ix_pipeline_runs_asof", "asof_date", "id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    asof_date: Mapped[str] = mapped_column(String(10), nullable=False)  # YYYY-MM-DD
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="running")  # running | failed | partial | succeeded
+    stage: Mapped[str] = mapped_column(String(20), nullable=False, default="")  # last completed stage
+    error: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    # who drives the run: a run_daily process ("host:pid:xxxxxx") or "queue" for queue-driven runs;
+    # the owner renews heartbeat_at while it runs (app.jobs.checkpoints)
+    owner: Mapped[str] = mapped_column(String(100), nullable=False, default="")
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    started_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    items: Mapped[list["RunItem"]] = relationship(back_populates="run", cascade="all, delete-orphan")
+
+# per-item checkpoint of a run stage: a source url for fetch/extract, a ticker symbol for summarize
+class RunItem(Base):
+    __tablename__ = "run_items"
+    __table_args__ = (UniqueConstraint("run_id", "stage", "key", name="uq_run_item"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    run_id: Mapped[int] = mapped_column(ForeignKey("pipeline_runs.id"), nullable=False)
+    stage: Mapped[str] = mapped_column(String(20), nullable=False)
+    key: Mapped[str] = mapped_column(String(500), nullable=False)
+
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")  # pending | done | failed
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    payload: Mapped[str] = mapped_column(Text, nullable=False, default="")  # stage output, json
+    error: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+    run: Mapped["PipelineRun"] = relationship(back_populates="items")
+
+# lease queue for pipeline workers (app.jobs.queue): one row per unit of work of a run
+class WorkItem(Base):
+    __tablename__ = "work_items"
+    __table_args__ = (
+        UniqueConstraint("run_id", "kind", "key", name="uq_work_item"),
+        Index("ix_work_items_claim", "status", "available_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    run_id: Mapped[int] = mapped_column(ForeignKey("pipeline_runs.id"), nullable=False)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)  # a pipeline stage
+    key: Mapped[str] = mapped_column(String(500), nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False, default="")  # json
+
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")  # pending | leased | done | failed
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    available_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)  # retry backoff
+    lease_owner: Mapped[str] = mapped_column(String(200), nullable=False, default="")
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    result: Mapped[str] = mapped_column(Text, nullable=False, default="")  # json
+    error: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,165 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db import models
+from app.db.bodies import load_bodies
+from app.db.bulk import chunked, upsert
+from app.db.rollups import lock_reports, remove_mentions
+from app.db.search import unindex_mentions
+from app.services import minhash
+
+logger = get_logger(__name__)
+
+# Near-duplicate clusters of reports. The exact raw_hash check in _store_reports only catches
+# byte-identical text from the same source; the same broker note republished by another
+# portal, or re-rendered with a different footer, gets through it. Every stored report gets
+# a MinHash signature (report_signatures) and one row per LSH band (report_buckets). A new
+# report whose signature matches an earlier one at NEAR_DUP_THRESHOLD joins that report's
+# cluster: reports.duplicate_of points at the cluster's canonical (first stored) report.
+#
+# Within one source, only a re-render joins a cluster: the same text up to numbers (view
+# counts, timestamps), i.e. identical signatures. A revised note from the same source that
+# adds text stays canonical, so its new text is scanned; duplicates are never scanned.
+#
+# Only canonical reports are scanned for mentions, so summaries see each note once.
+# Lookup is BANDS equality probes on the report_buckets primary key plus a handful of
+# signature comparisons, independent of corpus size (benchmarks/bench_near_dup.py).
+
+def _candidates(db: Session, keys: Set[int]) -> Dict[int, Set[int]]:
+    """bucket -> ids of already-indexed reports in it."""
+    found: Dict[int, Set[int]] = defaultdict(set)
+    for batch in chunked(list(keys)):
+        rows = db.execute(select(models.ReportBucket.bucket, models.ReportBucket.report_id).where(models.ReportBucket.bucket.in_(batch)))
+        for bucket, report_id in rows:
+            found[bucket].add(report_id)
+    return found
+
+def _signatures(db: Session, report_ids: Set[int]) -> Dict[int, Tuple[List[int], int, int, int]]:
+    """report id -> (signature, canonical id, source id, canonical's source id)."""
+    canon = aliased(models.Report)
+    out = {}
+    for batch in chunked(list(report_ids)):
+        rows = db.execute(
+            select(models.ReportSignature.report_id, models.ReportSignature.signature, models.Report.duplicate_of,
+                   models.Report.source_id, canon.source_id)
+            .join(models.Report, models.Report.id == models.ReportSignature.report_id)
+            .outerjoin(canon, canon.id == models.Report.duplicate_of)
+            .where(models.ReportSignature.report_id.in_(batch))
+        )
+        for report_id, data, duplicate_of, source_id, canon_source_id in rows:
+            out[report_id] = (minhash.unpack(data), duplicate_of or report_id, source_id, canon_source_id or source_id)
+    return out
+
+def _sources(db: Session, report_ids: Iterable[int]) -> Dict[int, int]:
+    out = {}
+    for batch in chunked(list(report_ids)):
+        out.update(db.execute(select(models.Report.id, models.Report.source_id).where(models.Report.id.in_(batch))).all())
+    return out
+
+def assign(db: Session, reports: Iterable[Tuple[int, str]]) -> Dict[int, int]:
+    """Index (report_id, text) pairs and cluster them with earlier reports and each other.
+
+    Reports are taken in id order, so within a batch the first copy is the canonical one.
+    A match from the same source (or in a cluster of that source) counts only when the
+    signatures are identical; anything less is a revision, not a copy.
+    Sets reports.duplicate_of and returns {report_id: canonical_id} for the duplicates.
+    Does not commit.
+    """
+    if not settings.NEAR_DUP_ENABLED:
+        return {}
+    sigs = {}
+    for report_id, text in reports:
+        sig = minhash.signature(text, settings.NEAR_DUP_MIN_TOKENS)
+        if sig is not None:
+            sigs[report_id] = sig
+    if not sigs:
+        return {}
+    keys = {rid: minhash.buckets(sig) for rid, sig in sigs.items()}
+    found = _candidates(db, {k for ks in keys.values() for k in ks})
+    known = _signatures(db, set().union(*found.values())) if found else {}
+    source = _sources(db, sigs)
+
+    duplicates: Dict[int, int] = {}
+    for rid in sorted(sigs):
+        best, best_score, best_source = None, settings.NEAR_DUP_THRESHOLD, source[rid]
+        for other in {o for k in keys[rid] for o in found.get(k, ())}:
+            sig, canonical, other_source, canonical_source = known[other]
+            score = minhash.similarity(sigs[rid], sig)
+            if source[rid] in (other_source, canonical_source) and score < 1.0:
+                continue  # same source, new text: a revision
+            if score > best_score or (score == best_score and (best is None or canonical < best)):
+                best, best_score, best_source = canonical, score, canonical_source
+        if best is not None:
+            duplicates[rid] = best
+        # visible to the rest of the batch
+        known[rid] = (sigs[rid], best or rid, source[rid], best_source)
+        for k in keys[rid]:
+            found[k].add(rid)
+
+    upsert(db, models.ReportSignature, [{"report_id": rid, "signature": minhash.pack(sig)} for rid, sig in sigs.items()],
+           ["report_id"], update_cols=["signature"])
+    upsert(db, models.ReportBucket, [{"bucket": k, "report_id": rid} for rid, ks in keys.items() for k in ks],
+           ["bucket", "report_id"])
+    if duplicates:
+        db.execute(update(models.Report), [{"id": rid, "duplicate_of": c} for rid, c in duplicates.items()])
+    return duplicates
+
+def _drop_mentions(db: Session, report_ids: List[int]) -> int:
+    # mentions scanned before a report was known to be a duplicate
+    dropped = 0
+    for batch in chunked(report_ids):
+        lock_reports(db, batch)
+        ids = list(db.scalars(select(models.Mention.id).where(models.Mention.report_id.in_(batch))))
+        if ids:
+            unindex_mentions(db, ids)
+            remove_mentions(db, ids)
+            db.query(models.Mention).filter(models.Mention.id.in_(ids)).delete(synchronize_session=False)
+            dropped += len(ids)
+    return dropped
+
+def index_existing(db: Session, batch_size: int = 500) -> Dict:
+    """Cluster reports stored before the index existed (or with it disabled), oldest first.
+
+    Reports found to be duplicates lose the mentions they were scanned for. Commits per batch.
+    """
+    indexed = duplicates = dropped = 0
+    after = 0
+    while True:
+        ids = list(db.scalars(
+            select(models.Report.id)
+            .outerjoin(models.ReportSignature, models.ReportSignature.report_id == models.Report.id)
+            .where(models.ReportSignature.report_id.is_(None), models.Report.id > after)
+            .order_by(models.Report.id)
+            .limit(batch_size)
+        ))
+        if not ids:
+            break
+        found = assign(db, load_bodies(db, ids).items())
+        dropped += _drop_mentions(db, sorted(found))
+        db.commit()
+        indexed, duplicates, after = indexed + len(ids), duplicates + len(found), ids[-1]
+    logger.info(f"near-duplicate index: {indexed} reports indexed, {duplicates} duplicates, {dropped} mentions dropped")
+    return {"indexed": indexed, "duplicates": duplicates, "mentions_dropped": dropped}
+
+def cluster_sizes(db: Session, limit: int = 20) -> List[Tuple[int, int]]:
+    """(canonical report id, copies) of the largest clusters."""
+    rows = db.execute(
+        select(models.Report.duplicate_of, func.count())
+        .where(models.Report.duplicate_of.is_not(None))
+        .group_by(models.Report.duplicate_of)
+        .order_by(func.count().desc())
+        .limit(limit)
+    )
+    return [(canonical, n) for canonical, n in rows]
+
+if __name__ == "__main__":
+    from app.db.session import get_db
+    with get_db() as db:
+        print(index_existing(db))
+        for canonical, n in cluster_sizes(db):
+            print(f"report {canonical}: {n} near-duplicates")
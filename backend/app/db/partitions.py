@@ -0,0 +1,134 @@
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import MetaData, PrimaryKeyConstraint, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.db.base import Base, engine as default_engine
+
+# Postgres: reports and mentions are RANGE-partitioned by published_at, so recent-window
+# queries (list_reports, latest mentions per ticker) only touch recent partitions and old
+# years can be detached or dropped whole. SQLite keeps plain tables.
+#
+# Postgres requires the partition key in every primary key / unique index of a partitioned
+# table, and foreign keys can only point at a unique key, so for these tables the DDL uses
+# PRIMARY KEY (id, published_at) and foreign keys *to* them are left out (the ORM metadata
+# keeps them; the pipeline writes children right after their parents).
+#
+#   reports_p2024_01   [2024-01-01, 2024-02-01)   one per PG_PARTITION_MONTHS
+#   reports_default    anything outside the created ranges
+
+PARTITIONED: Dict[str, str] = {"reports": "published_at", "mentions": "published_at"}
+
+def is_partitioned(bind: Engine | Connection) -> bool:
+    return bind.dialect.name == "postgresql"
+
+def partitioned_metadata() -> MetaData:
+    """Copy of the model metadata with the Postgres partitioning applied (DDL only)."""
+    from app.db import models  # noqa: F401
+    meta = MetaData()
+    for table in Base.metadata.sorted_tables:
+        table.to_metadata(meta)
+    for table in meta.tables.values():
+        for fk in [fk for fk in table.foreign_key_constraints if fk.referred_table.name in PARTITIONED]:
+            table.constraints.discard(fk)
+            for col in fk.columns:
+                col.foreign_keys.difference_update(fk.elements)
+            table.foreign_keys.difference_update(fk.elements)
+        key = PARTITIONED.get(table.name)
+        if key is None:
+            continue
+        pk = [c.name for c in table.primary_key.columns]
+        table.c.id.autoincrement = True  # still generated, now inside a composite key
+        table.c[key].primary_key = True
+        table.append_constraint(PrimaryKeyConstraint(*pk, key))
+        table.dialect_kwargs["postgresql_partition_by"] = f"RANGE ({key})"
+    return meta
+
+def create_tables(engine: Engine):
+    if is_partitioned(engine):
+        partitioned_metadata().create_all(bind=engine)
+    else:
+        Base.metadata.create_all(bind=engine)
+
+def _month_floor(d: datetime, months: int) -> datetime:
+    index = (d.year * 12 + d.month - 1) // months * months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def _add_months(d: datetime, months: int) -> datetime:
+    index = d.year * 12 + d.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def partition_ranges(start: datetime, end: datetime, months: int | None = None) -> List[tuple[datetime, datetime]]:
+    """Aligned [lo, hi) windows of `months` covering start..end."""
+    months = months or settings.PG_PARTITION_MONTHS
+    lo = _month_floor(start, months)
+    out = []
+    while lo <= end:
+        hi = _add_months(lo, months)
+        out.append((lo, hi))
+        lo = hi
+    return out
+
+def partition_name(table: str, lo: datetime) -> str:
+    return f"{table}_p{lo:%Y_%m}"
+
+def _exists(conn: Connection, name: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:n)"), {"n": name}).scalar() is not None
+
+def _is_partitioned_table(conn: Connection, table: str) -> bool:
+    kind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:n)"), {"n": table}).scalar()
+    return kind == "p"
+
+def _create_partition(conn: Connection, table: str, key: str, lo: datetime, hi: datetime) -> str:
+    name = partition_name(table, lo)
+    bounds = f"FROM ('{lo:%Y-%m-%d}') TO ('{hi:%Y-%m-%d}')"
+    default = f"{table}_default"
+    in_range = f"{key} >= '{lo:%Y-%m-%d}' AND {key} < '{hi:%Y-%m-%d}'"
+    if conn.execute(text(f"SELECT 1 FROM {default} WHERE {in_range} LIMIT 1")).first() is None:
+        conn.execute(text(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES {bounds}"))
+        return f"create partition {name}"
+    # rows already landed in the default partition: move them, or the attach would fail
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {in_range}"))
+    conn.execute(text(f"DELETE FROM {default} WHERE {in_range}"))
+    conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+    return f"create partition {name} (moved rows from {default})"
+
+def ensure_partitions(engine: Engine | None = None, now: datetime | None = None) -> List[str]:
+    """Create the default partition and every range from the oldest row to PG_PARTITIONS_AHEAD
+    ranges past now. Idempotent; runs with each migration (init_db), so new months appear
+    before data arrives."""
+    engine = engine or default_engine
+    if not is_partitioned(engine):
+        return []
+    now = now or datetime.utcnow()
+    months = settings.PG_PARTITION_MONTHS
+    applied = []
+    with engine.begin() as conn:
+        for table, key in PARTITIONED.items():
+            if not _is_partitioned_table(conn, table):
+                continue  # created before partitioning; converting means rewriting the table
+            default = f"{table}_default"
+            if not _exists(conn, default):
+                conn.execute(text(f"CREATE TABLE {default} PARTITION OF {table} DEFAULT"))
+                applied.append(f"create partition {default}")
+            oldest = conn.execute(text(f"SELECT min({key}) FROM {table}")).scalar() or now
+            end = _add_months(_month_floor(now, months), months * settings.PG_PARTITIONS_AHEAD)
+            for lo, hi in partition_ranges(min(oldest, now), end, months):
+                if not _exists(conn, partition_name(table, lo)):
+                    applied.append(_create_partition(conn, table, key, lo, hi))
+    return applied
+
+if __name__ == "__main__":
+    if "--ddl" in sys.argv:
+        # print the partitioned schema, e.g. to review or apply by hand
+        from sqlalchemy.dialects import postgresql
+        from sqlalchemy.schema import CreateTable
+        for table in partitioned_metadata().sorted_tables:
+            print(str(CreateTable(table).compile(dialect=postgresql.dialect())).strip() + ";\n")
+    else:
+        for step in ensure_partitions():
+            print(step)
@@ -0,0 +1,131 @@
+import argparse
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.core.logging import get_logger
+from app.db import models
+from app.db.bulk import chunked, upsert
+
+logger = get_logger(__name__)
+
+# Daily mention rollups: mention_rollups(ticker_id, day, source_id) -> mentions (term
+# matches), reports and snippets. write_mentions and the near-duplicate clean-up apply signed
+# deltas in the same transaction as the mention rows themselves, so the dashboard endpoints
+# (/api/tickers/trending, /api/tickers/{symbol}/mentions/timeseries) read at most
+# tickers x days x sources small rows and never touch mentions or reports.
+#
+# The deltas are computed from the mention rows already stored, so a writer first locks the
+# reports whose mentions it changes (lock_reports); another writer of the same reports (a
+# second worker, the backfill, the near-duplicate clean-up) waits and then reads its result.
+#
+# `python -m app.db.rollups` compares the table with a recount from mentions; --rebuild
+# replaces it with the recount. The migration fills it once for databases that predate it.
+
+Key = Tuple[int, date, int]  # ticker_id, day, source_id
+
+def snippet_count(snippets: str) -> int:
+    return sum(1 for line in (snippets or "").split("\n") if line.strip())
+
+def add(deltas: Dict[Key, List[int]], ticker_id: int, published_at: datetime, source_id: int,
+        mentions: int, reports: int, snippets: int):
+    row = deltas.setdefault((ticker_id, published_at.date(), source_id), [0, 0, 0])
+    row[0] += mentions
+    row[1] += reports
+    row[2] += snippets
+
+def lock_reports(db: Session, report_ids: Iterable[int]):
+    """Hold the given reports until commit, so their mentions can be read and rewritten
+    without another writer in between. Call before reading the existing mentions."""
+    ids = sorted(set(report_ids))
+    if not ids:
+        return
+    if db.get_bind().dialect.name == "sqlite":
+        # a write takes SQLite's single write lock (pysqlite only opens the transaction at the
+        # first write), and reads after it see every committed writer
+        db.execute(update(models.Report).where(models.Report.id == ids[0]).values(id=models.Report.id)
+                   .execution_options(synchronize_session=False))
+        return
+    # row locks in id order, so overlapping writers cannot deadlock
+    for batch in chunked(ids):
+        db.execute(select(models.Report.id).where(models.Report.id.in_(batch)).order_by(models.Report.id).with_for_update())
+
+def apply(db: Session, deltas: Dict[Key, List[int]]) -> int:
+    """Add signed (mentions, reports, snippets) deltas to the rollup rows. Does not commit."""
+    # key order, so concurrent writers lock rows in the same order
+    rows = [
+        {"ticker_id": tid, "day": day, "source_id": sid, "mentions": m, "reports": r, "snippets": s}
+        for (tid, day, sid), (m, r, s) in sorted(deltas.items())
+        if m or r or s
+    ]
+    upsert(db, models.MentionRollup, rows, ["ticker_id", "day", "source_id"],
+           increment_cols=["mentions", "reports", "snippets"])
+    return len(rows)
+
+def remove_mentions(db: Session, mention_ids: Iterable[int]):
+    """Take mentions that are about to be deleted out of the rollups. Does not commit."""
+    deltas: Dict[Key, List[int]] = {}
+    for batch in chunked(list(mention_ids)):
+        rows = db.execute(
+            select(models.Mention.ticker_id, models.Mention.published_at, models.Report.source_id,
+                   models.Mention.hits, models.Mention.snippets)
+            .join(models.Report, models.Report.id == models.Mention.report_id)
+            .where(models.Mention.id.in_(batch))
+        )
+        for tid, published_at, sid, hits, snippets in rows:
+            add(deltas, tid, published_at, sid, -hits, -1, -snippet_count(snippets))
+    apply(db, deltas)
+    # rows whose last mention went
+    for batch in chunked(sorted({tid for tid, _, _ in deltas})):
+        db.execute(delete(models.MentionRollup).where(models.MentionRollup.ticker_id.in_(batch), models.MentionRollup.reports <= 0))
+
+def recount(db: Session) -> Dict[Key, List[int]]:
+    """The rollups as counted from mentions (a full scan)."""
+    counts: Dict[Key, List[int]] = defaultdict(lambda: [0, 0, 0])
+    rows = db.execute(
+        select(models.Mention.ticker_id, models.Mention.published_at, models.Report.source_id,
+               models.Mention.hits, models.Mention.snippets)
+        .join(models.Report, models.Report.id == models.Mention.report_id)
+        .execution_options(yield_per=5000)
+    )
+    for tid, published_at, sid, hits, snippets in rows:
+        add(counts, tid, published_at, sid, hits, 1, snippet_count(snippets))
+    return dict(counts)
+
+def rebuild(db: Session) -> int:
+    """Replace the rollups with a recount from mentions. Does not commit."""
+    counts = recount(db)
+    db.execute(delete(models.MentionRollup))
+    return apply(db, counts)
+
+def differences(db: Session) -> List[Tuple[Key, List[int], List[int]]]:
+    """(key, stored, recounted) for every rollup row that disagrees with mentions."""
+    stored = {
+        (tid, day, sid): [m, r, s]
+        for tid, day, sid, m, r, s in db.execute(select(
+            models.MentionRollup.ticker_id, models.MentionRollup.day, models.MentionRollup.source_id,
+            models.MentionRollup.mentions, models.MentionRollup.reports, models.MentionRollup.snippets,
+        ))
+        if m or r or s
+    }
+    counts = recount(db)
+    return [(k, stored.get(k, [0, 0, 0]), counts.get(k, [0, 0, 0]))
+            for k in sorted(stored.keys() | counts.keys()) if stored.get(k) != counts.get(k)]
+
+if __name__ == "__main__":
+    from app.db.session import get_db
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rebuild", action="store_true", help="replace the rollups with a recount from mentions")
+    args = ap.parse_args()
+    with get_db() as db:
+        if args.rebuild:
+            n = rebuild(db)
+            db.commit()
+            logger.info(f"mention rollups rebuilt: {n} rows")
+        diff = differences(db)
+        for key, stored, counted in diff[:20]:
+            print(f"{key}: stored {stored}, mentions {counted}")
+        print(f"{len(diff)} rollup rows differ from mentions")
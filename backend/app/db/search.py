@@ -0,0 +1,218 @@
+import re
+import sys
+import html
+import base64
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.db.bodies import iter_texts, load_bodies
+
+# Full-text index (SQLite FTS5).
+# Korean has no spaces between morphemes, so Hangul/CJK runs are indexed as overlapping
+# character bigrams ("삼성전자" -> "삼성 성전 전자") and queried as phrases of bigrams,
+# which behaves like a substring match. Everything else is left to the unicode61 tokenizer.
+# A term ending in a lone Hangul/CJK character ("삼") has no bigram to match, so its last
+# token is queried as a prefix ("삼"* hits "삼성"): it finds the character anywhere except
+# at the end of a run.
+#
+#   reports_fts(rowid = reports.id, title, body)
+#   mentions_fts(rowid = mentions.id, snippets)
+
+_CJK = r"[ᄀ-ᇿ㄰-㆏가-힯぀-ヿ一-鿿]"
+_SCRIPT_EDGE = re.compile(rf"(?<=[0-9a-z])(?={_CJK})|(?<={_CJK})(?=[0-9a-z])")  # "sk하이닉스" -> "sk 하이닉스"
+_CJK_RUN = re.compile(rf"{_CJK}{{2,}}")
+_CJK_CHAR = re.compile(rf"{_CJK}")
+
+FTS_TABLES = {
+    "reports_fts": "CREATE VIRTUAL TABLE reports_fts USING fts5(title, body, tokenize='unicode61')",
+    "mentions_fts": "CREATE VIRTUAL TABLE mentions_fts USING fts5(snippets, tokenize='unicode61')",
+}
+
+def _bigrams(m: re.Match) -> str:
+    run = m.group()
+    return " ".join(map(str.__add__, run, run[1:]))
+
+def fts_tokens(s: str) -> str:
+    # unicode61 splits on everything that is not a letter/digit, so only CJK runs need work
+    return _CJK_RUN.sub(_bigrams, _SCRIPT_EDGE.sub(" ", (s or "").lower()))
+
+def fts_query(q: str) -> str:
+    """Every whitespace-separated term must match (as a substring for Hangul)."""
+    phrases = []
+    for term in q.split():
+        toks = fts_tokens(term.replace('"', " ")).split()
+        if toks:
+            prefix = "*" if _CJK_CHAR.fullmatch(toks[-1]) else ""
+            phrases.append(f'"{" ".join(toks)}"{prefix}')
+    return " AND ".join(phrases)
+
+def is_supported(bind: Engine | Connection | Session) -> bool:
+    engine = bind.get_bind() if isinstance(bind, Session) else bind
+    return engine.dialect.name == "sqlite"
+
+def ensure_search_tables(engine: Engine) -> List[str]:
+    """Create missing FTS tables and fill them from existing rows (migration step)."""
+    if not is_supported(engine):
+        return []
+    applied = []
+    with engine.begin() as conn:
+        for name, ddl in FTS_TABLES.items():
+            exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE type='table' AND name=:n"), {"n": name}).first()
+            if exists:
+                continue
+            conn.execute(text(ddl))
+            applied.append(f"create fts table {name}")
+    if applied:
+        with Session(engine) as db:
+            rebuild(db)
+    return applied
+
+def _batched(rows: Iterable, size: int = 1000):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def index_reports(db: Session, rows: Iterable[tuple[int, str, str]]):
+    """(id, title, raw_text) -> reports_fts. Does not commit."""
+    if not is_supported(db):
+        return
+    for batch in _batched(rows):
+        db.execute(text("DELETE FROM reports_fts WHERE rowid IN (%s)" % ",".join(str(int(r[0])) for r in batch)))
+        db.execute(
+            text("INSERT INTO reports_fts(rowid, title, body) VALUES (:id, :title, :body)"),
+            [{"id": rid, "title": fts_tokens(title), "body": fts_tokens(body)} for rid, title, body in batch],
+        )
+
+def index_mentions(db: Session, rows: Iterable[tuple[int, str]]):
+    """(id, snippets) -> mentions_fts. Does not commit."""
+    if not is_supported(db):
+        return
+    for batch in _batched(rows):
+        db.execute(text("DELETE FROM mentions_fts WHERE rowid IN (%s)" % ",".join(str(int(r[0])) for r in batch)))
+        db.execute(
+            text("INSERT INTO mentions_fts(rowid, snippets) VALUES (:id, :snippets)"),
+            [{"id": mid, "snippets": fts_tokens(snippets)} for mid, snippets in batch],
+        )
+
+def unindex_mentions(db: Session, ids: Iterable[int]):
+    """Drop deleted mentions from mentions_fts. Does not commit."""
+    if not is_supported(db):
+        return
+    for batch in _batched(ids):
+        db.execute(text("DELETE FROM mentions_fts WHERE rowid IN (%s)" % ",".join(str(int(i)) for i in batch)))
+
+def rebuild(db: Session):
+    db.execute(text("DELETE FROM reports_fts"))
+    db.execute(text("DELETE FROM mentions_fts"))
+    rows = db.execute(text("SELECT r.id, r.title, b.codec, b.dict_id, b.data FROM reports r JOIN report_bodies b ON b.report_id = r.id"))
+    index_reports(db, iter_texts(db, rows.yield_per(1000)))
+    index_mentions(db, db.execute(text("SELECT id, snippets FROM mentions")).yield_per(1000))
+    db.commit()
+
+def encode_cursor(score: float, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{score!r}:{row_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    score, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+    return float(score), int(row_id)
+
+def highlight(body: str, q: str, window: int = 80) -> str:
+    """Escaped excerpt around the first hit, query terms wrapped in <mark>."""
+    terms = [re.escape(t) for t in q.split() if t]
+    if not body or not terms:
+        return ""
+    pat = re.compile("|".join(terms), re.IGNORECASE)
+    m = pat.search(body)
+    a = max(0, (m.start() if m else 0) - window)
+    b = min(len(body), (m.end() if m else 0) + window)
+    excerpt = body[a:b].replace("\n", " ")
+    out, pos = [], 0
+    for hit in pat.finditer(excerpt):
+        out.append(html.escape(excerpt[pos:hit.start()]))
+        out.append(f"<mark>{html.escape(hit.group())}</mark>")
+        pos = hit.end()
+    out.append(html.escape(excerpt[pos:]))
+    return ("…" if a > 0 else "") + "".join(out).strip() + ("…" if b < len(body) else "")
+
+def search(db: Session, q: str, scope: str = "reports", ticker: Optional[str] = None,
+           date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+           limit: int = 20, cursor: Optional[str] = None) -> tuple[list[dict], Optional[str]]:
+    """Ranked (bm25) search with keyset pagination over (score, rowid). Returns (hits, next_cursor)."""
+    match = fts_query(q)
+    if not match:
+        return [], None
+    fts = "reports_fts" if scope == "reports" else "mentions_fts"
+    params: dict = {"q": match, "n": limit + 1}
+    where = [f"{fts} MATCH :q"]
+    if scope == "reports":
+        sql = "SELECT f.rowid AS id, bm25(reports_fts) AS score, r.id AS report_id, NULL AS symbol FROM reports_fts f JOIN reports r ON r.id = f.rowid"
+        if ticker:
+            where.append("EXISTS (SELECT 1 FROM mentions m JOIN tickers t ON t.id = m.ticker_id WHERE m.report_id = r.id AND t.symbol = :ticker)")
+    else:
+        sql = (
+            "SELECT f.rowid AS id, bm25(mentions_fts) AS score, r.id AS report_id, t.symbol AS symbol FROM mentions_fts f "
+            "JOIN mentions m ON m.id = f.rowid JOIN reports r ON r.id = m.report_id JOIN tickers t ON t.id = m.ticker_id"
+        )
+        if ticker:
+            where.append("t.symbol = :ticker")
+    if ticker:
+        params["ticker"] = ticker
+    if date_from:
+        where.append("r.published_at >= :date_from")
+        params["date_from"] = date_from
+    if date_to:
+        where.append("r.published_at < :date_to")
+        params["date_to"] = date_to
+    if cursor:
+        params["c_score"], params["c_id"] = decode_cursor(cursor)
+        where.append(f"(bm25({fts}) > :c_score OR (bm25({fts}) = :c_score AND f.rowid > :c_id))")
+    sql += " WHERE " + " AND ".join(where) + " ORDER BY score, id LIMIT :n"
+
+    rows = db.execute(text(sql), params).all()
+    next_cursor = encode_cursor(rows[limit - 1].score, rows[limit - 1].id) if len(rows) > limit else None
+    rows = rows[:limit]
+    if not rows:
+        return [], None
+
+    # details only for the page being returned
+    report_ids = {r.report_id for r in rows}
+    reports = {
+        r.id: r for r in db.execute(
+            text("SELECT id, title, published_at, source_id FROM reports WHERE id IN (%s)" % ",".join(str(i) for i in report_ids))
+        )
+    }
+    bodies = load_bodies(db, report_ids) if scope == "reports" else {}
+    snippets = {}
+    if scope != "reports":
+        snippets = dict(db.execute(text("SELECT id, snippets FROM mentions WHERE id IN (%s)" % ",".join(str(r.id) for r in rows))).all())
+    hits = []
+    for row in rows:
+        rep = reports[row.report_id]
+        body = bodies.get(rep.id, "") if scope == "reports" else snippets.get(row.id, "")
+        hits.append({
+            "report_id": rep.id,
+            "title": rep.title,
+            "published_at": rep.published_at,
+            "source_id": rep.source_id,
+            "symbol": row.symbol,
+            "mention_id": row.id if scope != "reports" else None,
+            "score": row.score,
+            "highlight": highlight(body, q),
+        })
+    return hits, next_cursor
+
+if __name__ == "__main__":
+    from app.db.base import engine
+    if "--rebuild" in sys.argv:
+        with Session(engine) as db:
+            rebuild(db)
+        print("search index rebuilt")
@@ -1,5 +1,9 @@
 from contextlib import contextmanager
-from app.db.base import SessionLocal
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.base import AsyncSessionLocal, SessionLocal
 
 @contextmanager
 def get_db():
@@ -8,3 +12,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency: `db: AsyncSession = Depends(get_async_db)`."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,113 @@
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db import models
+from app.db.bodies import iter_texts
+from app.jobs.run_daily import build_mention_matcher, mark_scanned, scan_reports, write_mentions
+from app.services.mentions import MentionMatcher
+
+logger = get_logger(__name__)
+
+# Each report carries a watermark, Report.scanned_ticker_id: the highest Ticker.id it has been
+# scanned against. Ticker ids only grow, so max(Ticker.id) is the ticker-set version and a report
+# behind it only needs the tickers above its watermark (new tickers x old reports, and all
+# tickers x new reports at watermark 0). Work is committed per chunk, so stopping and rerunning
+# resumes where it left off. Near-duplicate reports (Report.duplicate_of) are never scanned;
+# their watermark is just moved up.
+
+def ticker_version(db: Session) -> int:
+    return db.scalar(select(func.max(models.Ticker.id))) or 0
+
+def pending_reports(db: Session, version: int) -> int:
+    q = select(func.count()).select_from(models.Report).where(models.Report.scanned_ticker_id < version)
+    return db.scalar(q) or 0
+
+def _skip_duplicates(db: Session, version: int):
+    db.query(models.Report).filter(
+        models.Report.scanned_ticker_id < version, models.Report.duplicate_of.is_not(None)
+    ).update({models.Report.scanned_ticker_id: version}, synchronize_session=False)
+
+def _scan_chunk(db: Session, tickers: List[models.Ticker], version: int, after_id: int, chunk_size: int,
+                through_id: Optional[int] = None):
+    """Scan the next chunk of reports behind `version` (ids up to through_id, when given);
+    returns (last_id, scanned, created)."""
+    matchers: Dict[int, MentionMatcher] = {}
+    found: Dict[tuple[int, int], tuple[int, List[str]]] = {}
+    ids: List[int] = []
+    q = (
+        select(models.Report.id, models.Report.scanned_ticker_id,
+               models.ReportBody.codec, models.ReportBody.dict_id, models.ReportBody.data)
+        .join(models.ReportBody, models.ReportBody.report_id == models.Report.id)
+        .where(models.Report.scanned_ticker_id < version, models.Report.id > after_id)
+        .order_by(models.Report.id)
+        .limit(chunk_size)
+        .execution_options(yield_per=100)  # stream bodies instead of holding the chunk
+    )
+    if through_id is not None:
+        q = q.where(models.Report.id <= through_id)
+    rows = db.execute(q)
+    for report_id, watermark, raw_text in iter_texts(db, rows):
+        matcher = matchers.get(watermark)
+        if matcher is None:
+            matcher = matchers[watermark] = build_mention_matcher([t for t in tickers if t.id > watermark])
+        found.update(scan_reports(matcher, [(report_id, raw_text)]))
+        ids.append(report_id)
+    if not ids:
+        return after_id, 0, 0
+    created = write_mentions(db, found)
+    mark_scanned(db, ids, version)
+    db.commit()
+    return ids[-1], len(ids), created
+
+def backfill_mentions(
+    db: Session,
+    chunk_size: Optional[int] = None,
+    max_chunks: Optional[int] = None,
+    stop: Optional[threading.Event] = None,
+    progress: Optional[Dict] = None,
+) -> Dict:
+    """Bring every report up to the current ticker-set version. `progress` is updated per chunk."""
+    chunk_size = chunk_size or settings.BACKFILL_CHUNK_SIZE
+    scanned = created = chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        if stop is not None and stop.is_set():
+            break
+        # re-read per pass: tickers added while we run are picked up by the next pass
+        version = ticker_version(db)
+        tickers = db.query(models.Ticker).order_by(models.Ticker.id).all()
+        _skip_duplicates(db, version)
+        db.commit()
+        after_id = 0
+        while max_chunks is None or chunks < max_chunks:
+            if stop is not None and stop.is_set():
+                break
+            after_id, n, c = _scan_chunk(db, tickers, version, after_id, chunk_size)
+            if not n:
+                break
+            scanned, created, chunks = scanned + n, created + c, chunks + 1
+            if progress is not None:
+                progress.update(reports_scanned=scanned, mentions_created=created, chunks=chunks)
+        if not pending_reports(db, ticker_version(db)):
+            break
+    remaining = pending_reports(db, ticker_version(db))
+    if scanned:
+        logger.info(f"mention backfill: {scanned} reports, {created} mentions, {remaining} remaining")
+    return {"reports_scanned": scanned, "mentions_created": created, "chunks": chunks, "remaining": remaining}
+
+if __name__ == "__main__":
+    from app.db.base import init_db
+    from app.db.session import get_db
+
+    parser = argparse.ArgumentParser(description="Scan stored reports for tickers they have not been matched against.")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--max-chunks", type=int, default=None)
+    args = parser.parse_args()
+    init_db()
+    with get_db() as db:
+        print(backfill_mentions(db, chunk_size=args.chunk_size, max_chunks=args.max_chunks))
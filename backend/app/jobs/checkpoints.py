@@ -0,0 +1,180 @@
+import json
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db import models
+from app.db.session import get_db
+
+logger = get_logger(__name__)
+
+# Persisted run state for the daily pipeline:
+# - one PipelineRun per attempt at an asof_date; a run left "running" (process died) or
+#   "failed" (retryable items remain) is resumed by the next run for the same date
+# - a running run belongs to its owner, which renews heartbeat_at (RunHeartbeat); another
+#   process adopts it only once the heartbeat is PIPELINE_RUN_STALE_S old, and refuses with
+#   RunInProgress before that
+# - one RunItem per (stage, key); a rerun skips items that are done and retries failed
+#   ones until PIPELINE_MAX_ATTEMPTS, so one bad PDF or ticker never redoes the rest
+
+STAGES = ("fetch", "extract", "mentions", "summarize")
+RESUMABLE = ("running", "failed")
+QUEUE = "queue"  # owner of queue-driven runs (app.jobs.worker), shared by all workers
+
+class RunInProgress(RuntimeError):
+    """The run for the date is running under a live owner."""
+
+def owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+def _stale_before() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=settings.PIPELINE_RUN_STALE_S)
+
+def _adopt(db: Session, run: models.PipelineRun, owner: str):
+    # compare-and-set, so two processes never both take the run over
+    r = models.PipelineRun
+    taken = db.execute(
+        update(r)
+        .where(r.id == run.id, or_(r.status != "running", r.owner == owner, r.heartbeat_at.is_(None),
+                                   r.heartbeat_at < _stale_before()))
+        .values(owner=owner, heartbeat_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not taken:
+        db.rollback()
+        db.refresh(run)
+        raise RunInProgress(f"run {run.id} for {run.asof_date} is running under {run.owner}")
+    if run.owner != owner and run.status == "running":
+        logger.warning(f"run {run.id}: adopting from {run.owner or 'unknown owner'} (heartbeat {run.heartbeat_at})")
+    db.refresh(run)
+
+def touch_run(db: Session, run_id: int, owner: str) -> bool:
+    """Renew the owner's heartbeat; False once the run is finished or owned by someone else. Does not commit."""
+    r = models.PipelineRun
+    return db.execute(
+        update(r).where(r.id == run_id, r.owner == owner, r.status == "running")
+        .values(heartbeat_at=datetime.utcnow()).execution_options(synchronize_session=False)
+    ).rowcount == 1
+
+class RunHeartbeat(threading.Thread):
+    """Renews a run's heartbeat every third of PIPELINE_RUN_STALE_S from its own session;
+    `lost` is set once the run was adopted by another process."""
+
+    def __init__(self, run_id: int, owner: str):
+        super().__init__(daemon=True, name=f"run-heartbeat-{run_id}")
+        self.run_id = run_id
+        self.owner = owner
+        self.done = threading.Event()
+        self.lost = threading.Event()
+
+    def run(self):
+        while not self.done.wait(settings.PIPELINE_RUN_STALE_S / 3):
+            try:
+                with get_db() as db:
+                    kept = touch_run(db, self.run_id, self.owner)
+                    db.commit()
+            except Exception as e:
+                logger.warning(f"run {self.run_id}: heartbeat failed: {e!r}")
+                continue
+            if not kept:
+                logger.warning(f"run {self.run_id}: no longer owned by {self.owner}")
+                self.lost.set()
+                return
+
+    def check(self):
+        if self.lost.is_set():
+            raise RunInProgress(f"run {self.run_id} was adopted by another process")
+
+def start_run(db: Session, asof_date: str, from_stage: Optional[str] = None, owner: Optional[str] = None) -> models.PipelineRun:
+    """Resume the unfinished run for asof_date, or start a new one, owned by `owner`
+    (default: a new id for this process).
+
+    With from_stage, the latest run for the date is reopened and its checkpoints for that
+    stage and every later one are dropped, so those stages run again in full. Raises
+    RunInProgress when the run to resume or reopen is running under another live owner.
+    """
+    owner = owner or owner_id()
+    latest = (
+        db.query(models.PipelineRun)
+        .filter(models.PipelineRun.asof_date == asof_date)
+        .order_by(models.PipelineRun.id.desc())
+        .first()
+    )
+    if from_stage is not None:
+        if from_stage not in STAGES:
+            raise ValueError(f"unknown stage {from_stage!r}; expected one of {STAGES}")
+        if latest is not None:
+            _adopt(db, latest, owner)
+            redo = STAGES[STAGES.index(from_stage):]
+            db.query(models.RunItem).filter(
+                models.RunItem.run_id == latest.id, models.RunItem.stage.in_(redo)
+            ).delete(synchronize_session=False)
+            latest.status, latest.error, latest.finished_at = "running", "", None
+            previous = STAGES.index(from_stage) - 1
+            latest.stage = STAGES[previous] if previous >= 0 else ""
+            db.commit()
+            return latest
+    elif latest is not None and latest.status in RESUMABLE:
+        _adopt(db, latest, owner)
+        # go back to the earliest stage that still has items to retry
+        failed = db.query(models.RunItem).filter(models.RunItem.run_id == latest.id, models.RunItem.status == "failed")
+        retry = [STAGES.index(it.stage) for it in failed if retryable(it)]
+        if retry and latest.stage and STAGES.index(latest.stage) >= min(retry):
+            latest.stage = STAGES[min(retry) - 1] if min(retry) > 0 else ""
+        latest.status, latest.error, latest.finished_at = "running", "", None
+        db.commit()
+        return latest
+    now = datetime.utcnow()
+    run = models.PipelineRun(asof_date=asof_date, status="running", owner=owner, heartbeat_at=now, started_at=now)
+    if from_stage is not None and STAGES.index(from_stage) > 0:
+        run.stage = STAGES[STAGES.index(from_stage) - 1]  # nothing to reopen: start there anyway
+    db.add(run)
+    db.commit()
+    return run
+
+def load_items(db: Session, run: models.PipelineRun, stage: str) -> Dict[str, models.RunItem]:
+    rows = db.query(models.RunItem).filter(models.RunItem.run_id == run.id, models.RunItem.stage == stage)
+    return {it.key: it for it in rows}
+
+def retryable(item: Optional[models.RunItem]) -> bool:
+    """Not attempted yet, or failed with attempts left."""
+    return item is None or item.status == "pending" or (
+        item.status == "failed" and item.attempts < settings.PIPELINE_MAX_ATTEMPTS
+    )
+
+def checkpoint(db: Session, run: models.PipelineRun, items: Dict[str, models.RunItem], stage: str, key: str,
+               status: str, payload: Optional[dict] = None, error: str = "") -> models.RunItem:
+    """Record the outcome of one item; committed with the stage's next commit."""
+    item = items.get(key)
+    if item is None:
+        item = items[key] = models.RunItem(run_id=run.id, stage=stage, key=key, attempts=0)
+        db.add(item)
+    item.status = status
+    item.attempts += 1
+    item.payload = json.dumps(payload, ensure_ascii=False) if payload is not None else ""
+    item.error = error
+    item.updated_at = datetime.utcnow()
+    return item
+
+def finish_run(db: Session, run: models.PipelineRun) -> str:
+    """Close the run: failed while any item can still be retried, partial if some gave up."""
+    failed = db.query(models.RunItem).filter(models.RunItem.run_id == run.id, models.RunItem.status == "failed").all()
+    if any(retryable(it) for it in failed):
+        run.status = "failed"
+        run.error = f"{sum(retryable(it) for it in failed)} items to retry"
+    else:
+        run.status = "partial" if failed else "succeeded"
+    run.finished_at = datetime.utcnow()
+    db.commit()
+    return run.status
+
+def failed_items(db: Session, run: models.PipelineRun) -> int:
+    return db.query(models.RunItem).filter(models.RunItem.run_id == run.id, models.RunItem.status == "failed").count()
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.logging import get_logger
+from app.core.metrics import STAGE_SECONDS
+
+logger = get_logger(__name__)
+
+# In-process background jobs:
+# - submit() returns immediately; the job runs on its own thread with its own event loop
+# - single flight per kind: triggering a kind that is already queued/running returns that job
+# - jobs of different kinds that share a group (e.g. everything that writes mentions) run one
+#   at a time: a later one stays queued until the earlier one has finished
+# - jobs record per-stage status and timings for polling
+
+@dataclass
+class StageProgress:
+    name: str
+    status: str = "running"  # running | done | failed
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    elapsed_s: float = 0.0
+    detail: Dict[str, Any] = field(default_factory=dict)
+
+@dataclass
+class Job:
+    kind: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "queued"  # queued | running | succeeded | failed
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    stages: List[StageProgress] = field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def stage(self, name: str):
+        st = StageProgress(name=name)
+        self.stages.append(st)
+        return _timed(st)
+
+@contextmanager
+def _timed(st: StageProgress):
+    t0 = time.perf_counter()
+    try:
+        yield st
+        st.status = "done"
+    except BaseException:
+        st.status = "failed"
+        raise
+    finally:
+        elapsed = time.perf_counter() - t0
+        st.elapsed_s = round(elapsed, 3)
+        st.finished_at = datetime.utcnow()
+        STAGE_SECONDS.observe(elapsed, stage=st.name, status=st.status)
+
+def stage(job: Optional[Job], name: str):
+    """job.stage(name), or a detached stage when running without a job (CLI); both are timed into metrics."""
+    return job.stage(name) if job is not None else _timed(StageProgress(name=name))
+
+JobFn = Callable[[Job], Awaitable[Dict[str, Any]]]
+
+class JobManager:
+    def __init__(self, history: int = 100):
+        self.history = history
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._active: Dict[str, Job] = {}
+        self._groups: Dict[str, threading.Lock] = {}
+
+    def submit(self, kind: str, fn: JobFn, group: Optional[str] = None) -> Job:
+        with self._lock:
+            running = self._active.get(kind)
+            if running is not None and running.active:
+                return running  # coalesce concurrent triggers
+            job = Job(kind=kind)
+            self._jobs[job.id] = job
+            self._active[kind] = job
+            self._trim()
+            serial = self._groups.setdefault(group, threading.Lock()) if group else None
+        threading.Thread(target=self._run, args=(job, fn, serial), name=f"job-{kind}-{job.id[:8]}", daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def _trim(self):
+        done = [j for j in sorted(self._jobs.values(), key=lambda j: j.created_at) if not j.active]
+        for j in done[: max(0, len(self._jobs) - self.history)]:
+            del self._jobs[j.id]
+
+    def _run(self, job: Job, fn: JobFn, serial: Optional[threading.Lock] = None):
+        with serial or nullcontext():
+            job.status = "running"
+            job.started_at = datetime.utcnow()
+            try:
+                job.result = asyncio.run(fn(job))
+                job.status = "succeeded"
+            except Exception as e:
+                logger.exception(f"job {job.kind} {job.id} failed")
+                job.error = repr(e)
+                job.status = "failed"
+            finally:
+                job.finished_at = datetime.utcnow()
+
+jobs = JobManager()
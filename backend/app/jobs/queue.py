@@ -0,0 +1,119 @@
+import json
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.db.bulk import upsert
+
+# Lease queue over work_items, shared by any number of worker processes on any number of
+# machines (app.jobs.worker):
+# - enqueue is idempotent per (run_id, kind, key)
+# - claim marks items leased to one worker until now + WORKER_LEASE_SECONDS in a single
+#   UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING, so concurrent
+#   claims never hand out the same item (SQLite runs one writer at a time anyway). Pending
+#   items past their backoff are claimable, and so are leased items whose lease expired: the
+#   worker holding them died or hung. Every claim counts an attempt; an item whose lease
+#   expires on its last attempt is failed instead of handed out again.
+# - heartbeat renews the leases a worker still holds; complete and fail apply only while it
+#   holds the lease, so a worker that lost an item cannot overwrite the new holder's outcome.
+#   lease_owner is left on finished items: the worker that last had them.
+#
+# Delivery is at least once. Handlers are idempotent: reports dedupe on (source, published_at),
+# mentions follow the ticker watermark, summaries skip rows that exist.
+
+OPEN = ("pending", "leased")
+
+def enqueue(db: Session, run_id: int, kind: str, items: Iterable[tuple[str, dict]]) -> int:
+    """Add (key, payload) items; keys already queued for the run are left alone. Does not commit."""
+    rows = [{"run_id": run_id, "kind": kind, "key": key, "payload": json.dumps(payload, ensure_ascii=False)}
+            for key, payload in items]
+    return len(upsert(db, models.WorkItem, rows, ["run_id", "kind", "key"], returning=[models.WorkItem.id]))
+
+def _lease_until() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.WORKER_LEASE_SECONDS)
+
+def reap(db: Session) -> int:
+    """Fail leased items that expired on their last attempt. Does not commit."""
+    w = models.WorkItem
+    return db.execute(
+        update(w)
+        .where(w.status == "leased", w.lease_expires_at < datetime.utcnow(), w.attempts >= settings.PIPELINE_MAX_ATTEMPTS)
+        .values(status="failed", error="lease expired", updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+def claim(db: Session, worker: str, kinds: Optional[Sequence[str]] = None, limit: int = 1) -> List:
+    """Lease up to `limit` items (oldest first) to `worker` and commit; returns the claimed rows
+    (id, run_id, kind, key, payload, attempts)."""
+    w = models.WorkItem
+    now = datetime.utcnow()
+    reap(db)
+    claimable = or_(
+        and_(w.status == "pending", w.available_at <= now),
+        and_(w.status == "leased", w.lease_expires_at < now),
+    )
+    ids = select(w.id).where(claimable).order_by(w.id).limit(limit).with_for_update(skip_locked=True)
+    if kinds:
+        ids = ids.where(w.kind.in_(kinds))
+    rows = db.execute(
+        update(w)
+        .where(w.id.in_(ids.scalar_subquery()))
+        .values(status="leased", lease_owner=worker, lease_expires_at=_lease_until(), attempts=w.attempts + 1, updated_at=now)
+        .returning(w.id, w.run_id, w.kind, w.key, w.payload, w.attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    return sorted(rows, key=lambda r: r.id)
+
+def _held(worker: str, item_ids: Iterable[int]):
+    w = models.WorkItem
+    return and_(w.id.in_(list(item_ids)), w.status == "leased", w.lease_owner == worker)
+
+def heartbeat(db: Session, worker: str, item_ids: Iterable[int]) -> int:
+    """Renew the worker's leases on item_ids; returns how many it still holds. Does not commit."""
+    return db.execute(
+        update(models.WorkItem).where(_held(worker, item_ids)).values(lease_expires_at=_lease_until())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+def complete(db: Session, worker: str, item_id: int, result: Optional[dict] = None) -> bool:
+    """Mark a held item done; False when the lease was lost. Does not commit."""
+    return db.execute(
+        update(models.WorkItem).where(_held(worker, [item_id]))
+        .values(status="done", result=json.dumps(result or {}, ensure_ascii=False), error="", lease_expires_at=None,
+                updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount == 1
+
+def fail(db: Session, worker: str, item_id: int, attempts: int, error: str) -> bool:
+    """Put a held item back with backoff, or fail it on its last attempt. Does not commit."""
+    now = datetime.utcnow()
+    if attempts >= settings.PIPELINE_MAX_ATTEMPTS:
+        values = {"status": "failed"}
+    else:
+        values = {"status": "pending", "available_at": now + timedelta(seconds=settings.WORKER_RETRY_BACKOFF_S * attempts)}
+    return db.execute(
+        update(models.WorkItem).where(_held(worker, [item_id]))
+        .values(error=error[:2000], lease_expires_at=None, updated_at=now, **values)
+        .execution_options(synchronize_session=False)
+    ).rowcount == 1
+
+def counts(db: Session, run_id: int) -> Dict[str, Dict[str, int]]:
+    """kind -> status -> items for one run."""
+    w = models.WorkItem
+    out: Dict[str, Dict[str, int]] = {}
+    rows = db.execute(select(w.kind, w.status, func.count()).where(w.run_id == run_id).group_by(w.kind, w.status))
+    for kind, status, n in rows:
+        out.setdefault(kind, {})[status] = n
+    return out
+
+def open_items(db: Session, run_id: Optional[int] = None) -> int:
+    w = models.WorkItem
+    q = select(func.count()).select_from(w).where(w.status.in_(OPEN))
+    if run_id is not None:
+        q = q.where(w.run_id == run_id)
+    return db.scalar(q) or 0
@@ -1,19 +1,34 @@
+import argparse
 import os
+import asyncio
 import hashlib
 import json
+import time
 from datetime import datetime, date
-from typing import List, Dict
+from typing import Dict, Iterable, List
 
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.metrics import PIPELINE_ITEMS, PIPELINE_LAST_SUCCESS
+from app.db.base import init_db
 from app.db.session import get_db
-from app.db import models
-from app.services.http_client import get
-from app.services.text_extract import extract_text_from_html, extract_text_from_pdf
-from app.services.mentions import extract_mentions
-from app.services.summarizer import summarize_snippets
+from app.db import models, rollups
+from app.db.bodies import load_bodies, store_bodies
+from app.db.bulk import chunked, upsert
+from app.db.near_dup import assign as assign_near_duplicates
+from app.db.search import index_reports, index_mentions
+from app.jobs.checkpoints import STAGES, RunHeartbeat, checkpoint, failed_items, finish_run, load_items, retryable, start_run
+from app.jobs.manager import Job, stage
+from app.services.fetcher import AsyncFetcher
+from app.services.html_extract import extract_article
+from app.services.text_extract import PdfExtractor
+from app.services.mentions import MentionMatcher
+from app.services.snippets import Candidate, select_snippets
+from app.services.summarizer import BATCH_PROMPT, SYSTEM_PROMPT, Summarizer
+from app.services.summary_cache import SummaryCache, cache_key
 
 logger = get_logger(__name__)
 
@@ -23,26 +38,75 @@ def _split_csv(s: str) -> List[str]:
 def _sha256(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-def _upsert_source(db: Session, name: str, kind: str, url: str) -> models.Source:
-    row = db.query(models.Source).filter(models.Source.url == url).first()
-    if row:
-        return row
-    row = models.Source(name=name, kind=kind, url=url)
-    db.add(row)
+def _upsert_sources(db: Session, name: str, kind: str, urls: List[str]) -> List[models.Source]:
+    if not urls:
+        return []
+    upsert(db, models.Source, [{"name": name, "kind": kind, "url": u} for u in dict.fromkeys(urls)], ["url"])
     db.commit()
-    db.refresh(row)
-    return row
+    rows = {s.url: s for s in db.query(models.Source).filter(models.Source.url.in_(urls))}
+    return [rows[u] for u in urls]
 
-def _store_report(db: Session, source: models.Source, title: str, published_at: datetime, raw_text: str) -> models.Report | None:
-    h = _sha256(raw_text)
-    exists = db.query(models.Report).filter(models.Report.source_id == source.id, models.Report.raw_hash == h).first()
-    if exists:
+def _sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def _validators(sources: List[models.Source]) -> Dict[str, tuple[str, str]]:
+    return {s.url: (s.etag, s.last_modified) for s in sources}
+
+def _changed_body_hash(db: Session, source: models.Source, resp, body_hash: str) -> str | None:
+    """Return the body hash to record once the body is processed, or None when it can be skipped."""
+    if resp.status_code == 304:
+        logger.info(f"not modified: {source.url}")
+        return None
+    if body_hash == source.content_hash:
+        # same bytes as last time: refresh validators, skip extraction
+        logger.info(f"unchanged body: {source.url}")
+        _remember_fetch(source, resp.headers, body_hash)
         return None
-    r = models.Report(source_id=source.id, title=title or source.name, published_at=published_at, raw_text=raw_text, raw_hash=h)
-    db.add(r)
+    return body_hash
+
+def _remember_fetch(source: models.Source, headers, body_hash: str):
+    # committed together with the stage's reports
+    source.etag = headers.get("etag", "")
+    source.last_modified = headers.get("last-modified", "")
+    source.content_hash = body_hash
+
+def _store_reports(db: Session, items: List[Dict]) -> List[models.Report]:
+    """Insert new reports in bulk; items carry source_id, title, published_at, raw_text.
+
+    Returns only the reports actually inserted (per-source raw_hash dedup, one query for all).
+    Near-duplicates of earlier reports are stored too, marked with duplicate_of.
+    """
+    for it in items:
+        it["raw_hash"] = _sha256(it["raw_text"])
+    existing = set()
+    for batch in chunked(list({it["raw_hash"] for it in items})):
+        existing.update(
+            db.query(models.Report.source_id, models.Report.raw_hash).filter(models.Report.raw_hash.in_(batch)).all()
+        )
+    fresh = []
+    for it in items:
+        key = (it["source_id"], it["raw_hash"])
+        if key not in existing:
+            existing.add(key)
+            fresh.append(it)
+    inserted = upsert(db, models.Report, [{k: v for k, v in it.items() if k != "raw_text"} for it in fresh],
+                      ["source_id", "published_at"],
+                      returning=[models.Report.id, models.Report.source_id, models.Report.published_at])
+    by_key = {(it["source_id"], it["published_at"]): it for it in fresh}
+    indexed = []
+    for row in inserted:
+        it = by_key[(row.source_id, row.published_at)]
+        indexed.append((row.id, it["title"], it["raw_text"]))
+    store_bodies(db, ((rid, body) for rid, _, body in indexed))
+    assign_near_duplicates(db, ((rid, body) for rid, _, body in indexed))
+    index_reports(db, indexed)
     db.commit()
-    db.refresh(r)
-    return r
+    # loaded after the commit so the objects are not expired
+    reports = []
+    for batch in chunked([row.id for row in inserted]):
+        reports.extend(db.query(models.Report).filter(models.Report.id.in_(batch)).all())
+    reports.sort(key=lambda r: r.id)
+    return reports
 
 def _ensure_default_tickers(db: Session):
     # Minimal starter tickers; you can add via API later.
@@ -53,119 +117,369 @@ def _ensure_default_tickers(db: Session):
         ("035420", "NAVER"),
         ("035720", "카카오"),
     ]
-    for sym, name in defaults:
-        if not db.query(models.Ticker).filter(models.Ticker.symbol == sym).first():
-            db.add(models.Ticker(symbol=sym, name=name))
+    upsert(db, models.Ticker, [{"symbol": sym, "name": name} for sym, name in defaults], ["symbol"])
     db.commit()
 
-def fetch_reports(db: Session) -> List[models.Report]:
-    reports = []
-    now = datetime.utcnow()
-
-    # HTML sources
-    for url in _split_csv(settings.NAVER_MOBILE_RESEARCH_URLS):
-        source = _upsert_source(db, name="Naver Research", kind="html", url=url)
-        html = get(url).text
-        text, title = extract_text_from_html(html)
-        r = _store_report(db, source, title=title or "Naver Research", published_at=now, raw_text=text)
-        if r:
-            reports.append(r)
-
-    # PDF sources
-    pdf_dir = os.path.join(os.path.dirname(__file__), "..", "..", "data", "pdf")
-    pdf_dir = os.path.abspath(pdf_dir)
-    os.makedirs(pdf_dir, exist_ok=True)
-
-    for i, url in enumerate(_split_csv(settings.PDF_URLS)):
-        source = _upsert_source(db, name="PDF Source", kind="pdf", url=url)
-        resp = get(url)
-        path = os.path.join(pdf_dir, f"report_{i}.pdf")
-        with open(path, "wb") as f:
-            f.write(resp.content)
-        text = extract_text_from_pdf(path)
-        r = _store_report(db, source, title="PDF Report", published_at=now, raw_text=text)
-        if r:
-            reports.append(r)
+def _data_dir(name: str) -> str:
+    path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", name))
+    os.makedirs(path, exist_ok=True)
+    return path
 
-    return reports
+async def fetch_stage(db: Session, run: models.PipelineRun) -> Dict:
+    """Download every source not fetched yet in this run to content-addressed files.
+
+    HTML goes to data/raw and PDFs to data/pdf, so a resumed run extracts from disk
+    instead of fetching again. Validators are recorded only once the report is stored.
+    """
+    html_sources = _upsert_sources(db, "Naver Research", "html", _split_csv(settings.NAVER_MOBILE_RESEARCH_URLS))
+    pdf_sources = _upsert_sources(db, "PDF Source", "pdf", _split_csv(settings.PDF_URLS))
+    items = load_items(db, run, "fetch")
+    html_todo = [s for s in html_sources if retryable(items.get(s.url))]
+    pdf_todo = [s for s in pdf_sources if retryable(items.get(s.url))]
+
+    # download everything concurrently (conditional GET); bodies are streamed to disk
+    async with AsyncFetcher() as fetcher:
+        html_downloads, pdf_downloads = await asyncio.gather(
+            fetcher.download_all([s.url for s in html_todo], _data_dir("raw"), suffix=".html", validators=_validators(html_todo)),
+            fetcher.download_all([s.url for s in pdf_todo], _data_dir("pdf"), suffix=".pdf", validators=_validators(pdf_todo)),
+        )
+
+    fetched = skipped = failed = 0
+    for source, dl in zip(html_todo + pdf_todo, html_downloads + pdf_downloads):
+        if dl is None:
+            checkpoint(db, run, items, "fetch", source.url, "failed", error=fetcher.errors.get(source.url, ""))
+            failed += 1
+            continue
+        if _changed_body_hash(db, source, dl, dl.sha256) is None:
+            checkpoint(db, run, items, "fetch", source.url, "done")  # nothing new to extract
+            skipped += 1
+            continue
+        checkpoint(db, run, items, "fetch", source.url, "done", payload={
+            "path": dl.path, "sha256": dl.sha256,
+            "etag": dl.headers.get("etag", ""), "last-modified": dl.headers.get("last-modified", ""), "charset": dl.charset,
+        })
+        fetched += 1
+    db.commit()
+    return {"fetched": fetched, "unchanged": skipped, "failed": failed}
+
+async def _extract_one(extractor: PdfExtractor, source: models.Source, path: str,
+                       charset: str = "") -> tuple[str, str, datetime | None]:
+    if source.kind == "pdf":
+        return (await extractor.extract_async(path)).text, "PDF Report", None
+    with open(path, "rb") as f:
+        article = extract_article(f.read(), source.extract_rules, charset)
+    return article.text, article.title or "Naver Research", article.published_at
+
+async def extract_stage(db: Session, run: models.PipelineRun) -> Dict:
+    """Extract text from fetched files and store new reports, checkpointing every few sources.
+
+    Reports are stamped with the run's start time, so re-storing after a crash hits the
+    (source_id, published_at) constraint instead of duplicating.
+    """
+    fetched = {k: json.loads(it.payload) for k, it in load_items(db, run, "fetch").items() if it.status == "done" and it.payload}
+    items = load_items(db, run, "extract")
+    todo = [url for url in fetched if retryable(items.get(url))]
+    sources = {s.url: s for s in db.query(models.Source).filter(models.Source.url.in_(todo))} if todo else {}
+    stored = failed = 0
+    with PdfExtractor() as extractor:
+        for batch in chunked(todo, settings.PIPELINE_CHECKPOINT_ITEMS):
+            pending: List[Dict] = []
+            ok = []
+            for url in batch:
+                source, info = sources[url], fetched[url]
+                try:
+                    text, title, article_date = await _extract_one(extractor, source, info["path"], info.get("charset", ""))
+                except Exception as e:
+                    logger.warning(f"extraction failed: {url}: {e!r}")
+                    checkpoint(db, run, items, "extract", url, "failed", error=repr(e))
+                    failed += 1
+                    continue
+                pending.append({"source_id": source.id, "title": title, "published_at": run.started_at,
+                                "article_published_at": article_date, "raw_text": text})
+                ok.append((source, info))
+            # one bulk insert + commit per batch
+            reports = {r.source_id: r.id for r in _store_reports(db, pending)}
+            for source, info in ok:
+                _remember_fetch(source, info, info["sha256"])
+                checkpoint(db, run, items, "extract", source.url, "done", payload={"report_id": reports.get(source.id)})
+            stored += len(reports)
+            db.commit()
+    return {"reports": stored, "failed": failed}
+
+def _ticker_terms(t: models.Ticker) -> List[str]:
+    return [t.symbol, t.name, *_split_csv(t.aliases)]
+
+def build_mention_matcher(tickers: List[models.Ticker]) -> MentionMatcher:
+    return MentionMatcher({t.id: _ticker_terms(t) for t in tickers})
+
+def scan_reports(matcher: MentionMatcher, reports: Iterable[tuple[int, str]]) -> Dict[tuple[int, int], tuple[int, List[str]]]:
+    """(report_id, raw_text) pairs -> {(report_id, ticker_id): (term matches, snippets)}."""
+    found: Dict[tuple[int, int], tuple[int, List[str]]] = {}
+    for report_id, raw_text in reports:
+        for ticker_id, (hits, snippets) in matcher.extract_counted(raw_text).items():
+            if snippets:
+                found[(report_id, ticker_id)] = (hits, snippets)
+    return found
+
+def write_mentions(db: Session, found: Dict[tuple[int, int], tuple[int, List[str]]]) -> int:
+    """Upsert scanned mentions (merging into existing rows), index them and update the daily
+    rollups. Does not commit."""
+    if not found:
+        return 0
+    # existing mentions and report dates for these reports in one query each per batch, read
+    # under the reports' lock so the rollup deltas match what the upsert replaces
+    rollups.lock_reports(db, (rid for rid, _ in found))
+    existing: Dict[tuple[int, int], tuple[int, str]] = {}
+    reports: Dict[int, tuple[datetime, int]] = {}
+    for batch in chunked(list({rid for rid, _ in found})):
+        rows = (
+            db.query(models.Mention.report_id, models.Mention.ticker_id, models.Mention.hits, models.Mention.snippets)
+            .filter(models.Mention.report_id.in_(batch))
+        )
+        existing.update({(rid, tid): (hits, snips) for rid, tid, hits, snips in rows})
+        rows = db.query(models.Report.id, models.Report.published_at, models.Report.source_id).filter(models.Report.id.in_(batch))
+        reports.update({rid: (published_at, sid) for rid, published_at, sid in rows})
+
+    values = []
+    deltas: Dict[rollups.Key, List[int]] = {}
+    for (report_id, ticker_id), (hits, snippets) in found.items():
+        published_at, source_id = reports[report_id]
+        old_hits, old_count, new_report = 0, 0, 1
+        if (report_id, ticker_id) in existing:
+            # merge append, keeping order so the stored text (and the summary cache key) is stable
+            old_hits, old_text = existing[(report_id, ticker_id)]
+            old = [s for s in (old_text or "").split("\n") if s]
+            snippets = list(dict.fromkeys(s for s in [*old, *snippets] if s))
+            old_count, new_report = rollups.snippet_count(old_text), 0
+        values.append({"report_id": report_id, "ticker_id": ticker_id, "published_at": published_at,
+                       "hits": hits, "snippets": "\n".join(snippets)})
+        rollups.add(deltas, ticker_id, published_at, source_id, hits - old_hits, new_report,
+                    rollups.snippet_count("\n".join(snippets)) - old_count)
+    written = upsert(db, models.Mention, values, ["report_id", "ticker_id", "published_at"], update_cols=["hits", "snippets"],
+                     returning=[models.Mention.id, models.Mention.snippets])
+    index_mentions(db, [(row.id, row.snippets) for row in written])
+    rollups.apply(db, deltas)
+    return sum(1 for k in found if k not in existing)
+
+def mark_scanned(db: Session, report_ids: List[int], ticker_version: int):
+    # watermark: these reports have been scanned against every ticker with id <= ticker_version
+    for batch in chunked(report_ids):
+        db.query(models.Report).filter(models.Report.id.in_(batch)).update(
+            {models.Report.scanned_ticker_id: ticker_version}, synchronize_session=False
+        )
 
 def create_mentions(db: Session, reports: List[models.Report]) -> int:
     tickers = db.query(models.Ticker).all()
-    created = 0
-    for rep in reports:
-        for t in tickers:
-            snippets = extract_mentions(rep.raw_text, t.symbol, t.name)
-            if not snippets:
-                continue
-            # upsert mention
-            m = (
-                db.query(models.Mention)
-                .filter(models.Mention.report_id == rep.id, models.Mention.ticker_id == t.id)
-                .first()
-            )
-            if not m:
-                m = models.Mention(report_id=rep.id, ticker_id=t.id, snippets="\n".join(snippets))
-                db.add(m)
-                created += 1
-            else:
-                # merge append (avoid duplicates roughly)
-                existing = set((m.snippets or "").split("\n"))
-                merged = list(existing.union(snippets))
-                m.snippets = "\n".join(merged)
+    if not tickers or not reports:
+        return 0
+    # one automaton for the whole run, one scan per canonical report; near-duplicates only
+    # get the watermark
+    matcher = build_mention_matcher(tickers)
+    bodies = load_bodies(db, [r.id for r in reports if r.duplicate_of is None])
+    created = write_mentions(db, scan_reports(matcher, bodies.items()))
+    mark_scanned(db, [r.id for r in reports], max(t.id for t in tickers))
     db.commit()
     return created
 
-async def create_summaries(db: Session, asof_date: str) -> int:
-    created = 0
-    tickers = db.query(models.Ticker).all()
-    for t in tickers:
-        mentions = (
-            db.query(models.Mention)
-            .join(models.Report, models.Mention.report_id == models.Report.id)
-            .filter(models.Mention.ticker_id == t.id)
-            .order_by(models.Report.published_at.desc())
-            .limit(50)
-            .all()
+def _latest_snippets(db: Session, ticker_ids: List[int], per_ticker: int = 50) -> Dict[int, List[Candidate]]:
+    # the latest `per_ticker` mentions of every ticker in a single windowed query
+    ranked = (
+        select(
+            models.Mention.ticker_id,
+            models.Mention.report_id,
+            models.Mention.published_at,
+            models.Mention.snippets,
+            func.row_number().over(partition_by=models.Mention.ticker_id, order_by=models.Mention.published_at.desc()).label("rn"),
         )
-        snippets = []
-        for m in mentions:
-            snippets.extend([x.strip() for x in (m.snippets or "").split("\n") if x.strip()])
+        .where(models.Mention.ticker_id.in_(ticker_ids))
+        .subquery()
+    )
+    out: Dict[int, List[Candidate]] = {tid: [] for tid in ticker_ids}
+    rows = db.execute(
+        select(ranked.c.ticker_id, ranked.c.published_at, ranked.c.snippets, models.Report.id, models.Report.source_id)
+        .join(models.Report, models.Report.id == ranked.c.report_id)
+        .where(ranked.c.rn <= per_ticker)
+        .order_by(ranked.c.ticker_id, ranked.c.rn)
+    )
+    for ticker_id, published_at, snippets, report_id, source_id in rows:
+        out[ticker_id].extend(Candidate(x.strip(), published_at, source_id, report_id)
+                              for x in (snippets or "").split("\n") if x.strip())
+    return out
 
-        # if already exists for date, skip
-        if db.query(models.TickerSummary).filter(models.TickerSummary.symbol == t.symbol, models.TickerSummary.asof_date == asof_date).first():
-            continue
+async def create_summaries(db: Session, asof_date: str, summarizer: Summarizer | None = None, cache: SummaryCache | None = None,
+                           symbols: Iterable[str] | None = None, force: bool = False) -> int:
+    """Summarize `symbols` (default: every ticker) for asof_date.
 
-        result = await summarize_snippets(snippets[:40])
-        summary = models.TickerSummary(
-            symbol=t.symbol,
-            asof_date=asof_date,
-            summary=result.get("summary", ""),
-            bullets=json.dumps(result.get("bullets", []), ensure_ascii=False),
-            confidence=int(result.get("confidence", 50)),
-        )
-        db.add(summary)
-        created += 1
+    Tickers that already have a summary for the date are skipped unless force, which
+    regenerates and overwrites them (e.g. after a prompt change). Tickers whose LLM call
+    failed are left out and listed in summarizer.failed.
+    """
+    if summarizer is None:
+        async with Summarizer() as s:
+            return await create_summaries(db, asof_date, s, cache, symbols, force)
+    cache = cache or SummaryCache(db)
+
+    # if already exists for date, skip
+    done = set() if force else {
+        sym for (sym,) in db.query(models.TickerSummary.symbol).filter(models.TickerSummary.asof_date == asof_date)
+    }
+    wanted = set(symbols) if symbols is not None else None
+    tickers = [t for t in db.query(models.Ticker).all() if t.symbol not in done and (wanted is None or t.symbol in wanted)]
+    latest = _latest_snippets(db, [t.id for t in tickers]) if tickers else {}
+    pending: Dict[str, List[str]] = {t.symbol: select_snippets(latest[t.id]) for t in tickers}
+
+    # unchanged inputs reuse the cached output. Keys include the prompt that produced the
+    # result, and a ticker may have been summarized alone or in a batch, so both are looked up.
+    # Mock summaries (no API key), empty inputs and non-JSON fallbacks are never cached.
+    use_cache = bool(summarizer.api_key)
+    keys = {
+        sym: [cache_key(snips, prompt) for prompt in (SYSTEM_PROMPT, BATCH_PROMPT)]
+        for sym, snips in pending.items() if snips
+    } if use_cache else {}
+    cached = cache.get_many([k for ks in keys.values() for k in ks], count=False)
+    results = {sym: cached[k] for sym, ks in keys.items() for k in reversed(ks) if k in cached}
+    # one hit or miss per ticker, not per key
+    cache.hits += len(results)
+    cache.misses += len(keys) - len(results)
+
+    # all LLM calls run concurrently; rows are written once they are back
+    fresh = await summarizer.summarize_many({sym: snips for sym, snips in pending.items() if sym not in results})
+    for sym, result in fresh.items():
+        prompt = summarizer.prompts.get(sym)
+        if sym in keys and prompt is not None:
+            cache.put(cache_key(pending[sym], prompt), result)
+    results.update(fresh)
+    if use_cache:
+        cache.evict()
+
+    values = [
+        {
+            "symbol": symbol,
+            "asof_date": asof_date,
+            "summary": result.get("summary", ""),
+            "bullets": json.dumps(result.get("bullets", []), ensure_ascii=False),
+            "confidence": int(result.get("confidence", 50)),
+        }
+        for symbol in pending
+        if (result := results.get(symbol)) is not None
+    ]
+    inserted = upsert(db, models.TickerSummary, values, ["symbol", "asof_date"],
+                      update_cols=["summary", "bullets", "confidence"] if force else None,
+                      returning=[models.TickerSummary.id])
     db.commit()
-    return created
+    return len(inserted)
+
+def mentions_stage(db: Session, run: models.PipelineRun, rescan: bool = False) -> Dict:
+    """Scan every report behind the ticker-set watermark: this run's new reports and,
+    after a ticker was added, the older ones. Checkpointed per chunk by the watermark
+    itself (see app.jobs.backfill). rescan resets the watermarks of the run's own reports,
+    so they are scanned again."""
+    from app.jobs.backfill import backfill_mentions
+    if rescan:
+        extracted = load_items(db, run, "extract").values()
+        report_ids = [rid for it in extracted if it.status == "done" and it.payload
+                      if (rid := json.loads(it.payload).get("report_id"))]
+        for ids in chunked(report_ids):
+            db.query(models.Report).filter(models.Report.id.in_(ids)).update(
+                {models.Report.scanned_ticker_id: 0}, synchronize_session=False
+            )
+        db.commit()
+    return backfill_mentions(db)
 
-def run_daily_pipeline() -> Dict:
-    asof_date = date.today().isoformat()
+async def summarize_stage(db: Session, run: models.PipelineRun, summarizer: Summarizer, cache: SummaryCache,
+                          force: bool = False) -> Dict:
+    items = load_items(db, run, "summarize")
+    todo = [t.symbol for t in db.query(models.Ticker).order_by(models.Ticker.symbol) if retryable(items.get(t.symbol))]
+    created = await create_summaries(db, run.asof_date, summarizer, cache, symbols=todo, force=force)
+    for symbol in todo:
+        if symbol in summarizer.failed:
+            checkpoint(db, run, items, "summarize", symbol, "failed", error=summarizer.failed[symbol])
+        else:
+            checkpoint(db, run, items, "summarize", symbol, "done")
+    db.commit()
+    return {"summaries_created": created, "failed": sum(1 for s in todo if s in summarizer.failed)}
+
+async def run_daily_pipeline_async(job: Job | None = None, asof_date: str | None = None, from_stage: str | None = None) -> Dict:
+    """Run (or resume) the pipeline for asof_date: fetch -> extract -> mentions -> summarize.
+
+    A rerun for a date whose last run failed picks up from its checkpoints. from_stage
+    re-runs that stage and the ones after it in full (mentions: rescan of the run's reports,
+    summarize: regenerate existing summaries). Raises RunInProgress while another process
+    drives the run for the date.
+    """
+    asof_date = asof_date or date.today().isoformat()
+    done: Dict[str, Dict] = {}
+    cache = summarizer = None
     with get_db() as db:
         _ensure_default_tickers(db)
-        reports = fetch_reports(db)
-        mentions_created = create_mentions(db, reports)
+        run = start_run(db, asof_date, from_stage)
+        resume_after = STAGES.index(run.stage) + 1 if run.stage else 0
+        logger.info(f"pipeline run {run.id} for {asof_date}: starting at {STAGES[resume_after:] or 'done'}")
+        beat = RunHeartbeat(run.id, run.owner)
+        beat.start()
+        try:
+            for name in STAGES[resume_after:]:
+                beat.check()
+                with stage(job, name) as st:
+                    if name == "fetch":
+                        done[name] = await fetch_stage(db, run)
+                    elif name == "extract":
+                        done[name] = await extract_stage(db, run)
+                    elif name == "mentions":
+                        done[name] = mentions_stage(db, run, rescan=from_stage == "mentions")
+                    else:
+                        cache = SummaryCache(db)
+                        async with Summarizer() as summarizer:
+                            done[name] = await summarize_stage(db, run, summarizer, cache, force=from_stage == "summarize")
+                    st.detail.update(done[name])
+                run.stage = name
+                db.commit()
+            beat.check()
+        except BaseException as e:
+            db.rollback()
+            if not beat.lost.is_set():  # an adopted run is the new owner's to close
+                run.status, run.error, run.finished_at = "failed", repr(e), datetime.utcnow()
+                db.commit()
+            raise
+        finally:
+            beat.done.set()
+        status = finish_run(db, run)
+        failed = failed_items(db, run)
+        run_id = run.id
 
-    # Summaries need async
-    import asyncio
-    with get_db() as db:
-        summaries_created = asyncio.run(create_summaries(db, asof_date))
+    llm_stats = summarizer.stats.report() if summarizer else {}
+    if cache is not None:
+        logger.info(f"summarizer: {llm_stats} cache: {cache.report()}")
+    reports = done.get("extract", {}).get("reports", 0)
+    mentions_created = done.get("mentions", {}).get("mentions_created", 0)
+    summaries_created = done.get("summarize", {}).get("summaries_created", 0)
+    PIPELINE_ITEMS.inc(reports, kind="reports")
+    PIPELINE_ITEMS.inc(mentions_created, kind="mentions")
+    PIPELINE_ITEMS.inc(summaries_created, kind="summaries")
+    if status == "succeeded":
+        PIPELINE_LAST_SUCCESS.set(time.time())
 
     return {
-        "fetched_reports": len(reports),
+        "run_id": run_id,
+        "status": status,
+        "failed_items": failed,
+        "fetched_reports": reports,
         "mentions_created": mentions_created,
         "summaries_created": summaries_created,
         "asof_date": asof_date,
+        "llm_stats": llm_stats,
+        "summary_cache_hits": cache.hits if cache else 0,
+        "summary_cache_misses": cache.misses if cache else 0,
     }
 
+def run_daily_pipeline(asof_date: str | None = None, from_stage: str | None = None) -> Dict:
+    return asyncio.run(run_daily_pipeline_async(asof_date=asof_date, from_stage=from_stage))
+
 if __name__ == "__main__":
-    print(run_daily_pipeline())
+    parser = argparse.ArgumentParser(description="Run or resume the daily pipeline.")
+    parser.add_argument("--asof-date", default=None, help="YYYY-MM-DD, default today")
+    parser.add_argument("--from-stage", choices=STAGES, default=None,
+                        help="re-run this stage and the later ones, e.g. summarize after a prompt change")
+    args = parser.parse_args()
+    init_db()
+    print(run_daily_pipeline(args.asof_date, args.from_stage))
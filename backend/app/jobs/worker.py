@@ -0,0 +1,369 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from contextlib import AsyncExitStack
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import PIPELINE_ITEMS, PIPELINE_LAST_SUCCESS
+from app.db import models
+from app.db.bulk import chunked, upsert
+from app.db.session import get_db
+from app.jobs import queue
+from app.jobs.backfill import _scan_chunk, _skip_duplicates, ticker_version
+from app.jobs.checkpoints import QUEUE, STAGES, RunInProgress, start_run, touch_run
+from app.jobs.run_daily import (
+    _changed_body_hash, _data_dir, _ensure_default_tickers, _extract_one, _remember_fetch, _split_csv,
+    _store_reports, create_summaries,
+)
+from app.services.fetcher import AsyncFetcher
+from app.services.summarizer import Summarizer
+from app.services.summary_cache import SummaryCache
+from app.services.text_extract import PdfExtractor
+
+logger = get_logger(__name__)
+
+# Queue-driven pipeline: the stages of app.jobs.run_daily split into work items (app.jobs.queue)
+# that any number of `python -m app.jobs.worker` processes, on any number of machines sharing
+# the database, pull concurrently:
+#   fetch      one item per source url
+#   extract    one item per fetched source that changed
+#   mentions   one item per range of WORKER_MENTION_REPORTS report ids behind the ticker watermark
+#   summarize  one item per WORKER_SUMMARY_TICKERS tickers without a summary for the date
+# A stage's items are planned once the previous stage has none open, by whichever worker gets
+# there first (advance); PipelineRun.stage is still the last completed stage. A worker that dies
+# loses its leases after WORKER_LEASE_SECONDS and its items go to the next claimer.
+#
+# Queue-driven runs are owned by QUEUE (app.jobs.checkpoints): every worker renews the run's
+# heartbeat while it holds items or advances it, so a run_daily for the same date refuses with
+# RunInProgress, and --enqueue refuses while a run_daily process owns the run. Once no worker
+# has touched a run for PIPELINE_RUN_STALE_S, run_daily may adopt it; workers then stop
+# planning it and fail its remaining items instead of running them.
+
+# a fetch item is one request, so a worker claims a batch and runs it at once; a summarize item
+# already keeps SUMMARY_CONCURRENCY calls in flight, and the other kinds are CPU bound
+CONCURRENT = ("fetch",)
+
+def _dest(source: models.Source) -> tuple[str, str]:
+    return (_data_dir("pdf"), ".pdf") if source.kind == "pdf" else (_data_dir("raw"), ".html")
+
+# --- planning ---
+
+def _plan_fetch(db: Session, run: models.PipelineRun) -> List[tuple[str, dict]]:
+    urls = {}
+    for name, kind, csv in (("Naver Research", "html", settings.NAVER_MOBILE_RESEARCH_URLS),
+                            ("PDF Source", "pdf", settings.PDF_URLS)):
+        urls.update({u: {"name": name, "kind": kind, "url": u} for u in _split_csv(csv) if u not in urls})
+    upsert(db, models.Source, list(urls.values()), ["url"])
+    return [(u, {"url": u}) for u in urls]
+
+def _plan_extract(db: Session, run: models.PipelineRun) -> List[tuple[str, dict]]:
+    rows = db.execute(select(models.WorkItem.key, models.WorkItem.result).where(
+        models.WorkItem.run_id == run.id, models.WorkItem.kind == "fetch", models.WorkItem.status == "done"))
+    out = []
+    for url, result in rows:
+        fetched = json.loads(result or "{}")
+        if fetched.get("path"):  # empty when the body had not changed
+            out.append((url, {"url": url, **fetched}))
+    return out
+
+def _plan_mentions(db: Session, run: models.PipelineRun) -> List[tuple[str, dict]]:
+    version = ticker_version(db)
+    _skip_duplicates(db, version)
+    ids = db.scalars(select(models.Report.id).where(models.Report.scanned_ticker_id < version).order_by(models.Report.id)).all()
+    return [(f"{version}:{ids[0]}-{ids[-1]}", {"version": version, "lo": ids[0], "hi": ids[-1]})
+            for ids in chunked(ids, settings.WORKER_MENTION_REPORTS)]
+
+def _plan_summarize(db: Session, run: models.PipelineRun) -> List[tuple[str, dict]]:
+    done = {sym for (sym,) in db.query(models.TickerSummary.symbol).filter(models.TickerSummary.asof_date == run.asof_date)}
+    symbols = [sym for (sym,) in db.query(models.Ticker.symbol).order_by(models.Ticker.symbol) if sym not in done]
+    return [(f"{batch[0]}..{batch[-1]}", {"symbols": list(batch)}) for batch in chunked(symbols, settings.WORKER_SUMMARY_TICKERS)]
+
+PLANNERS = {"fetch": _plan_fetch, "extract": _plan_extract, "mentions": _plan_mentions, "summarize": _plan_summarize}
+
+def advance(db: Session, run_id: int) -> str:
+    """Plan the run's next stage once the current one has no open items, and close the run
+    after the last. Safe to call from every worker at any time; returns the run status."""
+    # a no-op update takes the run's row lock (on SQLite the write lock), so concurrent
+    # workers plan each stage once; it also renews the run's heartbeat
+    w, r = models.WorkItem, models.PipelineRun
+    locked = db.execute(
+        update(r).where(r.id == run_id, r.status == "running", r.owner == QUEUE)
+        .values(heartbeat_at=datetime.utcnow()).execution_options(synchronize_session=False)
+    ).rowcount
+    run = db.execute(select(models.PipelineRun).where(models.PipelineRun.id == run_id)
+                     .execution_options(populate_existing=True)).scalar_one()
+    if not locked:
+        db.rollback()
+        return run.status
+    while run.stage != STAGES[-1]:
+        active = STAGES[STAGES.index(run.stage) + 1] if run.stage else STAGES[0]
+        total, still_open = db.execute(
+            select(func.count(), func.coalesce(func.sum(case((w.status.in_(queue.OPEN), 1), else_=0)), 0))
+            .where(w.run_id == run.id, w.kind == active)
+        ).one()
+        if not total:
+            planned = queue.enqueue(db, run.id, active, PLANNERS[active](db, run))
+            if planned:
+                logger.info(f"run {run.id}: {planned} {active} items queued")
+                break
+        elif still_open:
+            break
+        run.stage = active
+    else:
+        failed = db.scalar(select(func.count()).select_from(w).where(w.run_id == run.id, w.status == "failed"))
+        run.status = "partial" if failed else "succeeded"
+        run.error = f"{failed} items failed" if failed else ""
+        run.finished_at = datetime.utcnow()
+        if not failed:
+            PIPELINE_LAST_SUCCESS.set(time.time())
+        logger.info(f"run {run.id} for {run.asof_date}: {run.status}")
+    db.commit()
+    return run.status
+
+def advance_all(db: Session) -> int:
+    """Advance every running queue-driven run; returns how many are still running."""
+    run_ids = db.scalars(
+        select(models.WorkItem.run_id).distinct()
+        .join(models.PipelineRun, models.PipelineRun.id == models.WorkItem.run_id)
+        .where(models.PipelineRun.status == "running", models.PipelineRun.owner == QUEUE)
+    ).all()
+    db.rollback()
+    return sum(advance(db, run_id) == "running" for run_id in run_ids)
+
+def enqueue_run(asof_date: Optional[str] = None) -> int:
+    """Start (or resume) the run for asof_date and queue its first stage; returns the run id.
+    Raises RunInProgress while a live run_daily process owns the date's run."""
+    with get_db() as db:
+        _ensure_default_tickers(db)
+        run = start_run(db, asof_date or date.today().isoformat(), owner=QUEUE)
+        advance(db, run.id)
+        return run.id
+
+# --- handlers: one work item each, all idempotent ---
+
+class _Context:
+    def __init__(self, fetcher: AsyncFetcher, extractor: PdfExtractor, summarizer: Summarizer):
+        self.fetcher = fetcher
+        self.extractor = extractor
+        self.summarizer = summarizer
+
+def _source(db: Session, url: str) -> models.Source:
+    return db.query(models.Source).filter(models.Source.url == url).one()
+
+async def handle_fetch(db: Session, run: models.PipelineRun, payload: dict, ctx: _Context) -> dict:
+    source = _source(db, payload["url"])
+    dest, suffix = _dest(source)
+    dl = await ctx.fetcher.download(source.url, dest, suffix, etag=source.etag, last_modified=source.last_modified)
+    if _changed_body_hash(db, source, dl, dl.sha256) is None:
+        return {}
+    return {"path": dl.path, "sha256": dl.sha256,
+            "etag": dl.headers.get("etag", ""), "last-modified": dl.headers.get("last-modified", ""), "charset": dl.charset}
+
+async def handle_extract(db: Session, run: models.PipelineRun, payload: dict, ctx: _Context) -> dict:
+    source = _source(db, payload["url"])
+    path = payload["path"]
+    if not os.path.exists(path):
+        # fetched by a worker on another machine
+        dl = await ctx.fetcher.download(source.url, *_dest(source))
+        path, payload = dl.path, {**payload, "sha256": dl.sha256, "charset": dl.charset}
+    text, title, article_date = await _extract_one(ctx.extractor, source, path, payload.get("charset", ""))
+    # stamped with the run's start, so a retry after a crash hits the (source, published_at) constraint
+    reports = _store_reports(db, [{"source_id": source.id, "title": title, "published_at": run.started_at,
+                                   "article_published_at": article_date, "raw_text": text}])
+    _remember_fetch(source, payload, payload["sha256"])
+    PIPELINE_ITEMS.inc(len(reports), kind="reports")
+    return {"report_id": reports[0].id if reports else None}
+
+async def handle_mentions(db: Session, run: models.PipelineRun, payload: dict, ctx: _Context) -> dict:
+    # committed per chunk; the watermark lets a retry skip what is already scanned
+    version, after_id = payload["version"], payload["lo"] - 1
+    tickers = db.query(models.Ticker).filter(models.Ticker.id <= version).order_by(models.Ticker.id).all()
+    scanned = created = 0
+    while True:
+        after_id, n, c = _scan_chunk(db, tickers, version, after_id, settings.BACKFILL_CHUNK_SIZE, through_id=payload["hi"])
+        if not n:
+            break
+        scanned, created = scanned + n, created + c
+    PIPELINE_ITEMS.inc(created, kind="mentions")
+    return {"reports_scanned": scanned, "mentions_created": created}
+
+async def handle_summarize(db: Session, run: models.PipelineRun, payload: dict, ctx: _Context) -> dict:
+    symbols = payload["symbols"]
+    for sym in symbols:
+        ctx.summarizer.failed.pop(sym, None)
+    # summaries that came back are stored; a retry only redoes the failed ones
+    created = await create_summaries(db, run.asof_date, ctx.summarizer, SummaryCache(db), symbols=symbols)
+    PIPELINE_ITEMS.inc(created, kind="summaries")
+    failed = [sym for sym in symbols if sym in ctx.summarizer.failed]
+    if failed:
+        raise RuntimeError(f"summaries failed for {failed}: {ctx.summarizer.failed[failed[0]]}")
+    return {"summaries_created": created}
+
+HANDLERS = {"fetch": handle_fetch, "extract": handle_extract, "mentions": handle_mentions, "summarize": handle_summarize}
+
+# --- the worker loop ---
+
+class _Heartbeat(threading.Thread):
+    """Renews the leases of the items in hand, and the heartbeat of their runs, every third of
+    the lease. A thread, so a long mention scan blocking the event loop does not let its lease
+    run out."""
+
+    def __init__(self, worker: str):
+        super().__init__(daemon=True, name="lease-heartbeat")
+        self.worker = worker
+        self.held: Dict[int, int] = {}  # item id -> run id
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(settings.WORKER_LEASE_SECONDS / 3):
+            held = self.held.copy()  # one call under the GIL; the dict changes under us
+            if not held:
+                continue
+            try:
+                with get_db() as db:
+                    kept = queue.heartbeat(db, self.worker, list(held))
+                    for run_id in sorted(set(held.values())):
+                        touch_run(db, run_id, QUEUE)
+                    db.commit()
+                if kept < len(held):
+                    logger.warning(f"{self.worker}: lost {len(held) - kept} leases")
+            except Exception as e:
+                logger.warning(f"{self.worker}: heartbeat failed: {e!r}")
+
+async def _process(worker: str, item, ctx: _Context) -> bool:
+    with get_db() as db:
+        run = db.get(models.PipelineRun, item.run_id)
+        if run.owner != QUEUE or run.status != "running":
+            # adopted by a run_daily process after the workers went quiet; it redoes this work
+            queue.fail(db, worker, item.id, settings.PIPELINE_MAX_ATTEMPTS,
+                       f"run {run.id} is no longer queue-driven ({run.status}, owner {run.owner})")
+            db.commit()
+            return False
+        try:
+            result = await HANDLERS[item.kind](db, run, json.loads(item.payload or "{}"), ctx)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"{item.kind} {item.key} failed (attempt {item.attempts}): {e!r}")
+            queue.fail(db, worker, item.id, item.attempts, repr(e))
+            db.commit()
+            return False
+        if not queue.complete(db, worker, item.id, result):
+            # lease expired and the item went to another worker; its outcome wins
+            logger.warning(f"{item.kind} {item.key}: lease lost before completion")
+        db.commit()
+        return True
+
+async def work(worker: str, kinds: Optional[Sequence[str]] = None, exit_when_idle: bool = False,
+               stop: Optional[threading.Event] = None) -> Dict:
+    """Claim and process items until stop is set (or, with exit_when_idle, nothing is left)."""
+    stop = stop or threading.Event()
+    batch_kinds = [k for k in CONCURRENT if not kinds or k in kinds]
+    done = failed = 0
+    beat = _Heartbeat(worker)
+    async with AsyncExitStack() as stack:
+        ctx = _Context(
+            fetcher=await stack.enter_async_context(AsyncFetcher()),
+            # one PDF process per worker: scale out with more workers instead
+            extractor=stack.enter_context(PdfExtractor(workers=1)),
+            summarizer=await stack.enter_async_context(Summarizer()),
+        )
+        beat.start()
+        try:
+            while not stop.is_set():
+                with get_db() as db:
+                    items = (batch_kinds and queue.claim(db, worker, batch_kinds, settings.WORKER_CLAIM_BATCH)) \
+                        or queue.claim(db, worker, kinds, 1)
+                if not items:
+                    with get_db() as db:
+                        advance_all(db)
+                        if exit_when_idle and not queue.open_items(db):
+                            break
+                    await asyncio.sleep(settings.WORKER_POLL_SECONDS)
+                    continue
+                beat.held.update({it.id: it.run_id for it in items})
+                if items[0].kind in CONCURRENT:
+                    outcomes = await asyncio.gather(*(_process(worker, it, ctx) for it in items))
+                else:
+                    outcomes = [await _process(worker, it, ctx) for it in items]
+                for it in items:
+                    beat.held.pop(it.id, None)
+                done += sum(outcomes)
+                failed += len(outcomes) - sum(outcomes)
+                with get_db() as db:
+                    for run_id in sorted({it.run_id for it in items}):
+                        advance(db, run_id)
+        finally:
+            beat.done.set()
+    return {"worker": worker, "items_done": done, "items_failed": failed}
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+def spawn(processes: int, argv: List[str]) -> int:
+    """Run `processes` local workers with the same arguments and wait for them."""
+    children = [subprocess.Popen([sys.executable, "-m", "app.jobs.worker", *argv]) for _ in range(processes)]
+
+    def forward(signum, frame):
+        for child in children:
+            child.send_signal(signum)
+    signal.signal(signal.SIGINT, forward)
+    signal.signal(signal.SIGTERM, forward)
+    return max(child.wait() for child in children)
+
+def status(db: Session, limit: int = 5) -> List[Dict]:
+    run_ids = db.scalars(select(models.WorkItem.run_id).distinct().order_by(models.WorkItem.run_id.desc()).limit(limit)).all()
+    runs = []
+    for run_id in run_ids:
+        run = db.get(models.PipelineRun, run_id)
+        runs.append({"run_id": run.id, "asof_date": run.asof_date, "status": run.status, "stage": run.stage,
+                     "items": queue.counts(db, run.id)})
+    return runs
+
+if __name__ == "__main__":
+    from app.db.base import init_db
+
+    parser = argparse.ArgumentParser(description="Pull pipeline work items from the queue.")
+    parser.add_argument("--enqueue", action="store_true", help="start (or resume) the run for --asof-date and queue its work")
+    parser.add_argument("--asof-date", default=None, help="YYYY-MM-DD, default today (with --enqueue)")
+    parser.add_argument("--processes", type=int, default=1, help="local worker processes to start (0: just --enqueue)")
+    parser.add_argument("--kinds", default="", help=f"comma-separated subset of {','.join(STAGES)}")
+    parser.add_argument("--exit-when-idle", action="store_true", help="stop once no open items are left")
+    parser.add_argument("--status", action="store_true", help="print the latest queue-driven runs and exit")
+    args = parser.parse_args()
+    init_db()
+    if args.status:
+        with get_db() as db:
+            print(json.dumps(status(db), indent=2))
+        sys.exit(0)
+    if args.enqueue:
+        try:
+            print({"run_id": enqueue_run(args.asof_date)})
+        except RunInProgress as e:
+            print(f"not enqueued: {e}", file=sys.stderr)
+            sys.exit(1)
+        if not args.processes:
+            sys.exit(0)
+    if args.processes > 1:
+        child_args = ["--kinds", args.kinds] + (["--exit-when-idle"] if args.exit_when_idle else [])
+        sys.exit(spawn(args.processes, child_args))
+    kinds = _split_csv(args.kinds) or None
+    if kinds and set(kinds) - set(STAGES):
+        parser.error(f"unknown kinds {sorted(set(kinds) - set(STAGES))}")
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())  # finish the items in hand, then exit
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    print(asyncio.run(work(worker_id(), kinds, args.exit_when_idle, stop)))
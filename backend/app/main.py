@@ -1,8 +1,13 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 from app.core.config import settings
-from app.db.base import init_db
+from app.core.metrics import HTTP_LATENCY, HTTP_REQUESTS, registry
+from app.db.base import async_engine, init_db
 from app.api.router import api_router
 
 app = FastAPI(title=settings.APP_NAME)
@@ -16,12 +21,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# batch endpoints (summaries, reports) return large JSON/NDJSON bodies
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MIN_BYTES)
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    t0 = time.perf_counter()
+    response = await call_next(request)
+    # label by route template, not raw path, to keep the series count bounded
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    HTTP_LATENCY.observe(time.perf_counter() - t0, method=request.method, route=path)
+    HTTP_REQUESTS.inc(method=request.method, route=path, status=str(response.status_code))
+    return response
+
 @app.on_event("startup")
 def on_startup():
     init_db()
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    await async_engine.dispose()
+
 app.include_router(api_router)
 
 @app.get("/health")
 def health():
     return {"ok": True, "env": settings.ENV}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,192 @@
+import os
+import asyncio
+import hashlib
+import re
+import tempfile
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import httpx
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import CALL_ERRORS, track
+
+logger = get_logger(__name__)
+
+# Async fetch engine:
+# - one pooled httpx client for the whole run
+# - token bucket per host (RATE_LIMIT_REQUESTS_PER_MIN applies to each host separately)
+# - bounded overall concurrency
+
+_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.I)
+
+class DownloadTooLarge(Exception):
+    pass
+
+@dataclass
+class Download:
+    url: str
+    status_code: int
+    headers: httpx.Headers
+    path: str = ""      # content-addressed file: <sha256><suffix>
+    sha256: str = ""
+    size: int = 0
+
+    @property
+    def charset(self) -> str:
+        """The Content-Type's charset parameter, "" when the server sent none."""
+        m = _CHARSET.search(self.headers.get("content-type", ""))
+        return m.group(1) if m else ""
+
+def _conditional_headers(etag: str, last_modified: str) -> dict[str, str]:
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+class TokenBucket:
+    def __init__(self, rate_per_sec: float, capacity: int = 1):
+        self.rate = rate_per_sec
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # the lock keeps waiters in FIFO order so a host never bursts above its rate
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class HostRateLimiter:
+    def __init__(self, per_min: int | None = None, burst: int | None = None):
+        per_min = max(1, per_min or settings.RATE_LIMIT_REQUESTS_PER_MIN)
+        self.rate = per_min / 60.0
+        self.burst = burst or settings.RATE_LIMIT_BURST
+        self._buckets: dict[str, TokenBucket] = {}
+
+    async def acquire(self, url: str):
+        host = urlsplit(url).netloc.lower()
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        await bucket.acquire()
+
+class AsyncFetcher:
+    def __init__(self, concurrency: int | None = None, limiter: HostRateLimiter | None = None):
+        self.concurrency = max(1, concurrency or settings.FETCH_CONCURRENCY)
+        self.limiter = limiter or HostRateLimiter()
+        self._sem = asyncio.Semaphore(self.concurrency)
+        self._client: httpx.AsyncClient | None = None
+        self.errors: dict[str, str] = {}  # url -> last error, for URLs that came back as None
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        self._client = httpx.AsyncClient(
+            headers={"User-Agent": settings.USER_AGENT},
+            timeout=settings.REQUEST_TIMEOUT_SECONDS,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._client.aclose()
+        self._client = None
+
+    # 3 attempts, exponential backoff between 1s and 10s
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
+    async def _get(self, url: str, headers: dict[str, str] | None = None) -> httpx.Response:
+        # wait for the host's token before taking a connection slot, so a slow host
+        # never starves the others
+        async with track("http_rate_wait"):
+            await self.limiter.acquire(url)
+        # per attempt; transport errors and error statuses count as failed calls
+        async with self._sem, track("http_get"):
+            resp = await self._client.get(url, headers=headers)
+        if resp.status_code >= 400:
+            CALL_ERRORS.inc(call="http_get")
+        if resp.status_code == 304:
+            return resp
+        resp.raise_for_status()
+        return resp
+
+    async def fetch(self, url: str, etag: str = "", last_modified: str = "") -> httpx.Response:
+        # conditional GET when validators are known; callers check for status 304
+        return await self._get(url, _conditional_headers(etag, last_modified))
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+        retry=retry_if_not_exception_type(DownloadTooLarge),
+    )
+    async def download(self, url: str, dest_dir: str, suffix: str = "", max_bytes: int | None = None,
+                       etag: str = "", last_modified: str = "") -> Download:
+        """Stream the body to ``dest_dir/<sha256><suffix>`` without holding it in memory.
+
+        An existing file with the same hash is kept as is, so dest_dir doubles as a local cache.
+        """
+        max_bytes = max_bytes or settings.DOWNLOAD_MAX_BYTES
+        async with track("http_rate_wait"):
+            await self.limiter.acquire(url)
+        async with self._sem, track("http_download"):
+            async with self._client.stream("GET", url, headers=_conditional_headers(etag, last_modified)) as resp:
+                if resp.status_code == 304:
+                    return Download(url=url, status_code=304, headers=resp.headers)
+                resp.raise_for_status()
+                declared = int(resp.headers.get("content-length") or 0)
+                if declared > max_bytes:
+                    raise DownloadTooLarge(f"{url}: content-length {declared} > {max_bytes}")
+
+                h = hashlib.sha256()
+                size = 0
+                fd, tmp = tempfile.mkstemp(dir=dest_dir, suffix=".part")
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        async for chunk in resp.aiter_bytes(settings.DOWNLOAD_CHUNK_BYTES):
+                            size += len(chunk)
+                            if size > max_bytes:
+                                raise DownloadTooLarge(f"{url}: body exceeds {max_bytes} bytes")
+                            h.update(chunk)
+                            f.write(chunk)
+                    digest = h.hexdigest()
+                    path = os.path.join(dest_dir, f"{digest}{suffix}")
+                    if os.path.exists(path):
+                        os.remove(tmp)
+                    else:
+                        os.replace(tmp, path)
+                except BaseException:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+                    raise
+                return Download(url=url, status_code=resp.status_code, headers=resp.headers, path=path, sha256=digest, size=size)
+
+    async def _gather(self, urls: list[str], call) -> list:
+        # results line up with urls; a URL that still fails after retries yields None
+        async def one(url: str):
+            try:
+                return await call(url)
+            except Exception as e:
+                logger.warning(f"fetch failed: {url}: {e!r}")
+                self.errors[url] = repr(e)
+                return None
+        return await asyncio.gather(*(one(u) for u in urls))
+
+    async def fetch_all(self, urls: list[str], validators: dict[str, tuple[str, str]] | None = None) -> list[httpx.Response | None]:
+        validators = validators or {}
+        return await self._gather(urls, lambda u: self.fetch(u, *validators.get(u, ("", ""))))
+
+    async def download_all(self, urls: list[str], dest_dir: str, suffix: str = "", max_bytes: int | None = None,
+                           validators: dict[str, tuple[str, str]] | None = None) -> list[Download | None]:
+        validators = validators or {}
+        return await self._gather(urls, lambda u: self.download(u, dest_dir, suffix, max_bytes, *validators.get(u, ("", ""))))
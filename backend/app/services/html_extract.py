@@ -0,0 +1,284 @@
+import codecs
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+import charset_normalizer
+from lxml import etree, html as lxml_html
+from lxml.cssselect import CSSSelector
+
+from app.core.logging import get_logger
+from app.core.metrics import tracked
+
+logger = get_logger(__name__)
+
+# Article extraction straight from the lxml tree: body text, title and publish date, without
+# the site chrome (menus, navigation, footers, share buttons) that used to end up in raw_text.
+#
+# A source can carry rules (Source.extract_rules, JSON) naming where things are:
+#   {"content": "td.view_cnt", "title": "th.view_sbj", "date": "p.source", "remove": [".link_area"]}
+# Selectors are CSS, or XPath when they start with "/", "./", "(" or a function call such as
+# concat(...) (title and date may be XPath strings). Anything a rule does not
+# cover falls back to the generic path: drop chrome by tag and class/id, then take the block
+# with the most paragraph text (Readability-style scoring, discounted by link density).
+# Chrome matches that hold most of the page's text are kept (ASP.NET wraps the whole page in
+# a <form>, some sites the article in a "header-wrap"), and when the result is still a sliver
+# of the page the blocks are scored again without the chrome pass.
+#
+# Bytes are decoded from the HTTP charset when given, else by libxml2 from the BOM / <meta
+# charset>; pages declaring neither that are not UTF-8 (EUC-KR is common) are detected.
+
+_NEVER_CONTENT = ("script", "style", "noscript", "template", "iframe", "svg", "button", "select")
+_CHROME_TAGS = frozenset(("nav", "header", "footer", "aside", "menu"))
+_CHROME_MAX_SHARE = 0.5  # chrome candidates holding more of the page's text than this stay
+_MIN_KEPT_SHARE = 0.15  # below this share of the page's text, retry without the chrome pass
+_CHROME = re.compile(
+    r"(?:^|[\s_-])(?:nav|navi|gnb|lnb|snb|menu|header|footer|sidebar|aside|banner|ad|ads|advert|share|sns|social"
+    r"|comment|reply|related|recommend|breadcrumb|copyright|login|popup|toolbar|paging|pagination)(?:[\s_-]|$)",
+    re.I,
+)
+_BLOCK = frozenset(("p", "div", "td", "th", "tr", "li", "ul", "ol", "table", "section", "article", "main",
+                    "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "dd", "dt", "dl"))
+_MIN_PARAGRAPH = 25  # chars of own text before an element counts as content
+_DATE = re.compile(r"(20\d\d)\s*[.\-/년]\s*(\d{1,2})\s*[.\-/월]\s*(\d{1,2})")
+_DATE_META = (
+    "//meta[@property='article:published_time']/@content",
+    "//meta[@name='date' or @name='pubdate' or @name='publishdate']/@content",
+    "//meta[@itemprop='datePublished']/@content",
+    "//time/@datetime",
+)
+
+@dataclass
+class Article:
+    text: str
+    title: str = ""
+    published_at: Optional[datetime] = None
+
+@dataclass
+class ExtractRules:
+    content: str = ""
+    title: str = ""
+    date: str = ""
+    remove: List[str] = field(default_factory=list)
+
+_XPATH = re.compile(r"^(?:\.?/|\(|[a-z-]+\()")
+
+def _selector(expr: str) -> Callable:
+    if _XPATH.match(expr):
+        return etree.XPath(expr)
+    return CSSSelector(expr)
+
+@lru_cache(maxsize=256)
+def compile_rules(raw: str) -> Optional[dict]:
+    """Source.extract_rules JSON -> {"content": selector, ...}; raises ValueError on bad rules."""
+    if not raw:
+        return None
+    try:
+        rules = ExtractRules(**json.loads(raw))
+        return {
+            "content": _selector(rules.content) if rules.content else None,
+            "title": _selector(rules.title) if rules.title else None,
+            "date": _selector(rules.date) if rules.date else None,
+            "remove": [_selector(r) for r in rules.remove],
+        }
+    except (TypeError, json.JSONDecodeError, etree.XPathError, SyntaxError) as e:
+        # cssselect raises SelectorSyntaxError, a SyntaxError
+        raise ValueError(f"invalid extract rules: {e}") from e
+
+def _first(selector, root) -> Optional[etree._Element]:
+    for el in selector(root):
+        if isinstance(el, etree._Element):
+            return el
+    return None
+
+def _first_text(selector, root) -> str:
+    found = selector(root)
+    if isinstance(found, str):  # XPath string function
+        return " ".join(found.split())
+    for item in found:
+        text = item.text_content() if isinstance(item, etree._Element) else str(item)
+        if text.strip():
+            return " ".join(text.split())
+    return ""
+
+def _own_text_len(el) -> int:
+    n = len((el.text or "").strip())
+    for child in el:
+        n += len((child.tail or "").strip())
+    return n
+
+def _text(el) -> str:
+    out: List[str] = []
+
+    def walk(e):
+        tag = e.tag if isinstance(e.tag, str) else ""
+        if tag in _BLOCK or tag == "br":
+            out.append("\n")
+        if tag and e.text:
+            out.append(e.text)
+        for child in e:
+            walk(child)
+            if child.tail:
+                out.append(child.tail)
+        if tag in _BLOCK:
+            out.append("\n")
+
+    walk(el)
+    lines = (" ".join(line.split()) for line in "".join(out).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+def _drop(elements):
+    for el in elements:
+        if el.getparent() is not None:
+            el.drop_tree()
+
+def _page_chars(el) -> int:
+    return len("".join(el.text_content().split()))
+
+def _strip_noise(root):
+    etree.strip_elements(root, *_NEVER_CONTENT, with_tail=False)
+    etree.strip_elements(root, etree.Comment, with_tail=False)
+
+def _strip_chrome(root, page_chars: int):
+    limit = _CHROME_MAX_SHARE * page_chars
+    stack = list(root)
+    while stack:
+        el = stack.pop()
+        if not isinstance(el.tag, str):
+            continue
+        if (el.tag in _CHROME_TAGS or _CHROME.search(f"{el.get('class', '')} {el.get('id', '')}")) \
+                and _page_chars(el) <= limit:
+            el.drop_tree()  # its subtree goes too, so it is not walked
+            continue
+        stack.extend(el)
+
+def _link_density(el) -> float:
+    total = len(el.text_content())
+    if not total:
+        return 1.0
+    return sum(len(a.text_content()) for a in el.iter("a")) / total
+
+def _main_content(root):
+    # each paragraph scores for itself, its parent and (half) its grandparent, so the element
+    # holding the article's paragraphs outscores any single one of them and the chrome blocks
+    scores: dict = {}
+    for el in root.iter():
+        if not isinstance(el.tag, str):
+            continue
+        n = _own_text_len(el)
+        if n < _MIN_PARAGRAPH:
+            continue
+        score = n + 10 * (el.text or "").count(",")
+        scores[el] = scores.get(el, 0.0) + score
+        parent = el.getparent()
+        if parent is not None:
+            scores[parent] = scores.get(parent, 0.0) + 0.9 * score
+            grand = parent.getparent()
+            if grand is not None:
+                scores[grand] = scores.get(grand, 0.0) + 0.45 * score
+    if not scores:
+        return root
+    top = sorted(scores, key=scores.get, reverse=True)[:5]
+    return max(top, key=lambda el: scores[el] * (1 - _link_density(el)))
+
+def _parse_date(value: str) -> Optional[datetime]:
+    """ISO timestamps (meta tags, <time datetime>) or the first yyyy.mm.dd-style date in text."""
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        d = datetime.fromisoformat(value)
+        return d.astimezone(timezone.utc).replace(tzinfo=None) if d.tzinfo else d
+    except ValueError:
+        pass
+    m = _DATE.search(value)
+    try:
+        return datetime(int(m.group(1)), int(m.group(2)), int(m.group(3))) if m else None
+    except ValueError:
+        return None
+
+def _title(doc, rules) -> str:
+    if rules and rules["title"] is not None and (title := _first_text(rules["title"], doc)):
+        return title
+    for value in doc.xpath("//meta[@property='og:title']/@content"):
+        if value.strip():
+            return value.strip()
+    el = doc.find(".//title")
+    return " ".join(el.text_content().split()) if el is not None and el.text_content() else ""
+
+def _published(doc, rules, fallback: str) -> Optional[datetime]:
+    if rules and rules["date"] is not None and (d := _parse_date(_first_text(rules["date"], doc))):
+        return d
+    for xp in _DATE_META:
+        for value in doc.xpath(xp):
+            if d := _parse_date(value):
+                return d
+    return _parse_date(fallback)
+
+_BOMS = (codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+_META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=", re.I)
+
+def _codec(charset: str) -> Optional[str]:
+    try:
+        name = codecs.lookup(charset.strip().strip("\"'")).name
+    except LookupError:
+        return None
+    return "cp949" if name == "euc_kr" else name  # Korean sites labelled EUC-KR serve CP949
+
+def _decode(html: bytes, charset: str = "") -> str | bytes:
+    """Text for lxml, or the bytes themselves when they declare their own encoding."""
+    if charset and (codec := _codec(charset)):
+        return html.decode(codec, errors="replace")
+    if html.startswith(_BOMS) or _META_CHARSET.search(html[:4096]):
+        return html
+    try:
+        return html.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+    best = charset_normalizer.from_bytes(html).best()
+    if best is None:
+        return html.decode("utf-8", errors="replace")
+    return html.decode(_codec(best.encoding) or best.encoding, errors="replace")
+
+def _body(doc):
+    body = doc.find("body")
+    return body if body is not None else doc
+
+@tracked("html_extract")
+def extract_article(html: str | bytes, rules: str = "", charset: str = "") -> Article:
+    """Body text, title and publish date of one page. `rules` is a source's extract_rules JSON,
+    `charset` the one from the response's Content-Type."""
+    compiled = compile_rules(rules)
+    if isinstance(html, bytes):
+        html = _decode(html, charset)
+    try:
+        doc = lxml_html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return Article(text="")
+    body = _body(doc)
+    # title and date come from the untouched page (they usually sit above the article)
+    title = _title(doc, compiled)
+    published = _published(doc, compiled, body.text_content()[:2000])
+    content = _first(compiled["content"], doc) if compiled and compiled["content"] is not None else None
+    if compiled:
+        for selector in compiled["remove"]:
+            _drop(selector(doc))
+    if content is not None:
+        etree.strip_elements(content, "script", "style", "noscript", etree.Comment, with_tail=False)
+        return Article(text=_text(content), title=title, published_at=published)
+    _strip_noise(body)
+    page_chars = _page_chars(body)
+    _strip_chrome(body, page_chars)
+    text = _text(_main_content(body))
+    if page_chars and len("".join(text.split())) < _MIN_KEPT_SHARE * page_chars:
+        # the chrome pass may have taken the article with it: score the page as it was
+        whole = _body(lxml_html.document_fromstring(html))
+        _strip_noise(whole)
+        retry = _text(_main_content(whole))
+        logger.warning(f"html extract kept {len(text)} of ~{page_chars} chars"
+                       + ("; using the block found without the chrome pass" if len(retry) > len(text) else ""))
+        text = max(text, retry, key=len)
+    return Article(text=text, title=title, published_at=published)
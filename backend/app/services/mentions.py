@@ -1,17 +1,24 @@
 import re
-from typing import Iterable
+from typing import Hashable, Iterable
+
+from app.core.metrics import tracked
 
 # Simple mention extractor:
 # - Match ticker names (Korean) and/or codes (6-digit) in text
 # - Return snippets around matches
 
-def _make_windows(text: str, spans: list[tuple[int,int]], window: int = 120) -> list[str]:
-    out = []
-    for a,b in spans:
+def _make_windows(text: str, spans: list[tuple[int,int]], window: int = 120, max_chars: int = 600) -> list[str]:
+    # windows that overlap (several hits in one sentence) are merged into one snippet, up
+    # to max_chars, instead of yielding near-identical copies shifted by a few characters
+    merged: list[list[int]] = []
+    for a, b in spans:  # sorted by the callers
         start = max(0, a-window)
         end = min(len(text), b+window)
-        snippet = text[start:end].replace("\n", " ").strip()
-        out.append(snippet)
+        if merged and start <= merged[-1][1] and end - merged[-1][0] <= max_chars:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    out = [text[start:end].replace("\n", " ").strip() for start, end in merged]
     # de-dup
     uniq = []
     seen = set()
@@ -22,6 +29,7 @@ def _make_windows(text: str, spans: list[tuple[int,int]], window: int = 120) ->
             seen.add(k)
     return uniq[:10]
 
+@tracked("mention_extract")
 def extract_mentions(text: str, ticker_symbol: str, ticker_name: str) -> list[str]:
     spans = []
 
@@ -38,3 +46,91 @@ def extract_mentions(text: str, ticker_symbol: str, ticker_name: str) -> list[st
         return []
     spans.sort()
     return _make_windows(text, spans)
+
+
+class MentionMatcher:
+    """Aho-Corasick automaton over every ticker term (symbol, name, aliases).
+
+    Built once per run and scans each text in a single pass. Spans are reported
+    per term the same way ``re.finditer`` would (non-overlapping, left to right),
+    so ``extract`` returns exactly what ``extract_mentions`` returns per ticker.
+    """
+
+    def __init__(self, terms: dict[Hashable, Iterable[str]]):
+        # node 0 is the root; each node: goto edges, failure link, term ids ending here
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+        # term id -> (length, keys owning the term)
+        self._terms: list[tuple[int, list[Hashable]]] = []
+
+        term_ids: dict[str, int] = {}
+        for key, words in terms.items():
+            # each distinct term once per key; a duplicate would only repeat spans
+            for w in dict.fromkeys(w for w in words if w):
+                tid = term_ids.get(w)
+                if tid is None:
+                    tid = len(self._terms)
+                    term_ids[w] = tid
+                    self._terms.append((len(w), []))
+                    self._add(w, tid)
+                self._terms[tid][1].append(key)
+        self._build()
+
+    def _add(self, word: str, tid: int):
+        node = 0
+        for ch in word:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(tid)
+
+    def _build(self):
+        queue = list(self._goto[0].values())
+        i = 0
+        while i < len(queue):
+            node = queue[i]
+            i += 1
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_spans(self, text: str) -> dict[Hashable, list[tuple[int, int]]]:
+        goto, fail, out, terms = self._goto, self._fail, self._out, self._terms
+        last_end = [0] * len(terms)
+        found: dict[Hashable, list[tuple[int, int]]] = {}
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for tid in out[node]:
+                length, keys = terms[tid]
+                start = i + 1 - length
+                if start < last_end[tid]:
+                    continue  # overlaps a previous match of the same term
+                last_end[tid] = i + 1
+                for key in keys:
+                    found.setdefault(key, []).append((start, i + 1))
+        for spans in found.values():
+            spans.sort()
+        return found
+
+    @tracked("mention_extract")
+    def extract(self, text: str) -> dict[Hashable, list[str]]:
+        return {key: _make_windows(text, spans) for key, spans in self.find_spans(text).items()}
+
+    @tracked("mention_extract")
+    def extract_counted(self, text: str) -> dict[Hashable, tuple[int, list[str]]]:
+        """Like ``extract``, with the number of term matches behind each key's snippets."""
+        return {key: (len(spans), _make_windows(text, spans)) for key, spans in self.find_spans(text).items()}
@@ -0,0 +1,67 @@
+import hashlib
+import random
+import re
+import struct
+from typing import List, Optional, Set
+
+# MinHash signatures with LSH banding, for near-duplicate detection (see app.db.near_dup).
+#
+# Two texts agree on each signature slot with probability equal to the Jaccard similarity of
+# their shingle sets, so the share of equal slots estimates it. The PERMUTATIONS slots are
+# cut into BANDS bands of ROWS; each band hashes to one bucket key, and reports sharing any
+# bucket become candidates. With 8 x 8, a pair at Jaccard 0.9 shares a bucket 99% of the
+# time, a pair at 0.5 about 3% of the time.
+#
+# Shingles are word 3-grams after folding every number to "0", so a copy re-rendered with a
+# different timestamp, page number or view count has the same shingles.
+#
+# The "permutations" are XOR masks over one 64-bit hash per shingle: min(map(mask.__xor__))
+# runs in C, so a 4k-char report costs a few milliseconds, mostly in shingling.
+
+SHINGLE = 3
+PERMUTATIONS = 64
+BANDS = 8
+ROWS = PERMUTATIONS // BANDS
+
+_rnd = random.Random(0x6E64)  # fixed: signatures are stored, the masks must never change
+_MASKS = [_rnd.getrandbits(64) for _ in range(PERMUTATIONS)]
+_LOW32 = (1 << 32) - 1
+_PACK = struct.Struct(f"<{PERMUTATIONS}I")
+_WORD = re.compile(r"\w+")
+_DIGITS = re.compile(r"\d+")
+
+def shingles(text: str, min_tokens: int = 0) -> Set[str]:
+    words = _WORD.findall(_DIGITS.sub("0", text.lower()))
+    if not words or len(words) < min_tokens:
+        return set()
+    return {" ".join(words[i:i + SHINGLE]) for i in range(max(1, len(words) - SHINGLE + 1))}
+
+def _hash64(s: str) -> int:
+    return int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+
+def signature(text: str, min_tokens: int = 0) -> Optional[List[int]]:
+    """PERMUTATIONS 32-bit minhashes of the text's shingles, None for texts under min_tokens words."""
+    feats = shingles(text, min_tokens)
+    if not feats:
+        return None
+    hashes = [_hash64(s) for s in feats]
+    # low 32 bits of the winning (masked) hash: enough to tell the argmin shingles apart
+    return [min(map(mask.__xor__, hashes)) & _LOW32 for mask in _MASKS]
+
+def buckets(sig: List[int]) -> List[int]:
+    """One signed 64-bit bucket key per band (the band number is hashed in)."""
+    out = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(struct.pack(f"<B{ROWS}I", band, *sig[band * ROWS:(band + 1) * ROWS]), digest_size=8)
+        out.append(int.from_bytes(digest.digest(), "little", signed=True))
+    return out
+
+def similarity(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / PERMUTATIONS
+
+def pack(sig: List[int]) -> bytes:
+    return _PACK.pack(*sig)
+
+def unpack(data: bytes) -> List[int]:
+    return list(_PACK.unpack(bytes(data)))
@@ -0,0 +1,133 @@
+import heapq
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+try:
+    import tiktoken
+except ImportError:  # optional: token counts fall back to an estimate without it
+    tiktoken = None
+
+logger = get_logger(__name__)
+
+# Picks what the summarizer sees for one ticker: from the snippets of its latest mentions,
+# the most useful ones that fit SUMMARY_SNIPPET_TOKENS.
+#
+#   score = recency (halves every SUMMARY_SNIPPET_HALF_LIFE_DAYS before the newest snippet)
+#           x content (numbers with units, financial terms; very short snippets count less)
+#           x SUMMARY_SNIPPET_SOURCE_DECAY per snippet already taken from the same source
+#
+# Snippets are taken greedily by score. One whose character trigrams overlap an already
+# selected snippet by SUMMARY_SNIPPET_DUP_SIMILARITY or more is skipped, so another portal's
+# copy of the same sentence is not sent twice. Every tie is broken on (date, report, text),
+# so the same mentions always give the same list -- the summary cache key depends on it.
+
+_NUMBER = re.compile(r"\d[\d,.]*\s*(?:%|원|억|조|만|배|달러|bp|p)")
+_TERMS = re.compile(r"목표주가|투자의견|영업이익|매출|순이익|실적|컨센서스|상향|하향|EPS|PER|PBR|ROE|가이던스|수주|증익|감익")
+_SPACE = re.compile(r"\s+")
+
+@dataclass(frozen=True)
+class Candidate:
+    text: str
+    published_at: datetime
+    source_id: int = 0
+    report_id: int = 0
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """tiktoken's encoding for OPENAI_MODEL, or None without tiktoken or when its BPE file
+    cannot be loaded (it is downloaded on first use unless TIKTOKEN_CACHE_DIR has it)."""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(settings.OPENAI_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable, estimating token counts: {e!r}")
+        return None
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens for `text`: tiktoken's count for OPENAI_MODEL when it loads, else an
+    estimate that errs high (a token per non-ASCII character, four ASCII characters per token)."""
+    if (enc := _encoding()) is not None:
+        return len(enc.encode(text))
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return math.ceil(ascii_chars / 4) + (len(text) - ascii_chars)
+
+def _content_weight(text: str) -> float:
+    numbers = len(_NUMBER.findall(text))
+    terms = len(_TERMS.findall(text))
+    weight = 1.0 + 0.2 * min(numbers, 5) + 0.15 * min(terms, 4)
+    return weight * (0.5 if len(text) < 40 else 1.0)
+
+def _trigrams(text: str) -> frozenset:
+    s = _SPACE.sub("", text)
+    return frozenset(s[i:i + 3] for i in range(max(1, len(s) - 2)))
+
+def _similar(a: frozenset, b: frozenset, threshold: float) -> bool:
+    if not a or not b:
+        return False
+    inter = len(a & b)
+    # containment as well as Jaccard: a snippet inside a longer, merged one is a duplicate
+    return inter / min(len(a), len(b)) >= threshold or inter / len(a | b) >= threshold
+
+def select_snippets(candidates: Sequence[Candidate], budget_tokens: Optional[int] = None) -> List[str]:
+    """Best-first snippets for one ticker, fitting budget_tokens (default SUMMARY_SNIPPET_TOKENS)."""
+    budget = budget_tokens or settings.SUMMARY_SNIPPET_TOKENS
+    # exact duplicates (after whitespace folding): keep the newest copy
+    unique: Dict[str, Candidate] = {}
+    for c in candidates:
+        text = " ".join(c.text.split())
+        if not text:
+            continue
+        prev = unique.get(text)
+        if prev is None or (c.published_at, -c.report_id) > (prev.published_at, -prev.report_id):
+            unique[text] = Candidate(text, c.published_at, c.source_id, c.report_id)
+    if not unique:
+        return []
+    newest = max(c.published_at for c in unique.values())
+    half_life = settings.SUMMARY_SNIPPET_HALF_LIFE_DAYS
+    decay = settings.SUMMARY_SNIPPET_SOURCE_DECAY
+
+    def base(c: Candidate) -> float:
+        age_days = (newest - c.published_at).total_seconds() / 86400
+        return 0.5 ** (age_days / half_life) * _content_weight(c.text)
+
+    def entry(score: float, c: Candidate) -> tuple:
+        return (-score, -c.published_at.timestamp(), c.report_id, c.text)
+
+    items = {c.text: c for c in unique.values()}
+    scores = {c.text: base(c) for c in unique.values()}
+    heap = [entry(scores[t], c) for t, c in items.items()]
+    heapq.heapify(heap)
+    per_source: Dict[int, int] = {}
+    chosen: List[str] = []
+    chosen_grams: List[frozenset] = []
+    used = 0
+    while heap and used < budget:
+        neg, _, _, text = heapq.heappop(heap)
+        c = items[text]
+        # lazy re-scoring: the source penalty only grows, so a stale entry is pushed back
+        score = scores[text] * decay ** per_source.get(c.source_id, 0)
+        if score < -neg - 1e-12:
+            heapq.heappush(heap, entry(score, c))
+            continue
+        cost = count_tokens(text) + 2  # "- " bullet and separator
+        if used + cost > budget:
+            continue
+        grams = _trigrams(text)
+        if any(_similar(grams, g, settings.SUMMARY_SNIPPET_DUP_SIMILARITY) for g in chosen_grams):
+            continue
+        chosen.append(text)
+        chosen_grams.append(grams)
+        per_source[c.source_id] = per_source.get(c.source_id, 0) + 1
+        used += cost
+    return chosen
@@ -1,9 +1,16 @@
 import json
-from typing import List, Dict
+import time
+import asyncio
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Hashable
+
 import httpx
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential
 
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.metrics import CALL_ERRORS, track, tracked
 
 logger = get_logger(__name__)
 
@@ -38,34 +45,225 @@ def _mock_summary(snippets: List[str]) -> Dict:
         "confidence": 35,
     }
 
-async def summarize_snippets(snippets: List[str]) -> Dict:
-    if not snippets:
-        return {"summary": "언급 없음", "bullets": [], "confidence": 0}
-
-    if not settings.OPENAI_API_KEY:
-        return _mock_summary(snippets)
-
-    # Minimal OpenAI-compatible call (Responses API style not implemented here to avoid dependency).
-    # We use a generic chat-completions compatible endpoint style.
-    url = "https://api.openai.com/v1/chat/completions"
-    headers = {"Authorization": f"Bearer {settings.OPENAI_API_KEY}"}
-    payload = {
-        "model": settings.OPENAI_MODEL,
-        "messages": [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": "\n\n".join(f"- {s}" for s in snippets)},
-        ],
-        "temperature": 0.2,
-        "response_format": {"type": "json_object"},
-    }
+BATCH_PROMPT = SYSTEM_PROMPT + """
+이번 입력에는 여러 종목이 함께 들어 있다. 각 종목은 '### <키>' 헤더 아래 스니펫으로 구분된다.
+종목별로 위 형식의 JSON을 만들고, 전체 출력은 {"<키>": {...}, ...} 형태의 하나의 JSON 객체로 하라.
+"""
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: float | None):
+        super().__init__(f"rate limited (retry_after={retry_after})")
+        self.retry_after = retry_after
+
+class ServerError(Exception):
+    pass
+
+def _parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+_backoff = wait_exponential(multiplier=1, min=1, max=30)
+
+def _wait_retry_after(retry_state) -> float:
+    # honor Retry-After on 429, exponential backoff otherwise
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, RateLimited) and exc.retry_after is not None:
+        return exc.retry_after
+    return _backoff(retry_state)
+
+def _parse_content(content: str) -> Dict | None:
+    """The model's JSON summary, or None when it returned something else."""
+    try:
+        parsed = json.loads(content)
+    except Exception:
+        return None
+    return parsed if isinstance(parsed, dict) and "summary" in parsed else None
+
+def _fallback_summary(content: str) -> Dict:
+    logger.info("Model returned non-JSON; fallback to mock parse")
+    return {"summary": content, "bullets": [], "confidence": 40}
+
+@dataclass
+class SummarizerStats:
+    requests: int = 0
+    failures: int = 0
+    items: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latencies: list[float] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    def _percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        xs = sorted(self.latencies)
+        return xs[min(len(xs) - 1, int(round(q * (len(xs) - 1))))]
+
+    def report(self) -> Dict[str, float]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "items": self.items,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_p50_s": round(self._percentile(0.50), 3),
+            "latency_p95_s": round(self._percentile(0.95), 3),
+            "latency_p99_s": round(self._percentile(0.99), 3),
+            "elapsed_s": round(elapsed, 3),
+            "items_per_s": round(self.items / elapsed, 3) if elapsed > 0 else 0.0,
+        }
 
-    async with httpx.AsyncClient(timeout=40.0) as client:
-        r = await client.post(url, headers=headers, json=payload)
+class Summarizer:
+    """Summarization scheduler: one pooled client, bounded concurrency, 429-aware retries.
+
+    Tickers whose snippet payload is below SUMMARY_BATCH_MAX_CHARS are packed together
+    (up to SUMMARY_BATCH_MAX_TICKERS per request).
+    """
+
+    def __init__(self, concurrency: int | None = None, base_url: str | None = None, api_key: str | None = None):
+        self.concurrency = max(1, concurrency or settings.SUMMARY_CONCURRENCY)
+        self.base_url = (base_url or settings.OPENAI_BASE_URL).rstrip("/")
+        self.api_key = settings.OPENAI_API_KEY if api_key is None else api_key
+        self.stats = SummarizerStats()
+        self.failed: Dict[Hashable, str] = {}  # key -> error, for keys summarize_many left out
+        # key -> the prompt that produced its summary in summarize_many; None for results that must
+        # not be cached (mock, empty input, non-JSON fallback)
+        self.prompts: Dict[Hashable, str | None] = {}
+        self._sem = asyncio.Semaphore(self.concurrency)
+        self._client: httpx.AsyncClient | None = None
+
+    async def __aenter__(self) -> "Summarizer":
+        self._client = httpx.AsyncClient(
+            timeout=40.0,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._client.aclose()
+        self._client = None
+
+    async def _post_once(self, system: str, user: str) -> str:
+        payload = {
+            "model": settings.OPENAI_MODEL,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+            "temperature": 0.2,
+            "response_format": {"type": "json_object"},
+        }
+        async with self._sem, track("llm_request"):
+            t0 = time.perf_counter()
+            r = await self._client.post(
+                f"{self.base_url}/chat/completions",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json=payload,
+            )
+            self.stats.requests += 1
+            self.stats.latencies.append(time.perf_counter() - t0)
+        if r.status_code == 429 or r.status_code >= 500:
+            CALL_ERRORS.inc(call="llm_request")
+        if r.status_code == 429:
+            raise RateLimited(_parse_retry_after(r.headers.get("retry-after")))
+        if r.status_code >= 500:
+            raise ServerError(f"{r.status_code} from {self.base_url}")
         r.raise_for_status()
         data = r.json()
-        content = data["choices"][0]["message"]["content"]
+        usage = data.get("usage") or {}
+        self.stats.prompt_tokens += int(usage.get("prompt_tokens", 0))
+        self.stats.completion_tokens += int(usage.get("completion_tokens", 0))
+        return data["choices"][0]["message"]["content"]
+
+    async def _post(self, system: str, user: str) -> str:
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(settings.SUMMARY_MAX_ATTEMPTS),
+            wait=_wait_retry_after,
+            retry=retry_if_exception_type((RateLimited, ServerError, httpx.TransportError)),
+            reraise=True,
+        ):
+            with attempt:
+                return await self._post_once(system, user)
+
+    @tracked("summarize")
+    async def _summarize_one(self, snippets: List[str]) -> tuple[Dict, str | None]:
+        """(summary, prompt that produced it, or None when it is not cacheable)."""
+        if not snippets:
+            return {"summary": "언급 없음", "bullets": [], "confidence": 0}, None
+        if not self.api_key:
+            return _mock_summary(snippets), None
+        content = await self._post(SYSTEM_PROMPT, "\n\n".join(f"- {s}" for s in snippets))
+        parsed = _parse_content(content)
+        if parsed is None:
+            return _fallback_summary(content), None
+        return parsed, SYSTEM_PROMPT
+
+    async def summarize(self, snippets: List[str]) -> Dict:
+        return (await self._summarize_one(snippets))[0]
+
+    @tracked("summarize")
+    async def _summarize_batch(self, batch: Dict[Hashable, List[str]]) -> Dict[Hashable, tuple[Dict, str | None]]:
+        user = "\n\n".join(
+            f"### {key}\n" + "\n".join(f"- {s}" for s in snippets) for key, snippets in batch.items()
+        )
         try:
-            return json.loads(content)
-        except Exception:
-            logger.info("Model returned non-JSON; fallback to mock parse")
-            return {"summary": content, "bullets": [], "confidence": 40}
+            parsed = json.loads(await self._post(BATCH_PROMPT, user))
+        except json.JSONDecodeError:
+            parsed = {}
+        out = {}
+        for key, snippets in batch.items():
+            r = parsed.get(str(key)) if isinstance(parsed, dict) else None
+            # anything the model dropped or mangled is summarized on its own
+            out[key] = (r, BATCH_PROMPT) if isinstance(r, dict) and "summary" in r else await self._summarize_one(snippets)
+        return out
+
+    def _plan(self, items: Dict[Hashable, List[str]]) -> list[Dict[Hashable, List[str]]]:
+        # big payloads go alone; small ones are packed greedily
+        plans, batch, size = [], {}, 0
+        for key, snippets in items.items():
+            payload = sum(len(s) for s in snippets)
+            if not snippets or payload >= settings.SUMMARY_BATCH_MAX_CHARS or settings.SUMMARY_BATCH_MAX_TICKERS <= 1:
+                plans.append({key: snippets})
+                continue
+            if batch and (size + payload > settings.SUMMARY_BATCH_MAX_CHARS or len(batch) >= settings.SUMMARY_BATCH_MAX_TICKERS):
+                plans.append(batch)
+                batch, size = {}, 0
+            batch[key] = snippets
+            size += payload
+        if batch:
+            plans.append(batch)
+        return plans
+
+    async def summarize_many(self, items: Dict[Hashable, List[str]]) -> Dict[Hashable, Dict]:
+        """Summarize every key concurrently. A key whose request keeps failing is left out."""
+        async def run(plan: Dict[Hashable, List[str]]) -> Dict[Hashable, tuple[Dict, str | None]]:
+            try:
+                if len(plan) == 1 or not self.api_key:
+                    return {k: await self._summarize_one(v) for k, v in plan.items()}
+                return await self._summarize_batch(plan)
+            except Exception as e:
+                self.stats.failures += len(plan)
+                self.failed.update({k: repr(e) for k in plan})
+                logger.warning(f"summarize failed for {list(plan)}: {e!r}")
+                return {}
+
+        results: Dict[Hashable, Dict] = {}
+        for part in await asyncio.gather(*(run(p) for p in self._plan(items))):
+            for key, (result, prompt) in part.items():
+                results[key] = result
+                self.prompts[key] = prompt
+        self.stats.items += len(results)
+        return results
+
+async def summarize_snippets(snippets: List[str]) -> Dict:
+    async with Summarizer(concurrency=1) as s:
+        return await s.summarize(snippets)
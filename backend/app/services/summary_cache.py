@@ -0,0 +1,91 @@
+import re
+import json
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db import models
+from app.services.summarizer import SYSTEM_PROMPT
+
+logger = get_logger(__name__)
+
+# Content-addressed summary cache:
+# the same snippet set, prompt and model always produce the same key, so an unchanged
+# input reuses the stored output instead of calling the LLM again.
+
+def _normalize(snippet: str) -> str:
+    return re.sub(r"\s+", " ", snippet).strip()
+
+def cache_key(snippets: List[str], prompt: str = SYSTEM_PROMPT, model: str | None = None) -> str:
+    norm = sorted({_normalize(s) for s in snippets if s.strip()})
+    payload = json.dumps({"snippets": norm, "prompt": prompt, "model": model or settings.OPENAI_MODEL}, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class SummaryCache:
+    def __init__(self, db: Session, ttl_days: int | None = None, max_entries: int | None = None):
+        self.db = db
+        self.ttl = timedelta(days=ttl_days or settings.SUMMARY_CACHE_TTL_DAYS)
+        self.max_entries = max_entries or settings.SUMMARY_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._added: Dict[str, models.SummaryCacheEntry] = {}
+
+    def get_many(self, keys: List[str], count: bool = True) -> Dict[str, Dict]:
+        """Stored results by key. With count=False the caller does its own hit/miss counting
+        (several keys per lookup)."""
+        if not keys:
+            return {}
+        cutoff = datetime.utcnow() - self.ttl
+        rows = (
+            self.db.query(models.SummaryCacheEntry)
+            .filter(models.SummaryCacheEntry.key.in_(set(keys)), models.SummaryCacheEntry.created_at >= cutoff)
+            .all()
+        )
+        now = datetime.utcnow()
+        found = {}
+        for row in rows:
+            row.hits += 1
+            row.last_used_at = now
+            found[row.key] = {"summary": row.summary, "bullets": json.loads(row.bullets or "[]"), "confidence": row.confidence}
+        if count:
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put(self, key: str, result: Dict):
+        row = self._added.get(key) or self.db.get(models.SummaryCacheEntry, key)
+        if row is None:
+            row = self._added[key] = models.SummaryCacheEntry(key=key, model=settings.OPENAI_MODEL)
+            self.db.add(row)
+        row.summary = result.get("summary", "")
+        row.bullets = json.dumps(result.get("bullets", []), ensure_ascii=False)
+        row.confidence = int(result.get("confidence", 50))
+        row.created_at = row.last_used_at = datetime.utcnow()
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used ones above max_entries."""
+        self.db.flush()
+        self._added.clear()
+        q = self.db.query(models.SummaryCacheEntry)
+        n = q.filter(models.SummaryCacheEntry.created_at < datetime.utcnow() - self.ttl).delete(synchronize_session=False)
+        overflow = q.count() - self.max_entries
+        if overflow > 0:
+            stale = (
+                self.db.query(models.SummaryCacheEntry.key)
+                .order_by(models.SummaryCacheEntry.last_used_at.asc())
+                .limit(overflow)
+                .subquery()
+            )
+            n += q.filter(models.SummaryCacheEntry.key.in_(stale.select())).delete(synchronize_session=False)
+        self.evicted += n
+        if n:
+            logger.info(f"summary cache: evicted {n} entries")
+        return n
+
+    def report(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evicted": self.evicted}
@@ -1,29 +1,154 @@
-import re
-from bs4 import BeautifulSoup
+import os
+import mmap
+import time
+import asyncio
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from dataclasses import dataclass
+from typing import Iterator
+
 from pypdf import PdfReader
 
-def extract_text_from_html(html: str) -> tuple[str, str]:
-    soup = BeautifulSoup(html, "lxml")
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import tracked
+from app.services.html_extract import extract_article
+
+logger = get_logger(__name__)
 
-    # best-effort title
-    title = ""
-    if soup.title and soup.title.text:
-        title = soup.title.text.strip()
+def extract_text_from_html(html: str | bytes, rules: str = "") -> tuple[str, str]:
+    """(body text, title); see app.services.html_extract for the date and per-source rules."""
+    article = extract_article(html, rules)
+    return article.text, article.title
 
-    # remove scripts/styles
-    for t in soup(["script", "style", "noscript"]):
-        t.decompose()
+# Parallel PDF extraction:
+# - pages are split into chunks and parsed in a process pool (pypdf is pure Python, so threads don't help)
+# - per-document timeout and page cap; the page count is read in the pool too, so a malformed
+#   page tree cannot hang the caller
+# - a timed-out chunk cannot be cancelled once it runs, so the pool is recycled (its processes
+#   killed) and the next document starts on fresh workers
 
-    text = soup.get_text("\n")
-    text = re.sub(r"\n{3,}", "\n\n", text).strip()
-    return text, title
+@dataclass
+class PdfExtraction:
+    path: str
+    text: str
+    pages: int          # pages actually extracted
+    total_pages: int
+    elapsed: float      # seconds
+    truncated: bool     # page cap or timeout cut the document short
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    reader = PdfReader(pdf_path)
-    parts = []
-    for page in reader.pages:
+@contextmanager
+def open_mapped(path: str):
+    # read-only memory map: pages come from the OS page cache instead of a private copy per process
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
         try:
-            parts.append(page.extract_text() or "")
-        except Exception:
-            parts.append("")
-    return "\n".join(parts).strip()
+            yield mm
+        finally:
+            mm.close()
+
+def _count_pages(pdf_path: str) -> int:
+    # runs in a worker process
+    with open_mapped(pdf_path) as mm:
+        return len(PdfReader(mm).pages)
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> list[str]:
+    # runs in a worker process
+    out = []
+    with open_mapped(pdf_path) as mm:
+        reader = PdfReader(mm)
+        for i in range(start, end):
+            try:
+                out.append(reader.pages[i].extract_text() or "")
+            except Exception:
+                out.append("")
+    return out
+
+class PdfExtractor:
+    def __init__(self, workers: int | None = None, max_pages: int | None = None, timeout: float | None = None, chunk_pages: int | None = None):
+        self.workers = workers or settings.PDF_WORKERS or os.cpu_count() or 1
+        self.max_pages = max_pages or settings.PDF_MAX_PAGES
+        self.timeout = timeout or settings.PDF_TIMEOUT_SECONDS
+        self.chunk_pages = max(1, chunk_pages or settings.PDF_CHUNK_PAGES)
+        self._pool: ProcessPoolExecutor | None = None
+
+    def __enter__(self) -> "PdfExtractor":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def recycle(self):
+        """Kill the pool's processes; the next document gets a new pool. Other documents in
+        flight on this extractor fail with BrokenProcessPool."""
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        # private, but the only handle on the processes (Executor.terminate_workers is 3.14+)
+        for proc in list((getattr(pool, "_processes", None) or {}).values()):
+            proc.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _timed_out(self, pdf_path: str, stats: dict):
+        logger.warning(f"pdf extraction timed out after {self.timeout}s, recycling the pool: {pdf_path}")
+        stats["truncated"] = True
+        self.recycle()
+
+    def iter_pages(self, pdf_path: str, stats: dict | None = None) -> Iterator[str]:
+        """Yield page text in page order. Fills ``stats`` (total_pages, pages, truncated) as it goes."""
+        stats = stats if stats is not None else {}
+        stats.update(total_pages=0, pages=0, truncated=False)
+        deadline = time.monotonic() + self.timeout
+        try:
+            total = self.pool.submit(_count_pages, pdf_path).result(timeout=self.timeout)
+        except FuturesTimeout:
+            self._timed_out(pdf_path, stats)
+            return
+        limit = min(total, self.max_pages)
+        stats.update(total_pages=total, truncated=limit < total)
+
+        futures = [
+            self.pool.submit(_extract_page_range, pdf_path, a, min(a + self.chunk_pages, limit))
+            for a in range(0, limit, self.chunk_pages)
+        ]
+        try:
+            for fut in futures:
+                try:
+                    pages = fut.result(timeout=max(0.0, deadline - time.monotonic()))
+                except FuturesTimeout:
+                    self._timed_out(pdf_path, stats)
+                    return
+                for text in pages:
+                    stats["pages"] += 1
+                    yield text
+        finally:
+            for fut in futures:
+                fut.cancel()
+
+    @tracked("pdf_extract")
+    def extract(self, pdf_path: str) -> PdfExtraction:
+        t0 = time.perf_counter()
+        stats: dict = {}
+        text = "\n".join(self.iter_pages(pdf_path, stats)).strip()
+        result = PdfExtraction(path=pdf_path, text=text, elapsed=time.perf_counter() - t0, **stats)
+        logger.info(
+            f"pdf extracted: {pdf_path} pages={result.pages}/{result.total_pages} "
+            f"elapsed={result.elapsed:.2f}s truncated={result.truncated}"
+        )
+        return result
+
+    async def extract_async(self, pdf_path: str) -> PdfExtraction:
+        # the waiting happens on a thread, the parsing in the process pool; the event loop stays free
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.extract, pdf_path)
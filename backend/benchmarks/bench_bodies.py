@@ -0,0 +1,101 @@
+"""Report body storage: compression ratio and codec throughput, and list latency vs body size.
+
+    python -m benchmarks.bench_bodies --reports 2000 --report-chars 4000
+
+Codecs: plain, zlib, zstd, and zstd with a dictionary trained on the first half of the
+corpus (measured on the second half, so the ratio is not flattered by training on the same
+documents). Then stores the corpus at two body sizes in throwaway SQLite DBs and times the
+list_reports query on each, which should not depend on how large the bodies are.
+
+The corpus is synthetic (benchmarks.corpus) and far more repetitive than real reports, so
+absolute ratios run high; compare codecs against each other.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db import bodies, models
+from app.db.bulk import upsert
+from app.db.migrate import hot_queries, upgrade
+from app.jobs.run_daily import _store_reports
+from benchmarks import corpus
+
+def _codec(name: str, texts: list[str], dict_id: int = 0) -> dict:
+    settings.REPORT_BODY_CODEC = name
+    raw = sum(len(t.encode("utf-8")) for t in texts)
+    t0 = time.perf_counter()
+    encoded = [bodies.encode(t, dict_id) for t in texts]
+    enc_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for codec, data in encoded:
+        bodies.decode(codec, data, dict_id)
+    dec_s = time.perf_counter() - t0
+    stored = sum(len(data) for _, data in encoded)
+    return {
+        "raw_bytes": raw,
+        "stored_bytes": stored,
+        "ratio": round(raw / stored, 2),
+        "encode_mb_s": round(raw / enc_s / 1e6, 1),
+        "decode_mb_s": round(raw / dec_s / 1e6, 1),
+    }
+
+def codecs(args, texts: list[str]) -> dict:
+    train, test = texts[: len(texts) // 2], texts[len(texts) // 2:]
+    out = {name: _codec(name, test) for name in ("plain", "zlib", "zstd")}
+    if bodies.zstandard is not None:
+        trained = bodies.zstandard.train_dictionary(args.dict_kb * 1024, [t.encode("utf-8") for t in train])
+        bodies._dictionaries[-1] = trained  # not stored in a DB; -1 keeps it clear of real ids
+        out["zstd+dict"] = _codec("zstd", test, dict_id=-1)
+    return out
+
+def list_latency(path: str, args, chars: int) -> dict:
+    engine = create_engine(f"sqlite:///{path}")
+    upgrade(engine)
+    db = sessionmaker(bind=engine)()
+    universe = corpus.make_universe(args.tickers, seed=args.seed)
+    texts = corpus.make_reports(args.reports, universe, chars=chars, seed=args.seed)
+    upsert(db, models.Source, [{"name": "bench", "kind": "html", "url": "http://bench.invalid"}], ["url"])
+    db.commit()
+    base = datetime(2024, 1, 1)
+    _store_reports(db, [
+        {"source_id": 1, "title": f"리포트 {i}", "published_at": base + timedelta(minutes=i), "raw_text": t}
+        for i, t in enumerate(texts)
+    ])
+    db.commit()
+    stmt = hot_queries()["list_reports"]
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        db.execute(stmt).all()
+    elapsed = time.perf_counter() - t0
+    db.close()
+    engine.dispose()
+    return {"report_chars": chars, "db_bytes": os.path.getsize(path), "list_reports_ms": round(elapsed / args.repeat * 1000, 3)}
+
+def run(args) -> dict:
+    universe = corpus.make_universe(args.tickers, seed=args.seed)
+    texts = corpus.make_reports(args.reports, universe, chars=args.report_chars, seed=args.seed)
+    results = {"reports": args.reports, "report_chars": args.report_chars, "codecs": codecs(args, texts)}
+    settings.REPORT_BODY_CODEC = "zstd"
+    with tempfile.TemporaryDirectory() as tmp:
+        results["list_reports"] = [
+            list_latency(os.path.join(tmp, f"list{chars}.sqlite3"), args, chars)
+            for chars in (args.report_chars, args.report_chars * 10)
+        ]
+    return results
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reports", type=int, default=2000)
+    ap.add_argument("--report-chars", type=int, default=4000)
+    ap.add_argument("--tickers", type=int, default=300)
+    ap.add_argument("--dict-kb", type=int, default=112)
+    ap.add_argument("--repeat", type=int, default=200, help="list_reports executions to average")
+    ap.add_argument("--seed", type=int, default=1)
+    print(json.dumps(run(ap.parse_args()), indent=2))
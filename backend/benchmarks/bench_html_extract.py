@@ -0,0 +1,101 @@
+"""HTML extraction: the lxml article extractor vs the previous BeautifulSoup full-text dump.
+
+    python -m benchmarks.bench_html_extract --repeat 200
+
+Runs over the saved pages in benchmarks/fixtures/html (Naver desktop/mobile research, a
+broker site, a portal article; expected.json lists what each page's article contains, what
+is chrome, and the per-source rules for it) and over --synthetic pages from
+benchmarks.corpus. For each engine -- legacy, generic (no rules), rules -- prints docs/sec,
+output chars, and on the fixtures the share of article sentences kept and chrome strings
+leaked into the text.
+"""
+import argparse
+import json
+import os
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+from app.services.html_extract import extract_article
+from benchmarks import corpus
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+
+# --- legacy path: the extractor this benchmark is meant to compare against ---
+
+def legacy_extract(html: str | bytes) -> tuple[str, str]:
+    soup = BeautifulSoup(html, "lxml")
+    title = soup.title.text.strip() if soup.title and soup.title.text else ""
+    for t in soup(["script", "style", "noscript"]):
+        t.decompose()
+    text = soup.get_text("\n")
+    return re.sub(r"\n{3,}", "\n\n", text).strip(), title
+
+def _engines(rules: str):
+    return {
+        "legacy": lambda html: legacy_extract(html)[0],
+        "generic": lambda html: extract_article(html).text,
+        "rules": lambda html: extract_article(html, rules).text,
+    }
+
+def _timed(fn, pages: list, repeat: int) -> tuple[list[str], float]:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = [fn(p) for p in pages]
+    return out, time.perf_counter() - t0
+
+def fixtures(args) -> dict:
+    with open(os.path.join(FIXTURES, "expected.json"), encoding="utf-8") as f:
+        expected = json.load(f)
+    results: dict = {}
+    for name, exp in expected.items():
+        with open(os.path.join(FIXTURES, name), "rb") as f:
+            page = f.read()
+        for engine, fn in _engines(json.dumps(exp["rules"])).items():
+            (text,), elapsed = _timed(fn, [page], args.repeat)
+            row = results.setdefault(engine, {"docs": 0, "seconds": 0.0, "chars": 0, "kept": 0, "leaked": 0,
+                                              "article_strings": 0, "chrome_strings": 0})
+            row["docs"] += args.repeat
+            row["seconds"] += elapsed
+            row["chars"] += len(text)
+            row["kept"] += sum(s in text for s in exp["include"])
+            row["leaked"] += sum(s in text for s in exp["exclude"])
+            row["article_strings"] += len(exp["include"])
+            row["chrome_strings"] += len(exp["exclude"])
+    return {
+        engine: {
+            "docs_per_s": round(row["docs"] / row["seconds"], 1),
+            "output_chars": row["chars"],
+            "article_kept": round(row["kept"] / row["article_strings"], 3),
+            "chrome_leaked": round(row["leaked"] / row["chrome_strings"], 3),
+        }
+        for engine, row in results.items()
+    }
+
+def synthetic(args) -> dict:
+    universe = corpus.make_universe(args.tickers, seed=args.seed)
+    texts = corpus.make_reports(args.synthetic, universe, chars=args.report_chars, seed=args.seed)
+    pages = [corpus.to_html(f"리포트 {i}", t) for i, t in enumerate(texts)]
+    out = {}
+    for engine, fn in _engines(json.dumps({"content": "div.content"})).items():
+        texts_out, elapsed = _timed(fn, pages, max(1, args.repeat // 20))
+        out[engine] = {
+            "docs_per_s": round(len(pages) * max(1, args.repeat // 20) / elapsed, 1),
+            "mb_per_s": round(sum(len(p.encode()) for p in pages) * max(1, args.repeat // 20) / elapsed / 1e6, 2),
+            "output_chars": sum(len(t) for t in texts_out),
+        }
+    return out
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=200, help="passes over the fixtures")
+    ap.add_argument("--synthetic", type=int, default=50, help="synthetic pages (0 to skip)")
+    ap.add_argument("--report-chars", type=int, default=4000)
+    ap.add_argument("--tickers", type=int, default=300)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    result = {"fixtures": fixtures(args)}
+    if args.synthetic:
+        result["synthetic"] = synthetic(args)
+    print(json.dumps(result, indent=2))
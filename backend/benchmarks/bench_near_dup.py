@@ -0,0 +1,126 @@
+"""Near-duplicate detection: accuracy on perturbed copies, and lookup latency vs index size.
+
+    python -m benchmarks.bench_near_dup --reports 500 --index-size 1000000
+
+Accuracy: --reports synthetic reports (benchmarks.corpus) plus one copy of each with a portal
+footer appended, a timestamp prepended, or one sentence rewritten. Reports how many copies
+are clustered with their original (recall) and how many distinct reports are wrongly
+clustered together (false positives).
+
+Latency: fills a throwaway SQLite DB with --index-size indexed reports (random signatures,
+so buckets are as evenly filled as the hash allows) and times the per-report lookup of
+app.db.near_dup -- bucket probes plus candidate signature comparison -- separately from
+computing the signature itself.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db import near_dup
+from app.db.migrate import upgrade
+from app.services import minhash
+from benchmarks import corpus
+
+def _variants(rnd: random.Random, text: str) -> dict[str, str]:
+    sentences = text.split(". ")
+    sentences[rnd.randrange(len(sentences))] = "해당 문단은 발행 이후 일부 수정되었다"
+    return {
+        "footer": f"{text} 본 자료는 투자 참고용이며 무단 배포를 금합니다. 출처: 포털{rnd.randint(1, 9)} 2024-01-{rnd.randint(1, 28):02d}",
+        "timestamp": f"2024.01.{rnd.randint(1, 28):02d} {rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d} 작성 {text}",
+        "edit": ". ".join(sentences),
+    }
+
+def accuracy(args) -> dict:
+    rnd = random.Random(args.seed)
+    universe = corpus.make_universe(args.tickers, seed=args.seed)
+    texts = corpus.make_reports(args.reports, universe, chars=args.report_chars, seed=args.seed)
+    t0 = time.perf_counter()
+    sigs = [minhash.signature(t, settings.NEAR_DUP_MIN_TOKENS) for t in texts]
+    signature_ms = (time.perf_counter() - t0) / len(texts) * 1000
+    # the same bucket + threshold test app.db.near_dup applies
+    index: dict[int, list[int]] = {}
+    false_positives = 0
+    for i, sig in enumerate(sigs):
+        cands = {j for k in minhash.buckets(sig) for j in index.get(k, ())}
+        false_positives += any(minhash.similarity(sig, sigs[j]) >= settings.NEAR_DUP_THRESHOLD for j in cands)
+        for k in minhash.buckets(sig):
+            index.setdefault(k, []).append(i)
+    recall = {}
+    for i, text in enumerate(texts):
+        for name, copy in _variants(rnd, text).items():
+            sig = minhash.signature(copy, settings.NEAR_DUP_MIN_TOKENS)
+            hit = any(minhash.similarity(sig, sigs[j]) >= settings.NEAR_DUP_THRESHOLD
+                      for k in minhash.buckets(sig) for j in index.get(k, ()) if j == i)
+            recall[name] = recall.get(name, 0) + hit
+    return {
+        "reports": len(texts),
+        "signature_ms": round(signature_ms, 3),
+        "recall": {name: round(n / len(texts), 4) for name, n in recall.items()},
+        "false_positive_reports": false_positives,
+    }
+
+def _seed(path: str, n: int, rnd: random.Random):
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO sources (id, name, kind, url, etag, last_modified, content_hash, extract_rules) VALUES (1, 'b', 'html', 'http://b', '', '', '', '')")
+    for lo in range(0, n, 50_000):
+        ids = range(lo + 1, min(n, lo + 50_000) + 1)
+        sigs = {i: [rnd.getrandbits(32) for _ in range(minhash.PERMUTATIONS)] for i in ids}
+        conn.executemany(
+            "INSERT INTO reports (id, source_id, title, published_at, raw_hash, scanned_ticker_id, created_at) "
+            "VALUES (?, 1, '', datetime('2024-01-01', '+' || ? || ' seconds'), '', 0, '2024-01-01 00:00:00')", [(i, i) for i in ids])
+        conn.executemany("INSERT INTO report_signatures (report_id, signature) VALUES (?, ?)",
+                         [(i, minhash.pack(s)) for i, s in sigs.items()])
+        conn.executemany("INSERT INTO report_buckets (bucket, report_id) VALUES (?, ?)",
+                         [(k, i) for i, s in sigs.items() for k in minhash.buckets(s)])
+        conn.commit()
+    conn.close()
+
+def latency(args) -> dict:
+    rnd = random.Random(args.seed)
+    universe = corpus.make_universe(args.tickers, seed=args.seed)
+    probes = corpus.make_reports(args.probes, universe, chars=args.report_chars, seed=args.seed + 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "near_dup.sqlite3")
+        engine = create_engine(f"sqlite:///{path}")
+        upgrade(engine)
+        t0 = time.perf_counter()
+        _seed(path, args.index_size, rnd)
+        seed_s = time.perf_counter() - t0
+        db = sessionmaker(bind=engine)()
+        timings = []
+        for text in probes:
+            sig = minhash.signature(text)
+            t0 = time.perf_counter()
+            found = near_dup._candidates(db, set(minhash.buckets(sig)))
+            known = near_dup._signatures(db, set().union(*found.values())) if found else {}
+            max((minhash.similarity(sig, s) for s, *_ in known.values()), default=0.0)
+            timings.append(time.perf_counter() - t0)
+        db.close()
+        engine.dispose()
+    timings.sort()
+    return {
+        "index_size": args.index_size,
+        "seed_s": round(seed_s, 1),
+        "lookup_p50_ms": round(statistics.median(timings) * 1000, 3),
+        "lookup_p99_ms": round(timings[min(len(timings) - 1, int(0.99 * len(timings)))] * 1000, 3),
+    }
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reports", type=int, default=500)
+    ap.add_argument("--report-chars", type=int, default=4000)
+    ap.add_argument("--tickers", type=int, default=300)
+    ap.add_argument("--index-size", type=int, default=1_000_000)
+    ap.add_argument("--probes", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    print(json.dumps({"accuracy": accuracy(args), "latency": latency(args)}, indent=2))
@@ -0,0 +1,133 @@
+"""Write-path throughput of the daily pipeline: per-row query + commit vs bulk ON CONFLICT.
+
+    python -m benchmarks.bench_persistence --seed-reports 100000 --new-reports 2000
+
+Seeds a throwaway SQLite DB with --seed-reports existing reports, then stores --new-reports
+fresh reports (plus their mentions) through the legacy per-row path and through the bulk
+path, and prints rows/sec for each as JSON.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrate import upgrade
+from app.db import models
+from app.db.bodies import body_row
+from app.jobs.run_daily import _store_reports, create_mentions
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _text(rnd: random.Random, tickers: list[tuple[str, str]], i: int) -> str:
+    picks = rnd.sample(tickers, 3)
+    return f"리포트 {i}: " + " ".join(f"{name}({sym}) 목표주가 {rnd.randint(1, 999)}000원 유지." for sym, name in picks)
+
+def make_session(path: str):
+    engine = create_engine(f"sqlite:///{path}")
+    upgrade(engine)  # tables plus the FTS index the bulk path writes to
+    return sessionmaker(bind=engine, autoflush=False)()
+
+def seed(db, n_reports: int, n_tickers: int, rnd: random.Random) -> list[tuple[str, str]]:
+    tickers = [(f"{i:06d}", f"종목{i}") for i in range(n_tickers)]
+    db.execute(models.Ticker.__table__.insert(), [{"symbol": s, "name": n, "aliases": ""} for s, n in tickers])
+    db.execute(models.Source.__table__.insert(), [
+        {"name": f"src{i}", "kind": "html", "url": f"http://bench/{i}", "etag": "", "last_modified": "", "content_hash": ""}
+        for i in range(10)
+    ])
+    base = datetime(2020, 1, 1)
+    rows, bodies = [], []
+    for i in range(n_reports):
+        text = _text(rnd, tickers, i)
+        rows.append({
+            "id": i + 1, "source_id": i % 10 + 1, "title": f"r{i}", "published_at": base + timedelta(minutes=i),
+            "raw_hash": _sha256(text), "scanned_ticker_id": 0, "created_at": base,
+        })
+        bodies.append(body_row(i + 1, text))
+        if len(rows) == 5000:
+            db.execute(models.Report.__table__.insert(), rows)
+            db.execute(models.ReportBody.__table__.insert(), bodies)
+            rows, bodies = [], []
+    if rows:
+        db.execute(models.Report.__table__.insert(), rows)
+        db.execute(models.ReportBody.__table__.insert(), bodies)
+    db.commit()
+    return tickers
+
+def new_items(n: int, tickers, rnd: random.Random, offset: int) -> list[dict]:
+    now = datetime(2030, 1, 1)
+    return [
+        {"source_id": i % 10 + 1, "title": f"n{i}", "published_at": now + timedelta(minutes=i + offset),
+         "raw_text": _text(rnd, tickers, offset + i)}
+        for i in range(n)
+    ]
+
+# --- legacy path: the per-row implementation this benchmark is meant to compare against ---
+
+def legacy_store(db, items: list[dict]) -> list[models.Report]:
+    out = []
+    for it in items:
+        text = it.pop("raw_text")
+        h = _sha256(text)
+        exists = db.query(models.Report).filter(models.Report.source_id == it["source_id"], models.Report.raw_hash == h).first()
+        if exists:
+            continue
+        r = models.Report(raw_hash=h, **it)
+        r.body = models.ReportBody(**{k: v for k, v in body_row(0, text).items() if k != "report_id"})
+        db.add(r)
+        db.commit()
+        db.refresh(r)
+        out.append(r)
+    return out
+
+def legacy_mentions(db, reports: list[models.Report]) -> int:
+    from app.jobs.run_daily import build_mention_matcher
+    matcher = build_mention_matcher(db.query(models.Ticker).all())
+    created = 0
+    for rep in reports:
+        for ticker_id, snippets in matcher.extract(rep.raw_text).items():
+            m = db.query(models.Mention).filter(models.Mention.report_id == rep.id, models.Mention.ticker_id == ticker_id).first()
+            if not m:
+                db.add(models.Mention(report_id=rep.id, ticker_id=ticker_id, published_at=rep.published_at, snippets="\n".join(snippets)))
+                created += 1
+    db.commit()
+    return created
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+def run(args) -> dict:
+    results = {"seed_reports": args.seed_reports, "new_reports": args.new_reports}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, store, mentions in (("legacy", legacy_store, legacy_mentions), ("bulk", _store_reports, create_mentions)):
+            db = make_session(os.path.join(tmp, f"{label}.sqlite3"))
+            tickers, seed_s = _timed(seed, db, args.seed_reports, args.tickers, random.Random(args.seed))
+            items = new_items(args.new_reports, tickers, random.Random(args.seed + 1), offset=args.seed_reports)
+            reports, store_s = _timed(store, db, [dict(it) for it in items])
+            created, mention_s = _timed(mentions, db, reports)
+            results[label] = {
+                "seed_s": round(seed_s, 3),
+                "reports_stored": len(reports),
+                "reports_per_s": round(len(reports) / store_s, 1),
+                "mentions_created": created,
+                "mentions_per_s": round(created / mention_s, 1) if mention_s else 0.0,
+            }
+            db.close()
+    return results
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seed-reports", type=int, default=100_000)
+    ap.add_argument("--new-reports", type=int, default=2_000)
+    ap.add_argument("--tickers", type=int, default=2_500)
+    ap.add_argument("--seed", type=int, default=42)
+    print(json.dumps(run(ap.parse_args()), indent=2))
@@ -0,0 +1,153 @@
+"""Mention dashboards: served from mention_rollups vs counted from mentions/reports.
+
+    python -m benchmarks.bench_rollups --years 3 --reports-per-day 200 --window 7
+
+Fills a throwaway SQLite DB with --years of reports (--reports-per-day over 5 sources, each
+mentioning --mentions-per-report random tickers), builds the rollups with
+app.db.rollups.rebuild, then times the uncached trending (--window days vs the window before) and
+90-day timeseries queries both ways at a few points in time, and checks both give the same
+answer. The legacy path is the join/count a dashboard needed before the rollups existed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.routes.tickers import _timeseries, _trending
+from app.db import rollups
+from app.db.migrate import upgrade
+
+SOURCES = 5
+
+# --- legacy path: counting mentions x reports per request ---
+
+def legacy_trending(conn: sqlite3.Connection, days: int, asof: date) -> dict:
+    start = asof - timedelta(days=days - 1)
+    rows = conn.execute(
+        "SELECT t.symbol, SUM(m.published_at >= :start) AS cur, SUM(m.published_at < :start) AS prev "
+        "FROM mentions m JOIN reports r ON r.id = m.report_id JOIN tickers t ON t.id = m.ticker_id "
+        "WHERE m.published_at >= :lo AND m.published_at < :hi GROUP BY t.id",
+        {"start": start.isoformat(), "lo": (start - timedelta(days=days)).isoformat(),
+         "hi": (asof + timedelta(days=1)).isoformat()},
+    ).fetchall()
+    return {symbol: (cur, prev) for symbol, cur, prev in rows if cur}
+
+def legacy_timeseries(conn: sqlite3.Connection, ticker_id: int, start: date, end: date) -> dict:
+    rows = conn.execute(
+        "SELECT date(m.published_at), COUNT(*) FROM mentions m JOIN reports r ON r.id = m.report_id "
+        "WHERE m.ticker_id = ? AND m.published_at >= ? AND m.published_at < ? GROUP BY date(m.published_at)",
+        (ticker_id, start.isoformat(), (end + timedelta(days=1)).isoformat()),
+    ).fetchall()
+    return {day: n for day, n in rows}
+
+def seed(path: str, args, rnd: random.Random) -> dict:
+    conn = sqlite3.connect(path)
+    conn.executemany("INSERT INTO tickers (id, symbol, name, aliases) VALUES (?, ?, ?, '')",
+                     [(i, f"{100000 + i:06d}", f"종목{i}") for i in range(1, args.tickers + 1)])
+    conn.executemany("INSERT INTO sources (id, name, kind, url, etag, last_modified, content_hash, extract_rules) "
+                     "VALUES (?, ?, 'html', ?, '', '', '', '')", [(i, f"s{i}", f"http://s{i}") for i in range(1, SOURCES + 1)])
+    start = datetime(2024, 12, 31) - timedelta(days=365 * args.years)
+    n_days = 365 * args.years
+    rid = mid = 0
+    for day in range(n_days):
+        reports, mentions = [], []
+        for k in range(args.reports_per_day):
+            rid += 1
+            published = start + timedelta(days=day, seconds=k * 86400 // args.reports_per_day)
+            reports.append((rid, rnd.randint(1, SOURCES), published))
+            # popular tickers get more mentions
+            for tid in {min(args.tickers, int(rnd.paretovariate(1.2))) for _ in range(args.mentions_per_report)}:
+                mid += 1
+                mentions.append((mid, rid, tid, published, rnd.randint(1, 4), "\n".join(["스니펫"] * rnd.randint(1, 3))))
+        conn.executemany(
+            "INSERT INTO reports (id, source_id, title, published_at, raw_hash, scanned_ticker_id, created_at) "
+            "VALUES (?, ?, '', ?, '', 0, '2025-01-01 00:00:00')", reports)
+        conn.executemany("INSERT INTO mentions (id, report_id, ticker_id, published_at, hits, snippets) VALUES (?, ?, ?, ?, ?, ?)",
+                         mentions)
+        if day % 30 == 0:
+            conn.commit()
+    conn.commit()
+    conn.close()
+    return {"reports": rid, "mentions": mid, "days": n_days}
+
+def _ms(fn, repeat: int) -> tuple[float, object]:
+    timings, out = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        timings.append(time.perf_counter() - t0)
+    return round(statistics.median(timings) * 1000, 3), out
+
+async def measure(path: str, args) -> dict:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    conn = sqlite3.connect(path)
+    results: dict = {"legacy_trending_ms": [], "rollup_trending_ms": [], "legacy_timeseries_ms": [],
+                     "rollup_timeseries_ms": [], "mismatches": 0}
+    end = date(2024, 12, 31)
+    try:
+        async with AsyncSession(engine) as db:
+            for asof in (end, end - timedelta(days=180), end - timedelta(days=365 * args.years - 30)):
+                ms, legacy = _ms(lambda: legacy_trending(conn, args.window, asof), args.repeat)
+                results["legacy_trending_ms"].append(ms)
+                timings = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    await _trending(db, args.window, asof, None, "mentions", 20)
+                    timings.append(time.perf_counter() - t0)
+                results["rollup_trending_ms"].append(round(statistics.median(timings) * 1000, 3))
+                rolled = await _trending(db, args.window, asof, None, "mentions", args.tickers)
+                results["mismatches"] += legacy != {t.symbol: (t.reports, t.previous_reports) for t in rolled}
+
+                start = asof - timedelta(days=89)
+                ms, legacy_series = _ms(lambda: legacy_timeseries(conn, 1, start, asof), args.repeat)
+                results["legacy_timeseries_ms"].append(ms)
+                timings = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    points = await _timeseries(db, "100001", start, asof, None)
+                    timings.append(time.perf_counter() - t0)
+                results["rollup_timeseries_ms"].append(round(statistics.median(timings) * 1000, 3))
+                results["mismatches"] += legacy_series != {p.day.isoformat(): p.reports for p in points if p.reports}
+    finally:
+        conn.close()
+        await engine.dispose()
+    return results
+
+def main(args) -> dict:
+    rnd = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rollups.sqlite3")
+        engine = create_engine(f"sqlite:///{path}")
+        upgrade(engine)
+        t0 = time.perf_counter()
+        sizes = seed(path, args, rnd)
+        sizes["seed_s"] = round(time.perf_counter() - t0, 1)
+        db = sessionmaker(bind=engine)()
+        t0 = time.perf_counter()
+        sizes["rollup_rows"] = rollups.rebuild(db)
+        db.commit()
+        sizes["rebuild_s"] = round(time.perf_counter() - t0, 1)
+        db.close()
+        engine.dispose()
+        return {**sizes, **asyncio.run(measure(path, args))}
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--years", type=int, default=3)
+    ap.add_argument("--reports-per-day", type=int, default=200)
+    ap.add_argument("--mentions-per-report", type=int, default=3)
+    ap.add_argument("--tickers", type=int, default=2000)
+    ap.add_argument("--window", type=int, default=7, help="trending window, days")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=1)
+    print(json.dumps(main(ap.parse_args()), indent=2))
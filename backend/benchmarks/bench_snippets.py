@@ -0,0 +1,140 @@
+"""Summarizer input: relevance-ranked, token-budgeted snippets vs the first 40 snippets.
+
+    python -m benchmarks.bench_snippets --reports 600 --tickers 40 --latency-per-1k-tokens 0.05
+
+Scans --reports synthetic reports (benchmarks.corpus; one per hour, spread over 5 sources,
+with a share republished by another source) and builds each ticker's input from its latest
+50 mentions, the way create_summaries does:
+
+  legacy    the previous mention windows (one per hit, overlaps included) and the first 40
+            snippets of the latest mentions
+  selected  merged windows and app.services.snippets.select_snippets at --budget tokens
+
+Per path: prompt tokens per ticker (mean / max), how many of the ticker's distinct target
+prices reach the prompt, the share of snippet pairs that are near-duplicates, selection time,
+whether shuffled input gives the same list, and a summarize_many run against the stub LLM
+whose latency grows with the prompt (--latency-per-1k-tokens).
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from app.services import snippets as snippet_select
+from app.services.mentions import MentionMatcher, _make_windows
+from app.services.summarizer import Summarizer
+from benchmarks import corpus
+from benchmarks.stub_llm import serve
+
+_TARGET = re.compile(r"목표주가를 ([\d,]+)원")
+
+# --- legacy path: the windows and selection this benchmark is meant to compare against ---
+
+def legacy_windows(text: str, spans: list[tuple[int, int]], window: int = 120) -> list[str]:
+    out = [text[max(0, a - window):min(len(text), b + window)].replace("\n", " ").strip() for a, b in spans]
+    uniq, seen = [], set()
+    for s in out:
+        if s[:200] not in seen:
+            uniq.append(s)
+            seen.add(s[:200])
+    return uniq[:10]
+
+def legacy_select(candidates: list[snippet_select.Candidate]) -> list[str]:
+    return [c.text for c in candidates][:40]
+
+def mentions(args) -> tuple[dict, dict]:
+    """ticker -> latest-50 mention candidates, for the legacy and the merged windows."""
+    rnd = random.Random(args.seed)
+    universe = corpus.make_universe(args.tickers, seed=args.seed)
+    texts = corpus.make_reports(args.reports, universe, chars=args.report_chars, density=args.density, seed=args.seed)
+    start = datetime(2024, 1, 1)
+    reports = [(i + 1, start + timedelta(hours=i), i % 5, t) for i, t in enumerate(texts)]
+    # the same note republished by another portal a few hours later
+    for rid, published, source, text in list(reports):
+        if rnd.random() < args.republished:
+            reports.append((len(reports) + 1, published + timedelta(hours=rnd.randint(1, 6)), (source + 1) % 5,
+                            f"{text} 출처: 포털{source + 1}"))
+    matcher = MentionMatcher({c.symbol: [c.symbol, c.name, *c.aliases] for c in universe})
+    out: dict = {"legacy": {}, "selected": {}}
+    for rid, published, source, text in reports:
+        for symbol, spans in matcher.find_spans(text).items():
+            for name, windows in (("legacy", legacy_windows), ("selected", _make_windows)):
+                out[name].setdefault(symbol, []).append((published, rid, source, windows(text, spans)))
+    latest = {}
+    for name, by_ticker in out.items():
+        latest[name] = {
+            sym: [snippet_select.Candidate(s, published, source, rid)
+                  for published, rid, source, snips in sorted(rows, reverse=True)[:50] for s in snips]
+            for sym, rows in by_ticker.items()
+        }
+    return latest["legacy"], latest["selected"]
+
+def _near_dup_share(snips: list[str]) -> float:
+    grams = [snippet_select._trigrams(s) for s in snips]
+    pairs = [(a, b) for i, a in enumerate(grams) for b in grams[i + 1:]]
+    if not pairs:
+        return 0.0
+    return sum(snippet_select._similar(a, b, 0.7) for a, b in pairs) / len(pairs)
+
+def _targets(snips: list[str]) -> set:
+    return {m for s in snips for m in _TARGET.findall(s)}
+
+def measure(name: str, candidates: dict, select, args) -> tuple[dict, dict]:
+    rnd = random.Random(args.seed)
+    t0 = time.perf_counter()
+    chosen = {sym: select(c) for sym, c in candidates.items()}
+    select_ms = (time.perf_counter() - t0) / max(1, len(candidates)) * 1000
+    order_independent = all(select(rnd.sample(c, len(c))) == chosen[sym] for sym, c in candidates.items())
+    tokens = [sum(snippet_select.count_tokens(s) + 2 for s in snips) for snips in chosen.values()]
+    coverage = [len(_targets(chosen[sym])) / len(_targets([x.text for x in c]))
+                for sym, c in candidates.items() if _targets([x.text for x in c])]
+    return chosen, {
+        "tickers": len(chosen),
+        "snippets_per_ticker": round(statistics.mean(len(s) for s in chosen.values()), 1),
+        "prompt_tokens_mean": round(statistics.mean(tokens)),
+        "prompt_tokens_max": max(tokens),
+        "target_prices_covered": round(statistics.mean(coverage), 3),
+        "near_duplicate_pairs": round(statistics.mean(_near_dup_share(s) for s in chosen.values()), 3),
+        "select_ms_per_ticker": round(select_ms, 3),
+        "order_independent": order_independent,
+    }
+
+async def llm(items: dict, args) -> dict:
+    server, base_url = serve(latency=args.latency, latency_per_1k_tokens=args.latency_per_1k_tokens)
+    try:
+        async with Summarizer(concurrency=args.concurrency, base_url=base_url, api_key="stub") as s:
+            await s.summarize_many(items)
+        report = s.stats.report()
+        return {k: report[k] for k in ("requests", "prompt_tokens", "latency_p50_s", "latency_p95_s", "elapsed_s")}
+    finally:
+        server.shutdown()
+
+def main(args) -> dict:
+    legacy, selected = mentions(args)
+    result = {"tokenizer": "tiktoken" if snippet_select._encoding() is not None else "estimate"}
+    for name, candidates, select in (
+        ("legacy", legacy, legacy_select),
+        ("selected", selected, lambda c: snippet_select.select_snippets(c, args.budget)),
+    ):
+        chosen, result[name] = measure(name, candidates, select, args)
+        if args.latency_per_1k_tokens or args.latency:
+            result[name]["llm"] = asyncio.run(llm(chosen, args))
+    return result
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reports", type=int, default=600)
+    ap.add_argument("--report-chars", type=int, default=4000)
+    ap.add_argument("--density", type=float, default=4.0, help="ticker mentions per 1000 chars")
+    ap.add_argument("--tickers", type=int, default=40)
+    ap.add_argument("--republished", type=float, default=0.3, help="share of reports also published by another source")
+    ap.add_argument("--budget", type=int, default=None, help="token budget (default SUMMARY_SNIPPET_TOKENS)")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--latency", type=float, default=0.2)
+    ap.add_argument("--latency-per-1k-tokens", type=float, default=0.05)
+    ap.add_argument("--seed", type=int, default=1)
+    print(json.dumps(main(ap.parse_args()), indent=2))
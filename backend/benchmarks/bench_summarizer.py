@@ -0,0 +1,39 @@
+"""Summarizer throughput against the local stub LLM.
+
+    python -m benchmarks.bench_summarizer --tickers 500 --concurrency 16 --latency 0.2
+"""
+import argparse
+import asyncio
+import json
+import random
+
+from app.services.summarizer import Summarizer
+from benchmarks.stub_llm import serve
+
+def make_items(n: int, seed: int = 7) -> dict[str, list[str]]:
+    rnd = random.Random(seed)
+    items = {}
+    for i in range(n):
+        # most tickers get a handful of short snippets, a few get a lot
+        k = rnd.choice([1, 2, 3, 5, 40]) if i % 10 else 40
+        items[f"{i:06d}"] = [f"종목{i} 관련 스니펫 {j} 매출 {rnd.randint(1, 999)}억원 전망" * 2 for j in range(k)]
+    return items
+
+async def main(args) -> dict:
+    server, base_url = serve(latency=args.latency, rate_limit_every=args.rate_limit_every)
+    try:
+        async with Summarizer(concurrency=args.concurrency, base_url=base_url, api_key="stub") as s:
+            results = await s.summarize_many(make_items(args.tickers))
+        report = s.stats.report()
+        report["summaries"] = len(results)
+        return report
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tickers", type=int, default=500)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--latency", type=float, default=0.2)
+    ap.add_argument("--rate-limit-every", type=int, default=25)
+    print(json.dumps(asyncio.run(main(ap.parse_args())), indent=2))
@@ -0,0 +1,154 @@
+"""Queue workers: one pipeline run pulled by 1, 2, 4 ... `python -m app.jobs.worker` processes.
+
+    python -m benchmarks.bench_workers --reports 200 --pdfs 20 --tickers 400 --workers 1,2,4
+    python -m benchmarks.bench_workers --workers 4 --kill-after 3   # one worker is SIGKILLed mid-run
+
+Serves --reports HTML and --pdfs PDF sources (benchmarks.corpus) from the stub HTTP server and
+summaries from the stub LLM, both with latency, and seeds a template SQLite DB with --tickers.
+Per worker count, a copy of the template gets a run queued (--enqueue) and that many worker
+processes with --exit-when-idle; the time until they all exit is the run's wall time. The
+legacy path is the in-process `python -m app.jobs.run_daily` on another copy.
+
+With --kill-after, one worker is killed that many seconds in; its leased items are picked up by
+the others once the lease (--lease-seconds) runs out, and the run still has to succeed.
+
+Every run reports its status and the stored reports / mentions / summaries, which have to agree
+between the paths. CPU-bound stages (extraction, mention scans) only scale with cores; the
+latencies make fetch and summarize dominate, the way they do against real hosts.
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.bulk import upsert
+from app.db.migrate import upgrade
+from benchmarks import corpus, stub_http, stub_llm
+
+ASOF = "2024-01-02"
+
+def _seed(path: str, universe) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    upgrade(engine)
+    with Session(engine) as db:
+        upsert(db, models.Ticker, [{"symbol": c.symbol, "name": c.name, "aliases": ",".join(c.aliases)} for c in universe],
+               ["symbol"])
+        db.commit()
+    engine.dispose()
+
+def _totals(path: str) -> dict:
+    conn = sqlite3.connect(path)
+    try:
+        run = conn.execute("SELECT status, error FROM pipeline_runs ORDER BY id DESC LIMIT 1").fetchone()
+        out = {"status": run[0], "error": run[1]}
+        for table in ("reports", "mentions", "ticker_summaries"):
+            out[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        out["reclaimed_items"] = conn.execute("SELECT COUNT(*) FROM work_items WHERE attempts > 1").fetchone()[0]
+        # queue runs: seconds from the previous stage's last item (or the run start) to the stage's last item
+        ends = dict(conn.execute("SELECT kind, MAX(updated_at) FROM work_items GROUP BY kind").fetchall())
+        if ends:
+            last = datetime.fromisoformat(conn.execute("SELECT started_at FROM pipeline_runs ORDER BY id DESC").fetchone()[0])
+            out["stage_s"] = {}
+            for kind in ("fetch", "extract", "mentions", "summarize"):
+                if kind in ends:
+                    end = datetime.fromisoformat(ends[kind])
+                    out["stage_s"][kind], last = round((end - last).total_seconds(), 2), end
+            out["workers_used"] = conn.execute("SELECT COUNT(DISTINCT lease_owner) FROM work_items").fetchone()[0]
+        return out
+    finally:
+        conn.close()
+
+def _module(name: str, env: dict, *args: str, **kw) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", name, *args], env=env, stdout=subprocess.DEVNULL, **kw)
+
+def legacy(template: str, workdir: str, env: dict) -> dict:
+    path = os.path.join(workdir, "legacy.sqlite3")
+    shutil.copy(template, path)
+    env = {**env, "DATABASE_URL": f"sqlite:///{path}"}
+    t0 = time.perf_counter()
+    _module("app.jobs.run_daily", env, "--asof-date", ASOF).wait()
+    return {"wall_s": round(time.perf_counter() - t0, 2), **_totals(path)}
+
+def queued(template: str, workdir: str, env: dict, workers: int, kill_after: float | None) -> dict:
+    path = os.path.join(workdir, f"workers{workers}.sqlite3")
+    shutil.copy(template, path)
+    env = {**env, "DATABASE_URL": f"sqlite:///{path}"}
+    t0 = time.perf_counter()
+    _module("app.jobs.worker", env, "--enqueue", "--asof-date", ASOF, "--processes", "0").wait()
+    procs = [_module("app.jobs.worker", env, "--exit-when-idle", stderr=subprocess.DEVNULL) for _ in range(workers)]
+    killed = False
+    if kill_after is not None:
+        time.sleep(kill_after)
+        if procs[0].poll() is None:
+            procs[0].send_signal(signal.SIGKILL)
+            killed = True
+    for p in procs:
+        p.wait()
+    return {"wall_s": round(time.perf_counter() - t0, 2), "killed_worker": killed, **_totals(path)}
+
+def main(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="bench-workers-")
+    universe = corpus.make_universe(args.tickers, seed=args.seed)
+    texts = corpus.make_reports(args.reports, universe, chars=args.report_chars, density=args.density, seed=args.seed)
+    pdf_texts = corpus.make_reports(args.pdfs, universe, chars=args.report_chars, density=args.density, seed=args.seed + 1)
+    files = {f"/html/{i}.html": (corpus.to_html(f"리포트 {i}", t).encode("utf-8"), "text/html; charset=utf-8") for i, t in enumerate(texts)}
+    files.update({f"/pdf/{i}.pdf": (corpus.to_pdf(t), "application/pdf") for i, t in enumerate(pdf_texts)})
+    http_server, http_base = stub_http.serve(files, latency=args.http_latency)
+    llm_server, llm_base = stub_llm.serve(latency=args.llm_latency)
+    template = os.path.join(workdir, "template.sqlite3")
+    _seed(template, universe)
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])),
+        "NAVER_MOBILE_RESEARCH_URLS": ",".join(f"{http_base}/html/{i}.html" for i in range(len(texts))),
+        "PDF_URLS": ",".join(f"{http_base}/pdf/{i}.pdf" for i in range(len(pdf_texts))),
+        "RATE_LIMIT_REQUESTS_PER_MIN": str(10**9),
+        "RATE_LIMIT_BURST": "1000",
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": llm_base,
+        "WORKER_LEASE_SECONDS": str(args.lease_seconds),
+        "WORKER_POLL_SECONDS": "0.2",
+        "NEAR_DUP_ENABLED": "false",  # clustering depends on extraction order, which varies with workers
+    }
+    result: dict = {"cpus": os.cpu_count(), "sources": len(files), "tickers": args.tickers}
+    try:
+        if args.legacy:
+            result["legacy"] = legacy(template, workdir, env)
+        for n in [int(x) for x in args.workers.split(",")]:
+            result[f"workers_{n}"] = queued(template, workdir, env, n, args.kill_after if n > 1 else None)
+            print(f"workers_{n}: {json.dumps(result[f'workers_{n}'])}", file=sys.stderr)
+        base = result.get("workers_1", {}).get("wall_s")
+        if base:
+            result["speedup"] = {k: round(base / v["wall_s"], 2) for k, v in result.items() if k.startswith("workers_")}
+    finally:
+        http_server.shutdown()
+        llm_server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reports", type=int, default=200)
+    ap.add_argument("--pdfs", type=int, default=20)
+    ap.add_argument("--report-chars", type=int, default=3000)
+    ap.add_argument("--density", type=float, default=4.0, help="ticker mentions per 1000 chars")
+    ap.add_argument("--tickers", type=int, default=400)
+    ap.add_argument("--workers", default="1,2,4", help="worker process counts to time")
+    ap.add_argument("--http-latency", type=float, default=0.2)
+    ap.add_argument("--llm-latency", type=float, default=0.5)
+    ap.add_argument("--lease-seconds", type=int, default=5)
+    ap.add_argument("--kill-after", type=float, default=None, help="SIGKILL one worker this many seconds in")
+    ap.add_argument("--no-legacy", dest="legacy", action="store_false", help="skip the in-process run_daily path")
+    ap.add_argument("--seed", type=int, default=1)
+    print(json.dumps(main(ap.parse_args()), indent=2))
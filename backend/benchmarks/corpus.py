@@ -0,0 +1,129 @@
+"""Deterministic synthetic corpus: a ticker universe and Korean broker reports as text, HTML and PDF.
+
+The same (seed, sizes) always produces byte-identical output, so results from different
+commits are measured on the same input.
+"""
+import random
+from dataclasses import dataclass
+
+_HEADS = ["한국", "대한", "삼화", "동양", "태평", "신세", "미래", "하나", "세진", "오성", "청운", "우리", "대성", "금강", "한빛", "서울"]
+_TAILS = ["전자", "화학", "바이오", "건설", "증권", "제약", "에너지", "반도체", "솔루션", "홀딩스", "중공업", "통신", "식품", "소재", "모빌리티"]
+_FILLER = [
+    "3분기 실적은 시장 컨센서스를 소폭 상회했다.",
+    "수출 물량 회복과 환율 효과로 영업이익률이 개선되었다.",
+    "재고 조정이 마무리 국면에 진입한 것으로 판단한다.",
+    "투자의견 매수와 목표주가를 유지한다.",
+    "원가 부담 완화로 하반기 마진 개선이 기대된다.",
+    "신규 수주가 증가하며 매출 가시성이 높아졌다.",
+    "업황 둔화 우려는 이미 주가에 반영되었다고 본다.",
+    "Valuation is undemanding at 9.5x 12M forward PER.",
+    "배당 확대와 자사주 매입으로 주주환원이 강화되었다.",
+    "전년 동기 대비 매출액은 12.4% 증가한 4,120억원을 기록했다.",
+]
+
+@dataclass
+class Company:
+    symbol: str
+    name: str
+    aliases: list[str]
+
+def make_universe(n: int, seed: int = 1) -> list[Company]:
+    rnd = random.Random(seed)
+    names: list[str] = []
+    seen = set()
+    while len(names) < n:
+        name = rnd.choice(_HEADS) + rnd.choice(_TAILS)
+        if name in seen:
+            name = f"{name}{len(names)}"  # the head x tail grid is finite
+        seen.add(name)
+        names.append(name)
+    out = []
+    for i, name in enumerate(names):
+        aliases = [f"{name}우"] if i % 7 == 0 else []  # preferred shares on some names
+        out.append(Company(symbol=f"{100000 + i * 7:06d}", name=name, aliases=aliases))
+    return out
+
+def make_report_text(rnd: random.Random, universe: list[Company], chars: int, density: float) -> str:
+    """~`chars` characters of filler with about `density` ticker mentions per 1000 chars."""
+    parts: list[str] = []
+    size = 0
+    while size < chars:
+        if rnd.random() < density * 40 / 1000:  # filler sentences average ~40 chars
+            c = rnd.choice(universe)
+            term = rnd.choice([c.name, c.symbol, *c.aliases])
+            s = f"{term}({c.symbol})의 목표주가를 {rnd.randint(10, 999) * 100:,}원으로 제시한다."
+        else:
+            s = rnd.choice(_FILLER)
+        parts.append(s)
+        size += len(s) + 1
+    return " ".join(parts)
+
+def make_reports(n: int, universe: list[Company], chars: int = 4000, density: float = 2.0, seed: int = 1) -> list[str]:
+    rnd = random.Random(seed)
+    return [make_report_text(rnd, universe, chars, density) for _ in range(n)]
+
+def to_html(title: str, text: str) -> str:
+    paras = "".join(f"<p>{s}</p>" for s in text.split(". "))
+    return (
+        f"<html><head><title>{title}</title><style>p{{margin:0}}</style>"
+        f"<script>var tracking = 1;</script></head>"
+        f"<body><div class='header'>리서치센터</div><div class='content'>{paras}</div></body></html>"
+    )
+
+def _wrap(text: str, width: int) -> list[str]:
+    return [text[i:i + width] for i in range(0, len(text), width)] or [""]
+
+def to_pdf(text: str, chars_per_page: int = 1800, width: int = 45) -> bytes:
+    """Minimal PDF with a Type0/Identity-H font and a ToUnicode CMap, so Hangul round-trips
+    through pypdf text extraction. Glyph ids are the code points; no font program is embedded
+    (the file is for extraction benchmarks, not for viewing)."""
+    pages = [text[i:i + chars_per_page] for i in range(0, len(text), chars_per_page)] or [""]
+    n = len(pages)
+    font_id = 3 + 2 * n
+    objs: list[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(n))}] /Count {n} >>".encode(),
+    ]
+    highs = set()
+    for i, page in enumerate(pages):
+        objs.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>".encode()
+        )
+        lines = []
+        for line in _wrap(page, width):
+            cps = [ord(ch) if ord(ch) <= 0xFFFF else 0x3F for ch in line]
+            highs.update(cp >> 8 for cp in cps)
+            lines.append("<" + "".join(f"{cp:04X}" for cp in cps) + "> Tj T*")
+        stream = ("BT /F1 11 Tf 14 TL 40 800 Td " + " ".join(lines) + " ET").encode()
+        objs.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    # one bfrange per high byte in use; ranges may not cross a 256 boundary
+    ranges = "".join(f"<{h:02X}00> <{h:02X}FF> <{h:02X}00>\n" for h in sorted(highs))
+    cmap = (
+        "/CIDInit /ProcSet findresource begin 12 dict begin begincmap\n"
+        "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n"
+        "/CMapName /Adobe-Identity-UCS def /CMapType 2 def\n"
+        "1 begincodespacerange <0000> <FFFF> endcodespacerange\n"
+        f"{len(highs)} beginbfrange\n{ranges}endbfrange\n"
+        "endcmap CMapName currentdict /CMap defineresource pop end end"
+    ).encode()
+    objs += [
+        f"<< /Type /Font /Subtype /Type0 /BaseFont /BenchCID /Encoding /Identity-H "
+        f"/DescendantFonts [{font_id + 1} 0 R] /ToUnicode {font_id + 3} 0 R >>".encode(),
+        f"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /BenchCID /CIDToGIDMap /Identity "
+        f"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> "
+        f"/FontDescriptor {font_id + 2} 0 R /DW 1000 >>".encode(),
+        b"<< /Type /FontDescriptor /FontName /BenchCID /Flags 4 /FontBBox [0 -200 1000 900] "
+        b"/ItalicAngle 0 /Ascent 900 /Descent -200 /CapHeight 700 /StemV 80 >>",
+        b"<< /Length %d >>\nstream\n" % len(cmap) + cmap + b"\nendstream",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objs):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % (i + 1) + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+    return out
@@ -0,0 +1,234 @@
+"""Concurrent-client load test of the read API against a real uvicorn server.
+
+    python -m benchmarks.load_test --clients 500 --duration 20 --out load.json
+    python -m benchmarks.load_test --clients 500 --duration 20 --no-cache --compare load.json
+
+Seeds a throwaway SQLite DB from benchmarks.corpus (tickers, reports, one day of summaries),
+starts `uvicorn app.main:app` on it in a subprocess, and has --clients concurrent keep-alive
+clients (spread over --procs client processes, so the load generator is not the bottleneck)
+request the read routes round-robin for --duration seconds. Reports requests/sec and
+p50/p99 latency overall and per route.
+
+--no-cache sets RESPONSE_CACHE_TTL_SECONDS=0 so every request reaches the database;
+without it most requests are served from the response cache after the first round.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+import httpx
+
+from benchmarks import corpus
+from benchmarks.suite import _git_commit
+
+ASOF = "2024-01-02"
+
+def seed(db_url: str, args):
+    """Fill the DB the server will use; runs in a child process so app settings bind to db_url."""
+    os.environ["DATABASE_URL"] = db_url
+    from app.db.base import init_db
+    from app.db.session import get_db
+    from app.db import models
+    from app.db.bulk import upsert
+    from app.jobs.run_daily import _store_reports
+
+    init_db()
+    universe = corpus.make_universe(args.tickers, seed=args.seed)
+    texts = corpus.make_reports(args.reports, universe, chars=args.report_chars, seed=args.seed)
+    with get_db() as db:
+        upsert(db, models.Ticker, [{"symbol": c.symbol, "name": c.name, "aliases": ",".join(c.aliases)} for c in universe], ["symbol"])
+        upsert(db, models.Source, [{"name": "bench", "kind": "html", "url": "http://bench.invalid"}], ["url"])
+        db.commit()
+        source_id = db.query(models.Source.id).scalar()
+        now = datetime.utcnow()
+        _store_reports(db, [
+            {"source_id": source_id, "title": f"리포트 {i}", "published_at": now - timedelta(minutes=i), "raw_text": t}
+            for i, t in enumerate(texts)
+        ])
+        upsert(db, models.TickerSummary, [
+            {"symbol": c.symbol, "asof_date": ASOF, "summary": f"{c.name} 요약 " * 20,
+             "bullets": json.dumps([f"{c.name} 포인트 {j}" for j in range(3)], ensure_ascii=False), "confidence": 70}
+            for c in universe
+        ], ["symbol", "asof_date"])
+        db.commit()
+
+def routes(args) -> dict[str, str]:
+    universe = corpus.make_universe(args.tickers, seed=args.seed)
+    return {
+        "tickers": "/api/tickers",
+        "summaries": f"/api/summaries?asof_date={ASOF}&symbols={','.join(c.symbol for c in universe[:20])}",
+        "summary": f"/api/tickers/{universe[0].symbol}/summary?asof_date={ASOF}",
+        "reports": "/api/reports?days=30",
+        "search": f"/api/search?q={quote(universe[1].name)}",
+    }
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(db_url: str, port: int, no_cache: bool) -> subprocess.Popen:
+    env = os.environ | {"DATABASE_URL": db_url}
+    if no_cache:
+        env["RESPONSE_CACHE_TTL_SECONDS"] = "0"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log", "--backlog", "4096"],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+async def _get(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, request: bytes) -> int:
+    writer.write(request)
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    for line in head.split(b"\r\n")[1:]:
+        if line[:15].lower() == b"content-length:":
+            length = int(line[15:])
+    await reader.readexactly(length)
+    return int(head.split(b" ", 2)[1])
+
+async def _clients(host: str, port: int, urls: list[tuple[str, str]], clients: int, duration: float, offset: int) -> dict:
+    # plain asyncio keep-alive connections: an httpx pool with hundreds of connections costs
+    # more CPU per request than the server does, which would make the client the bottleneck
+    lat: dict[str, list[float]] = {name: [] for name, _ in urls}
+    errors: dict[str, int] = {}
+    requests = [(name, f"GET {url} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode()) for name, url in urls]
+    # open the connections before the clock starts
+    conns = await asyncio.gather(*(asyncio.open_connection(host, port, limit=2**20) for _ in range(clients)))
+    stop = time.monotonic() + duration
+
+    async def client(i: int):
+        reader, writer = conns[i]
+        n = offset + i
+        while time.monotonic() < stop:
+            name, request = requests[n % len(requests)]
+            n += 1
+            t0 = time.perf_counter()
+            try:
+                status = await _get(reader, writer, request)
+                error = "" if status == 200 else str(status)
+            except (OSError, asyncio.IncompleteReadError) as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                reader, writer = await asyncio.open_connection(host, port, limit=2**20)
+                continue
+            if error:
+                errors[error] = errors.get(error, 0) + 1
+            else:
+                lat[name].append(time.perf_counter() - t0)
+        writer.close()
+
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    return {"latencies": lat, "errors": errors}
+
+def _client_proc(port, urls, clients, duration, offset, out):
+    out.put(asyncio.run(_clients("127.0.0.1", port, urls, clients, duration, offset)))
+
+def _percentile(values: list[float], p: float) -> float:
+    return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+def _summary(lat: list[float], duration: float) -> dict:
+    lat = sorted(lat)
+    return {
+        "requests": len(lat),
+        "req_per_s": round(len(lat) / duration, 1),
+        "p50_ms": round(_percentile(lat, 0.50) * 1000, 2),
+        "p99_ms": round(_percentile(lat, 0.99) * 1000, 2),
+    }
+
+def main(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="load-")
+    db_url = f"sqlite:///{workdir}/load.sqlite3"
+    ctx = multiprocessing.get_context("spawn")
+    p = ctx.Process(target=seed, args=(db_url, args))
+    p.start()
+    p.join()
+    if p.exitcode:
+        raise RuntimeError("seeding failed")
+
+    port = _free_port()
+    server = start_server(db_url, port, args.no_cache)
+    try:
+        urls = list(routes(args).items())
+        out = ctx.Queue()
+        procs = []
+        for i in range(args.procs):
+            n = args.clients // args.procs + (1 if i < args.clients % args.procs else 0)
+            procs.append(ctx.Process(target=_client_proc, args=(port, urls, n, args.duration, i * 7, out)))
+        for p in procs:
+            p.start()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    by_route = {name: [] for name, _ in urls}
+    for res in results:
+        for name, lat in res["latencies"].items():
+            by_route[name] += lat
+    overall = _summary([x for lat in by_route.values() for x in lat], args.duration)
+    overall["errors"] = {}
+    for res in results:
+        for error, n in res["errors"].items():
+            overall["errors"][error] = overall["errors"].get(error, 0) + n
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "params": vars(args) | {"compare": None, "out": None},
+        },
+        "overall": overall,
+        "routes": {name: _summary(lat, args.duration) for name, lat in by_route.items()},
+    }
+
+def compare(new: dict, old: dict) -> list[str]:
+    lines = [f"{'route':<12} {'req/s old':>10} {'new':>10} {'p99 old':>10} {'new':>10}"]
+    for name, row in [("overall", new["overall"]), *new["routes"].items()]:
+        prev = old["overall"] if name == "overall" else old["routes"].get(name)
+        if prev:
+            lines.append(f"{name:<12} {prev['req_per_s']:>10} {row['req_per_s']:>10} {prev['p99_ms']:>10} {row['p99_ms']:>10}")
+    return lines
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--tickers", type=int, default=300)
+    ap.add_argument("--reports", type=int, default=500)
+    ap.add_argument("--report-chars", type=int, default=4000)
+    ap.add_argument("--clients", type=int, default=500)
+    ap.add_argument("--procs", type=int, default=1, help="client processes; raise on multi-core machines")
+    ap.add_argument("--duration", type=float, default=20.0, help="seconds")
+    ap.add_argument("--no-cache", action="store_true", help="disable the response cache on the server")
+    ap.add_argument("--out", help="write the JSON results here")
+    ap.add_argument("--compare", help="previous JSON results to compare against")
+    args = ap.parse_args()
+    result = main(args)
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            print("\n".join(compare(result, json.load(f))), file=sys.stderr)
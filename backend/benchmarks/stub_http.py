@@ -0,0 +1,49 @@
+"""Local static HTTP server for fetch benchmarks: serves an in-memory {path: bytes} map."""
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+from benchmarks.stub_llm import StubServer
+
+def make_handler(files: dict[str, tuple[bytes, str]], latency: float, requests: list | None = None):
+    etags = {path: '"' + hashlib.sha256(body).hexdigest()[:16] + '"' for path, (body, _) in files.items()}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if requests is not None:
+                # (arrival time, host:port, path, If-None-Match) for tests
+                requests.append((time.monotonic(), self.headers.get("Host", ""), self.path, self.headers.get("If-None-Match", "")))
+            entry = files.get(self.path)
+            if entry is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            time.sleep(latency)
+            body, content_type = entry
+            if self.headers.get("If-None-Match") == etags[self.path]:
+                self.send_response(304)
+                self.send_header("ETag", etags[self.path])
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etags[self.path])
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+def serve(files: dict[str, tuple[bytes, str]], latency: float = 0.0, requests: list | None = None) -> tuple[StubServer, str]:
+    """Start the server on a background thread; returns (server, base_url).
+    Every request is appended to ``requests`` when one is given."""
+    server = StubServer(("127.0.0.1", 0), make_handler(files, latency, requests))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
@@ -0,0 +1,96 @@
+"""Local OpenAI-compatible stub for exercising the summarizer without network access.
+
+    python -m benchmarks.stub_llm --port 8900 --latency 0.2 --rate-limit-every 20 --latency-per-1k-tokens 0.05
+
+then point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:8900/v1 and any OPENAI_API_KEY.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def _summary_for(snippets: str) -> dict:
+    n = len([x for x in snippets.split("\n") if x.startswith("- ")])
+    return {"summary": f"(stub) {n} snippets", "bullets": ["(stub) point"], "confidence": 50}
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # the default backlog of 5 drops connections under concurrency
+
+def make_handler(latency: float, rate_limit_every: int, latency_per_1k_tokens: float = 0.0):
+    lock = threading.Lock()
+    # requests seen, requests in flight now and at most (read by tests through server.counter)
+    counter = {"n": 0, "active": 0, "peak": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: dict, headers: dict | None = None):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            with lock:
+                counter["n"] += 1
+                counter["active"] += 1
+                counter["peak"] = max(counter["peak"], counter["active"])
+                n = counter["n"]
+            try:
+                self._reply(n)
+            finally:
+                with lock:
+                    counter["active"] -= 1
+
+        def _reply(self, n: int):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if rate_limit_every and n % rate_limit_every == 0:
+                return self._send(429, {"error": "rate limited"}, {"Retry-After": "0.1"})
+            prompt_chars = sum(len(m["content"]) for m in body["messages"])
+            # fixed latency plus prompt processing time, like a real model's time to first token
+            time.sleep(latency + latency_per_1k_tokens * prompt_chars / 2 / 1000)
+
+            user = body["messages"][-1]["content"]
+            sections = re.split(r"^### (.+)$", user, flags=re.M)
+            if len(sections) > 1:
+                # batched request: "### <key>" headers followed by snippets
+                content = {key.strip(): _summary_for(text) for key, text in zip(sections[1::2], sections[2::2])}
+            else:
+                content = _summary_for(user)
+            out = json.dumps(content, ensure_ascii=False)
+            self._send(200, {
+                "choices": [{"message": {"role": "assistant", "content": out}}],
+                "usage": {"prompt_tokens": prompt_chars // 2, "completion_tokens": len(out) // 2},
+            })
+
+    Handler.counter = counter
+    return Handler
+
+def serve(port: int = 0, latency: float = 0.05, rate_limit_every: int = 0,
+          latency_per_1k_tokens: float = 0.0) -> tuple[StubServer, str]:
+    """Start the stub on a background thread; returns (server, base_url)."""
+    server = StubServer(("127.0.0.1", port), make_handler(latency, rate_limit_every, latency_per_1k_tokens))
+    server.counter = server.RequestHandlerClass.counter
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1"
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8900)
+    ap.add_argument("--latency", type=float, default=0.2)
+    ap.add_argument("--rate-limit-every", type=int, default=0)
+    ap.add_argument("--latency-per-1k-tokens", type=float, default=0.0)
+    args = ap.parse_args()
+    server = StubServer(("127.0.0.1", args.port), make_handler(args.latency, args.rate_limit_every, args.latency_per_1k_tokens))
+    print(f"stub LLM on http://127.0.0.1:{args.port}/v1")
+    server.serve_forever()
@@ -0,0 +1,261 @@
+"""Stage-by-stage throughput and peak memory of the daily pipeline and the read API.
+
+    python -m benchmarks.suite --reports 300 --pdfs 30 --tickers 300 --out bench.json
+    python -m benchmarks.suite --reports 300 --pdfs 30 --tickers 300 --compare bench.json
+
+Generates a deterministic corpus (benchmarks.corpus), serves it from a local stub HTTP server,
+points the summarizer at the stub LLM, and runs each stage against a throwaway SQLite DB
+(or --database-url, e.g. an empty local Postgres database):
+
+    fetch_html, fetch_pdf    AsyncFetcher against the stub server
+    extract_html, extract_pdf
+    match                    MentionMatcher only (CPU, no DB)
+    store_reports            _store_reports (bulk insert + FTS index)
+    mentions                 create_mentions (match + upsert + FTS index)
+    backfill                 backfill_mentions after adding --new-tickers tickers
+    summaries                create_summaries against the stub LLM
+    api:<route>              TestClient requests against the read endpoints
+
+With --memory each stage also reports peak_mb, the tracemalloc peak of Python allocations
+inside the stage (PDF worker processes are not included). tracemalloc slows allocation-heavy
+stages by up to ~20x, so take throughput from a run without it. Results are JSON so runs from
+different commits can be diffed with --compare (made with the same parameters).
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import resource
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from benchmarks import corpus, stub_http, stub_llm
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return ""
+
+class Recorder:
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self.stages: dict[str, dict] = {}
+
+    def run(self, name: str, fn, items: int | None = None, nbytes: int | None = None):
+        """Run fn() once as stage `name` and record time, throughput over items/nbytes and peak memory."""
+        gc.collect()
+        if self.memory:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        try:
+            out = fn()
+        finally:
+            elapsed = time.perf_counter() - t0
+            peak = tracemalloc.get_traced_memory()[1] if self.memory else 0
+            if self.memory:
+                tracemalloc.stop()
+        row = {"seconds": round(elapsed, 4)}
+        if items is not None:
+            row["items"] = items
+            row["items_per_s"] = round(items / elapsed, 2) if elapsed else 0.0
+        if nbytes is not None:
+            row["mb_per_s"] = round(nbytes / 1e6 / elapsed, 2) if elapsed else 0.0
+        if self.memory:
+            row["peak_mb"] = round(peak / 1e6, 2)
+        self.stages[name] = row
+        print(f"{name:<28} {json.dumps(row)}", file=sys.stderr)
+        return out
+
+def _latencies(client, url: str, n: int) -> dict:
+    lat = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        r = client.get(url)
+        lat.append(time.perf_counter() - t0)
+        r.raise_for_status()
+    lat.sort()
+    return {
+        "requests": n,
+        "req_per_s": round(n / sum(lat), 1),
+        "p50_ms": round(statistics.median(lat) * 1000, 2),
+        "p95_ms": round(lat[int(0.95 * (n - 1))] * 1000, 2),
+        "bytes": len(r.content),
+    }
+
+def main(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    universe = corpus.make_universe(args.tickers, seed=args.seed)
+    texts = corpus.make_reports(args.reports, universe, chars=args.report_chars, density=args.density, seed=args.seed)
+    pdf_texts = corpus.make_reports(args.pdfs, universe, chars=args.pdf_chars, density=args.density, seed=args.seed + 1)
+    files = {f"/html/{i}.html": (corpus.to_html(f"리포트 {i}", t).encode("utf-8"), "text/html; charset=utf-8") for i, t in enumerate(texts)}
+    files.update({f"/pdf/{i}.pdf": (corpus.to_pdf(t), "application/pdf") for i, t in enumerate(pdf_texts)})
+    http_server, http_base = stub_http.serve(files, latency=args.http_latency)
+    llm_server, llm_base = stub_llm.serve(latency=args.llm_latency)
+
+    # the app reads settings and binds its engine at import time
+    os.environ.update({
+        "DATABASE_URL": args.database_url or f"sqlite:///{workdir}/bench.sqlite3",
+        "RATE_LIMIT_REQUESTS_PER_MIN": str(10**9),
+        "RATE_LIMIT_BURST": "1000",
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": llm_base,
+    })
+    from fastapi.testclient import TestClient
+    from app.db.base import init_db
+    from app.db.session import get_db
+    from app.db import models
+    from app.db.bulk import upsert
+    from app.jobs.backfill import backfill_mentions
+    from app.jobs.run_daily import _store_reports, build_mention_matcher, create_mentions, create_summaries
+    from app.main import app
+    from app.services.fetcher import AsyncFetcher
+    from app.services.summarizer import Summarizer
+    from app.services.summary_cache import SummaryCache
+    from app.services.text_extract import PdfExtractor, extract_text_from_html
+
+    rec = Recorder(memory=args.memory)
+    init_db()
+    html_urls = [f"{http_base}/html/{i}.html" for i in range(len(texts))]
+    pdf_urls = [f"{http_base}/pdf/{i}.pdf" for i in range(len(pdf_texts))]
+    html_bytes = sum(len(files[f"/html/{i}.html"][0]) for i in range(len(texts)))
+    pdf_bytes = sum(len(files[f"/pdf/{i}.pdf"][0]) for i in range(len(pdf_texts)))
+    pdf_dir = os.path.join(workdir, "pdf")
+    os.makedirs(pdf_dir)
+
+    async def fetch_html():
+        async with AsyncFetcher(concurrency=args.fetch_concurrency) as f:
+            return await f.fetch_all(html_urls)
+
+    async def fetch_pdf():
+        async with AsyncFetcher(concurrency=args.fetch_concurrency) as f:
+            return await f.download_all(pdf_urls, pdf_dir, suffix=".pdf")
+
+    resps = rec.run("fetch_html", lambda: asyncio.run(fetch_html()), len(html_urls), html_bytes)
+    downloads = rec.run("fetch_pdf", lambda: asyncio.run(fetch_pdf()), len(pdf_urls), pdf_bytes)
+    html_out = rec.run("extract_html", lambda: [extract_text_from_html(r.text) for r in resps], len(resps), html_bytes)
+    with PdfExtractor() as extractor:
+        # start the workers before tracemalloc is on, or they inherit tracing and run several times slower
+        extractor.pool.submit(int).result()
+        pdf_out = rec.run("extract_pdf", lambda: [extractor.extract(d.path).text for d in downloads], len(downloads), pdf_bytes)
+
+    with get_db() as db:
+        upsert(db, models.Ticker, [{"symbol": c.symbol, "name": c.name, "aliases": ",".join(c.aliases)} for c in universe], ["symbol"])
+        db.commit()
+        tickers = db.query(models.Ticker).all()
+        all_texts = [text for text, _ in html_out] + pdf_out
+        text_bytes = sum(len(t.encode("utf-8")) for t in all_texts)
+        matcher = build_mention_matcher(tickers)
+        rec.run("match", lambda: [matcher.extract(t) for t in all_texts], len(all_texts), text_bytes)
+
+        upsert(db, models.Source, [{"name": "bench", "kind": "html", "url": http_base}], ["url"])
+        db.commit()
+        source_id = db.query(models.Source.id).filter(models.Source.url == http_base).scalar()
+        base = datetime(2024, 1, 1)
+        items = [
+            {"source_id": source_id, "title": f"리포트 {i}", "published_at": base + timedelta(minutes=i), "raw_text": t}
+            for i, t in enumerate(all_texts)
+        ]
+        reports = rec.run("store_reports", lambda: _store_reports(db, items), len(items))
+        rec.run("mentions", lambda: create_mentions(db, reports), len(reports))
+
+        extra = corpus.make_universe(args.tickers + args.new_tickers, seed=args.seed + 7)[args.tickers:]
+        upsert(db, models.Ticker, [{"symbol": f"9{c.symbol[1:]}", "name": c.name, "aliases": ""} for c in extra], ["symbol"])
+        db.commit()
+        rec.run("backfill", lambda: backfill_mentions(db), len(reports))
+
+        async def summaries():
+            async with Summarizer(concurrency=args.llm_concurrency, base_url=llm_base, api_key="stub") as s:
+                return await create_summaries(db, "2024-01-02", s, SummaryCache(db))
+        n_tickers = db.query(models.Ticker).count()
+        rec.run("summaries", lambda: asyncio.run(summaries()), n_tickers)
+
+    routes = {
+        "tickers": "/api/tickers",
+        "summaries": "/api/summaries?asof_date=2024-01-02",
+        "summary": f"/api/tickers/{universe[0].symbol}/summary?asof_date=2024-01-02",
+        "reports": "/api/reports?days=100000",
+        "trending": "/api/tickers/trending?window=7d&asof_date=2024-01-07",
+        "timeseries": f"/api/tickers/{universe[0].symbol}/mentions/timeseries?start=2023-10-01&end=2024-01-31",
+        "search": f"/api/search?q={universe[1].name}",
+    }
+    if not os.environ["DATABASE_URL"].startswith("sqlite"):
+        routes.pop("search")  # FTS5 only
+    with TestClient(app) as client:
+        for name, url in routes.items():
+            rec.stages[f"api:{name}"] = _latencies(client, url, args.api_requests)
+            print(f"{'api:' + name:<28} {json.dumps(rec.stages['api:' + name])}", file=sys.stderr)
+        cache_stats = client.get("/api/cache/stats").json()
+
+    http_server.shutdown()
+    llm_server.shutdown()
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+            "platform": platform.platform(),
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "params": vars(args) | {"compare": None, "out": None, "database_url": None},
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "response_cache": cache_stats,
+        },
+        "stages": rec.stages,
+    }
+
+def compare(new: dict, old: dict) -> list[str]:
+    """One line per stage: throughput and peak-memory ratio new/old."""
+    lines = []
+    if old["meta"]["params"] != new["meta"]["params"]:
+        lines.append("note: parameters differ between the two runs")
+    lines.append(f"{'stage':<28} {'old':>12} {'new':>12} {'ratio':>7}   peak_mb old -> new")
+    for name, row in new["stages"].items():
+        prev = old["stages"].get(name)
+        if not prev:
+            continue
+        key = "items_per_s" if "items_per_s" in row else "req_per_s"
+        a, b = prev.get(key, 0), row.get(key, 0)
+        ratio = f"{b / a:.2f}x" if a else "-"
+        mem = f"{prev.get('peak_mb', '-')} -> {row.get('peak_mb', '-')}" if "peak_mb" in row else ""
+        lines.append(f"{name:<28} {a:>12} {b:>12} {ratio:>7}   {mem}")
+    return lines
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--reports", type=int, default=300, help="HTML reports")
+    ap.add_argument("--pdfs", type=int, default=30)
+    ap.add_argument("--tickers", type=int, default=300)
+    ap.add_argument("--new-tickers", type=int, default=10, help="tickers added before the backfill stage")
+    ap.add_argument("--report-chars", type=int, default=4000)
+    ap.add_argument("--pdf-chars", type=int, default=20000)
+    ap.add_argument("--density", type=float, default=2.0, help="ticker mentions per 1000 chars")
+    ap.add_argument("--http-latency", type=float, default=0.0)
+    ap.add_argument("--llm-latency", type=float, default=0.05)
+    ap.add_argument("--fetch-concurrency", type=int, default=8)
+    ap.add_argument("--llm-concurrency", type=int, default=8)
+    ap.add_argument("--api-requests", type=int, default=200)
+    ap.add_argument("--database-url", help="run against this (empty) database instead of a temporary SQLite file")
+    ap.add_argument("--memory", action="store_true", help="track per-stage peak memory (slows the stages down)")
+    ap.add_argument("--out", help="write the JSON results here")
+    ap.add_argument("--compare", help="previous JSON results to compare against")
+    args = ap.parse_args()
+    result = main(args)
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            print("\n".join(compare(result, json.load(f))), file=sys.stderr)
@@ -0,0 +1,63 @@
+import os
+import tempfile
+
+# the app reads settings and binds its engine at import time: point it at a throwaway database
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='tests-')}/app.sqlite3"
+os.environ["OPENAI_API_KEY"] = ""
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.db.migrate import upgrade
+
+# Postgres tests run against TEST_POSTGRES_URL (a database they may wipe) and are skipped when
+# it is not reachable.
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL", "postgresql+psycopg://postgres@localhost:5432/reports_test")
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/test.sqlite3")
+    upgrade(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def pg_engine():
+    engine = create_engine(POSTGRES_URL)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("DROP SCHEMA public CASCADE"))
+            conn.execute(text("CREATE SCHEMA public"))
+    except OperationalError as e:
+        engine.dispose()
+        pytest.skip(f"Postgres not reachable at {POSTGRES_URL}: {e.orig}")
+    yield engine
+    engine.dispose()
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def engine(request):
+    """An empty, migrated database of each kind."""
+    engine = request.getfixturevalue("sqlite_engine" if request.param == "sqlite" else "pg_engine")
+    if request.param == "postgres":
+        upgrade(engine)
+    return engine
+
+def seed_reports(db, texts, tickers=(("005930", "삼성전자"), ("000660", "SK하이닉스")), published_at=None):
+    """Store `texts` as reports of one source, scan them for `tickers`; returns the reports."""
+    from datetime import datetime, timedelta
+    from app.db import models
+    from app.db.bulk import upsert
+    from app.jobs.run_daily import _store_reports, create_mentions
+
+    upsert(db, models.Ticker, [{"symbol": s, "name": n} for s, n in tickers], ["symbol"])
+    upsert(db, models.Source, [{"name": "test", "kind": "html", "url": "http://test"}], ["url"])
+    db.commit()
+    source_id = db.query(models.Source.id).filter(models.Source.url == "http://test").scalar()
+    start = published_at or datetime(2024, 1, 1)
+    reports = _store_reports(db, [
+        {"source_id": source_id, "title": f"r{i}", "published_at": start + timedelta(minutes=i), "raw_text": t}
+        for i, t in enumerate(texts)
+    ])
+    create_mentions(db, reports)
+    return reports
@@ -0,0 +1,137 @@
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.core.cache import ResponseCache, cached_json, cached_json_async, response_cache
+from app.core.config import settings
+
+def _request():
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+
+def _builder(calls, fail=False):
+    async def build():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        if fail:
+            raise RuntimeError("db down")
+        return {"n": len(calls)}
+    return build
+
+def test_concurrent_misses_build_once():
+    cache, calls = ResponseCache(ttl_seconds=60), []
+
+    async def main():
+        return await asyncio.gather(*(cached_json_async(_request(), "k", _builder(calls), cache) for _ in range(50)))
+    responses = asyncio.run(main())
+    assert len(calls) == 1
+    assert {r.body for r in responses} == {b'{"n":1}'}
+    assert not cache._building
+
+def test_waiters_rebuild_after_a_failed_build():
+    cache, calls = ResponseCache(ttl_seconds=60), []
+
+    async def main():
+        first = asyncio.create_task(cached_json_async(_request(), "k", _builder(calls, fail=True), cache))
+        await asyncio.sleep(0)
+        second = cached_json_async(_request(), "k", _builder(calls), cache)
+        with pytest.raises(RuntimeError):
+            await first
+        return await second
+    assert asyncio.run(main()).body == b'{"n":2}'
+    assert len(calls) == 2
+
+def test_disabled_cache_builds_every_request():
+    cache, calls = ResponseCache(ttl_seconds=0), []
+
+    async def main():
+        await asyncio.gather(*(cached_json_async(_request(), "k", _builder(calls), cache) for _ in range(5)))
+    asyncio.run(main())
+    assert len(calls) == 5
+
+# a write made by another process (a queue worker, run_daily)
+_WRITE = """
+import sys
+from app.db import models
+from app.db.bulk import upsert
+from app.db.session import get_db
+with get_db() as db:
+    if sys.argv[1] == "source":
+        upsert(db, models.Source, [{"name": "x", "kind": "html", "url": "http://cache-test"}], ["url"])
+    else:
+        db.add(models.PipelineRun(asof_date="2024-01-02", owner="queue"))
+    db.commit()
+"""
+
+def _write_elsewhere(kind: str):
+    subprocess.run([sys.executable, "-c", _WRITE, kind], cwd=Path(__file__).parents[1], check=True)
+
+@pytest.fixture
+def app_db(monkeypatch):
+    from app.db.base import engine
+    from app.db.migrate import upgrade
+    upgrade(engine)
+    monkeypatch.setattr("app.core.cache.settings.RESPONSE_CACHE_DB_POLL_S", 0)
+
+def test_writes_from_other_processes_invalidate(app_db):
+    from app.db.base import _db_generation
+    cache = ResponseCache(ttl_seconds=60)
+    cache.source = _db_generation
+    cache.poll()
+    cache.put("k", b"{}", cache.generation)
+    _write_elsewhere("run")  # run bookkeeping: the API does not serve it
+    cache.poll()
+    assert cache.get("k") is not None
+    _write_elsewhere("source")
+    assert cache.get("k") is not None  # until the next poll
+    cache.poll()
+    assert cache.get("k") is None
+
+def test_own_writes_are_not_invalidated_twice(app_db):
+    from app.db import models
+    from app.db.base import _db_generation
+    from app.db.session import get_db
+    response_cache.poll()
+    with get_db() as db:
+        db.add(models.Source(name="y", kind="html", url="http://cache-test-own"))
+        db.commit()  # bumps this process's cache directly
+    assert response_cache.db_generation == _db_generation()
+    response_cache.put("k", b"{}", response_cache.generation)
+    response_cache.poll()
+    assert response_cache.get("k") is not None
+
+def _gzip_app() -> TestClient:
+    # the cached routes behind GZipMiddleware, as in app.main
+    app, cache = FastAPI(), ResponseCache(ttl_seconds=60)
+    app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MIN_BYTES)
+
+    @app.get("/{n}")
+    def route(n: int, request: Request):
+        return cached_json(request, n, lambda: {"rows": ["삼성전자 목표주가 상향"] * n}, cache)
+    return TestClient(app)
+
+@pytest.mark.parametrize("n", [100, 1])  # above and below GZIP_MIN_BYTES
+def test_gzip_and_identity_share_a_weak_etag_and_vary(n):
+    client = _gzip_app()
+    gzipped = client.get(f"/{n}", headers={"Accept-Encoding": "gzip"})
+    identity = client.get(f"/{n}", headers={"Accept-Encoding": "identity"})
+    assert (gzipped.headers.get("content-encoding") == "gzip") == (n == 100)
+    assert "content-encoding" not in identity.headers
+    assert gzipped.content == identity.content
+    etag = gzipped.headers["etag"]
+    assert etag.startswith('W/"') and identity.headers["etag"] == etag
+    for r in (gzipped, identity):
+        assert r.headers["vary"] == "Accept-Encoding"  # once, also where GZipMiddleware adds it
+
+    for tag in (etag, etag.removeprefix("W/"), f'"other", {etag}'):
+        for encoding in ("gzip", "identity"):
+            r = client.get(f"/{n}", headers={"Accept-Encoding": encoding, "If-None-Match": tag})
+            assert r.status_code == 304 and not r.content
+            assert (r.headers["etag"], r.headers["vary"]) == (etag, "Accept-Encoding")
+    assert client.get(f"/{n}", headers={"If-None-Match": '"other"'}).status_code == 200
@@ -0,0 +1,68 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.jobs.checkpoints import RunHeartbeat, RunInProgress, start_run, touch_run
+from app.jobs.run_daily import mentions_stage
+from tests.conftest import seed_reports
+
+def _age(db, run, seconds):
+    run.heartbeat_at = datetime.utcnow() - timedelta(seconds=seconds)
+    db.commit()
+
+def test_live_run_is_not_adopted(sqlite_engine):
+    with Session(sqlite_engine) as db:
+        run = start_run(db, "2024-01-02", owner="a")
+        assert (run.owner, run.status) == ("a", "running")
+        with pytest.raises(RunInProgress):
+            start_run(db, "2024-01-02", owner="b")
+        with pytest.raises(RunInProgress):
+            start_run(db, "2024-01-02", from_stage="summarize", owner="b")
+        assert start_run(db, "2024-01-02", owner="a").id == run.id  # its own run
+        assert db.get(models.PipelineRun, run.id).owner == "a"
+
+def test_stale_run_is_adopted(sqlite_engine):
+    with Session(sqlite_engine) as db:
+        run = start_run(db, "2024-01-02", owner="a")
+        _age(db, run, 3600)
+        adopted = start_run(db, "2024-01-02", owner="b")
+        assert adopted.id == run.id and adopted.owner == "b"
+        assert not touch_run(db, run.id, "a")  # the old owner finds out on its next heartbeat
+        assert touch_run(db, run.id, "b")
+
+def test_failed_run_is_resumed_by_anyone(sqlite_engine):
+    with Session(sqlite_engine) as db:
+        run = start_run(db, "2024-01-02", owner="a")
+        run.status = "failed"
+        db.commit()
+        assert start_run(db, "2024-01-02", owner="b").id == run.id
+
+def test_heartbeat_notices_adoption(sqlite_engine, monkeypatch):
+    monkeypatch.setattr("app.jobs.checkpoints.settings.PIPELINE_RUN_STALE_S", 0.3)
+    monkeypatch.setattr("app.jobs.checkpoints.get_db", lambda: Session(sqlite_engine))
+    with Session(sqlite_engine) as db:
+        run = start_run(db, "2024-01-02", owner="a")
+        beat = RunHeartbeat(run.id, "a")
+        beat.start()
+        beat.join(0.25)
+        db.refresh(run)
+        assert run.heartbeat_at > datetime.utcnow() - timedelta(seconds=0.3)
+        run.owner = "b"
+        db.commit()
+        beat.join(2)
+        assert beat.lost.is_set()
+        with pytest.raises(RunInProgress):
+            beat.check()
+
+def test_rescan_resets_only_the_runs_reports(sqlite_engine):
+    with Session(sqlite_engine) as db:
+        older, ours = seed_reports(db, ["삼성전자 실적", "삼성전자 전망"])
+        run = start_run(db, "2024-01-02")
+        db.add(models.RunItem(run_id=run.id, stage="extract", key="http://test", status="done", attempts=1,
+                              payload=json.dumps({"report_id": ours.id})))
+        db.commit()
+        assert mentions_stage(db, run, rescan=True)["reports_scanned"] == 1
+        assert mentions_stage(db, run)["reports_scanned"] == 0
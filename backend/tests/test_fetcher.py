@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+from sqlalchemy.orm import Session
+from tenacity import wait_none
+
+from app.core.metrics import CALL_ERRORS, CALL_SECONDS
+
+from app.db import models
+from app.jobs.checkpoints import start_run
+from app.jobs.run_daily import extract_stage, fetch_stage
+from app.services.fetcher import AsyncFetcher, DownloadTooLarge, HostRateLimiter
+from benchmarks import stub_http
+from benchmarks.stub_llm import StubServer
+
+PAGE = (Path(__file__).parent / "fixtures" / "html" / "aspnet_form.html").read_bytes()
+
+@pytest.fixture
+def site(sqlite_engine, tmp_path, monkeypatch):
+    requests: list = []
+    server, base = stub_http.serve({"/note": (PAGE, "text/html; charset=utf-8")}, requests=requests)
+    monkeypatch.setattr("app.jobs.run_daily.settings.NAVER_MOBILE_RESEARCH_URLS", f"{base}/note")
+    monkeypatch.setattr("app.jobs.run_daily.settings.PDF_URLS", "")
+    monkeypatch.setattr("app.jobs.run_daily._data_dir", lambda name: str(tmp_path))
+    with Session(sqlite_engine) as db:
+        yield db, requests
+    server.shutdown()
+
+def _run(db, asof: str) -> tuple[dict, dict]:
+    run = start_run(db, asof)
+    return asyncio.run(fetch_stage(db, run)), asyncio.run(extract_stage(db, run))
+
+def test_unchanged_source_is_not_stored_again(site, caplog):
+    db, requests = site
+    assert _run(db, "2024-01-02") == ({"fetched": 1, "unchanged": 0, "failed": 0}, {"reports": 1, "failed": 0})
+    source = db.query(models.Source).one()
+    etag = source.etag
+    assert etag and source.content_hash
+
+    # 304: the stored ETag went out as If-None-Match
+    with caplog.at_level(logging.INFO, logger="app.jobs.run_daily"):
+        assert _run(db, "2024-01-03") == ({"fetched": 0, "unchanged": 1, "failed": 0}, {"reports": 0, "failed": 0})
+    assert requests[-1][3] == etag
+    assert "not modified:" in caplog.text
+
+    # 200 with the same bytes: the validators are refreshed, nothing is extracted or stored
+    source.etag = '"stale"'
+    db.commit()
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger="app.jobs.run_daily"):
+        assert _run(db, "2024-01-04") == ({"fetched": 0, "unchanged": 1, "failed": 0}, {"reports": 0, "failed": 0})
+    assert requests[-1][3] == '"stale"'
+    assert "unchanged body:" in caplog.text
+    db.refresh(source)
+    assert source.etag == etag
+    assert db.query(models.Report).count() == 1
+
+def test_token_bucket_is_per_host():
+    requests: list = []
+    servers = [stub_http.serve({f"/{i}": (b"x", "text/plain") for i in range(3)}, requests=requests) for _ in range(2)]
+    urls = [f"{base}/{i}" for _, base in servers for i in range(3)]
+
+    async def fetch():
+        # 5 requests/s per host, no burst
+        async with AsyncFetcher(concurrency=8, limiter=HostRateLimiter(per_min=300, burst=1)) as fetcher:
+            return await fetcher.fetch_all(urls)
+
+    t0 = time.monotonic()
+    assert [r.status_code for r in asyncio.run(fetch())] == [200] * 6
+    for server, _ in servers:
+        server.shutdown()
+
+    by_host: dict[str, list[float]] = {}
+    for at, host, _, _ in requests:
+        by_host.setdefault(host, []).append(at)
+    assert len(by_host) == 2
+    for times in by_host.values():
+        assert len(times) == 3
+        times.sort()
+        assert all(b - a >= 0.2 * 0.9 for a, b in zip(times, times[1:]))  # the host's rate
+        assert times[0] - t0 < 0.15  # not queued behind the other host
+
+def test_fetch_attempts_are_timed_and_failures_counted(monkeypatch):
+    monkeypatch.setattr(AsyncFetcher._get.retry, "wait", wait_none())
+    server, base = stub_http.serve({"/ok": (b"ok", "text/plain")})
+    before = {call: (CALL_SECONDS.count(call=call), CALL_ERRORS.value(call=call)) for call in ("http_get", "http_rate_wait")}
+
+    async def fetch():
+        async with AsyncFetcher(limiter=HostRateLimiter(per_min=60_000, burst=10)) as fetcher:
+            return await fetcher.fetch_all([f"{base}/ok", f"{base}/missing"]), fetcher.errors
+
+    try:
+        (ok, missing), errors = asyncio.run(fetch())
+    finally:
+        server.shutdown()
+    assert ok.status_code == 200 and missing is None and "HTTPStatusError" in errors[f"{base}/missing"]
+    after = {call: (CALL_SECONDS.count(call=call), CALL_ERRORS.value(call=call)) for call in before}
+    # one request for /ok, three attempts at /missing, each timed; the 404s count as failures
+    assert after["http_get"][0] - before["http_get"][0] == 4
+    assert after["http_get"][1] - before["http_get"][1] == 3
+    assert after["http_rate_wait"][0] - before["http_rate_wait"][0] == 4
+
+class _Chunked(BaseHTTPRequestHandler):
+    # a body of unknown length: the Content-Length check cannot catch it up front
+    protocol_version = "HTTP/1.1"
+    chunks = [b"x" * 1024] * 64
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for chunk in self.chunks:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        except OSError:
+            pass  # the client hung up
+
+def _download(url: str, dest, **kw):
+    async def go():
+        async with AsyncFetcher() as fetcher:
+            return await fetcher.download(url, str(dest), suffix=".pdf", **kw)
+    return asyncio.run(go())
+
+def test_oversized_download_aborts_mid_stream_without_leftovers(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.fetcher.settings.DOWNLOAD_CHUNK_BYTES", 1024)
+    server = StubServer(("127.0.0.1", 0), _Chunked)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with pytest.raises(DownloadTooLarge, match="body exceeds"):
+            _download(f"http://127.0.0.1:{server.server_port}/big.pdf", tmp_path, max_bytes=10 * 1024)
+    finally:
+        server.shutdown()
+    assert os.listdir(tmp_path) == []  # no .part file, no partial content-addressed file
+
+def test_declared_length_over_the_limit_is_refused(tmp_path):
+    server, base = stub_http.serve({"/big.pdf": (b"x" * 4096, "application/pdf")})
+    try:
+        with pytest.raises(DownloadTooLarge, match="content-length 4096"):
+            _download(f"{base}/big.pdf", tmp_path, max_bytes=1024)
+    finally:
+        server.shutdown()
+    assert os.listdir(tmp_path) == []
+
+def test_download_reuses_the_content_addressed_file(tmp_path):
+    body = b"%PDF-1.4 same report"
+    server, base = stub_http.serve({"/a.pdf": (body, "application/pdf"), "/b.pdf": (body, "application/pdf")})
+    try:
+        first = _download(f"{base}/a.pdf", tmp_path)
+        assert first.path == str(tmp_path / f"{hashlib.sha256(body).hexdigest()}.pdf")
+        os.utime(first.path, (1_000_000_000, 1_000_000_000))
+        second = _download(f"{base}/b.pdf", tmp_path)
+    finally:
+        server.shutdown()
+    assert (second.path, second.sha256, second.size) == (first.path, first.sha256, len(body))
+    assert os.listdir(tmp_path) == [os.path.basename(first.path)]
+    assert os.stat(first.path).st_mtime == 1_000_000_000  # kept as is, not rewritten
@@ -0,0 +1,60 @@
+import logging
+from pathlib import Path
+
+import httpx
+
+from app.services.fetcher import Download
+from app.services.html_extract import extract_article
+
+FIXTURES = Path(__file__).parent / "fixtures" / "html"
+
+ARTICLE = [
+    "삼성전자의 3분기 영업이익은 10조 8천억원으로 시장 컨센서스를 12% 상회했다.",
+    "투자의견 매수, 목표주가 95,000원을 유지한다.",
+]
+
+def _page(name: str) -> bytes:
+    return (FIXTURES / name).read_bytes()
+
+def test_article_inside_form_and_header_wrap_is_kept():
+    # ASP.NET pages wrap everything in <form id="aspnetForm">, this one also in <div id="header-wrap">
+    article = extract_article(_page("aspnet_form.html"))
+    for line in ARTICLE:
+        assert line in article.text
+    assert "로그인" not in article.text  # the real menu still goes
+    assert "Copyright" not in article.text
+    assert article.published_at is not None
+
+def test_chrome_pass_that_takes_the_article_falls_back(caplog):
+    # the article sits in a "sidebar" block and the rest of the page is a comment list
+    with caplog.at_level(logging.WARNING, logger="app.services.html_extract"):
+        article = extract_article(_page("article_in_sidebar.html"))
+    for line in ARTICLE:
+        assert line in article.text
+    assert "궁금합니다" not in article.text
+    assert "html extract kept" in caplog.text
+
+def test_euc_kr_page_without_meta_charset():
+    raw = _page("euckr_no_meta.html")
+    assert b"charset" not in raw
+    for charset in ("", "euc-kr", "EUC-KR"):
+        article = extract_article(raw, charset=charset)
+        assert article.title == "삼성전자 3분기 리뷰"
+        for line in ARTICLE:
+            assert line in article.text
+
+def test_utf8_page_without_meta_charset():
+    raw = _page("euckr_no_meta.html").decode("cp949").encode("utf-8")
+    assert extract_article(raw).title == "삼성전자 3분기 리뷰"
+
+def test_http_charset_wins_over_detection():
+    raw = "<html><body><p>가격</p></body></html>".encode("utf-8")
+    assert extract_article(raw, charset="latin-1").text != "가격"
+    assert extract_article(raw, charset="not-a-charset").text == "가격"
+
+def test_download_charset():
+    def dl(content_type):
+        return Download(url="http://x", status_code=200, headers=httpx.Headers({"Content-Type": content_type}))
+    assert dl("text/html; charset=EUC-KR").charset == "EUC-KR"
+    assert dl('text/html; charset="utf-8"').charset == "utf-8"
+    assert dl("text/html").charset == ""
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import time
+
+from app.jobs.manager import JobManager
+
+def _wait(*jobs_, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while any(j.active for j in jobs_) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def _recorder(log, name, release):
+    async def fn(job):
+        log.append(f"{name} start")
+        await asyncio.to_thread(release.wait, 5)
+        log.append(f"{name} end")
+        return {}
+    return fn
+
+def test_same_kind_is_coalesced():
+    jm, release = JobManager(), threading.Event()
+    a = jm.submit("backfill", _recorder([], "a", release))
+    assert jm.submit("backfill", _recorder([], "b", release)) is a
+    release.set()
+    _wait(a)
+    assert a.status == "succeeded"
+
+def test_group_runs_one_job_at_a_time():
+    jm, log, release = JobManager(), [], threading.Event()
+    daily = jm.submit("run-daily", _recorder(log, "daily", release), group="mentions")
+    time.sleep(0.1)
+    backfill = jm.submit("backfill", _recorder(log, "backfill", release), group="mentions")
+    time.sleep(0.1)
+    assert (daily.status, backfill.status) == ("running", "queued")
+    release.set()
+    _wait(daily, backfill)
+    assert log == ["daily start", "daily end", "backfill start", "backfill end"]
+
+def test_other_groups_run_concurrently():
+    jm, log, release = JobManager(), [], threading.Event()
+    a = jm.submit("a", _recorder(log, "a", release), group="mentions")
+    b = jm.submit("b", _recorder(log, "b", release))
+    time.sleep(0.1)
+    assert (a.status, b.status) == ("running", "running")
+    release.set()
+    _wait(a, b)
@@ -0,0 +1,60 @@
+import re
+
+from app.services.mentions import MentionMatcher, _make_windows, extract_mentions
+
+# (symbol, name, aliases): aliases that overlap each other and other tickers' terms
+TICKERS = {
+    "005930": ("삼성전자", ["삼성", "Samsung Elec", "SEC"]),
+    "005935": ("삼성전자우", ["삼성우"]),
+    "000660": ("SK하이닉스", ["하이닉스", "SK hynix", "SK"]),
+    "035420": ("NAVER", ["네이버", "NAV"]),
+    "066570": ("LG전자", ["LG", "엘지전자"]),
+    "000000": ("", ["SEC"]),  # an alias shared with another ticker, no name
+}
+
+CORPUS = [
+    "삼성전자 3분기 영업이익 10.8조원, 삼성전자우 괴리율 축소. 삼성우 매수.",
+    "SK하이닉스(000660) HBM 점유율 확대; SK hynix는 SKhynix, SK하이닉스SK하이닉스로도 표기.",
+    "NAVER네이버NAVERNAV 검색 광고, LG전자LG화학LG엔솔 모두 LG그룹.",
+    "코드 005930005930005930 반복, 0000000 연속, 0006600 0660 경계.",
+    "Samsung Elec.(SEC) vs SECSEC; 삼성삼성전자삼성 반복 삼성전자우선주",
+    "엘지전자와 LG전자, 하이닉스와 SK하이닉스, 네이버와 NAVER: 한글/Latin 경계\n줄바꿈 뒤 삼성전자",
+    "관련 종목 없음: 카카오, 셀트리온, 현대차.",
+    " ".join(["삼성전자 목표주가 95,000원 유지."] * 40) + " SK하이닉스",  # merged and capped windows
+]
+
+def _terms(symbol: str) -> list[str]:
+    name, aliases = TICKERS[symbol]
+    return [symbol, name, *aliases]
+
+def _reference(text: str, terms: list[str]) -> list[str]:
+    # extract_mentions generalised to any number of terms: re.finditer per distinct term
+    spans = sorted((m.start(), m.end()) for t in dict.fromkeys(t for t in terms if t) for m in re.finditer(re.escape(t), text))
+    return _make_windows(text, spans) if spans else []
+
+def test_matcher_matches_extract_mentions():
+    matcher = MentionMatcher({sym: [sym, TICKERS[sym][0]] for sym in TICKERS})
+    for text in CORPUS:
+        found = matcher.extract(text)
+        for sym, (name, _) in TICKERS.items():
+            assert found.get(sym, []) == extract_mentions(text, sym, name), (sym, text)
+
+def test_matcher_matches_per_term_finditer_with_aliases():
+    matcher = MentionMatcher({sym: _terms(sym) for sym in TICKERS})
+    for text in CORPUS:
+        found = matcher.extract(text)
+        counted = matcher.extract_counted(text)
+        for sym in TICKERS:
+            expected = _reference(text, _terms(sym))
+            assert found.get(sym, []) == expected, (sym, text)
+            assert (sym in counted) == bool(expected)
+        assert all(snips for snips in found.values())
+
+def test_repeated_and_self_overlapping_terms_are_counted_like_finditer():
+    matcher = MentionMatcher({"a": ["005930"], "b": ["000000"], "c": ["삼성", "삼성전자"], "d": ["SECSEC"]})
+    text = "005930005930005930 0000000000 삼성삼성전자삼성 SECSECSEC"
+    counted = matcher.extract_counted(text)
+    assert counted["a"][0] == len(re.findall("005930", text)) == 3
+    assert counted["b"][0] == len(re.findall("000000", text)) == 1  # non-overlapping, left to right
+    assert counted["c"][0] == len(re.findall("삼성", text)) + len(re.findall("삼성전자", text)) == 4
+    assert counted["d"][0] == 1
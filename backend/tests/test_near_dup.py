@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.db.bulk import upsert
+from app.jobs.run_daily import _store_reports, create_mentions
+from app.services import minhash
+
+NOTE = (
+    "삼성전자 3분기 영업이익은 10조 8천억원으로 시장 컨센서스를 12% 상회했다. 메모리 반도체 가격 반등과 "
+    "고대역폭 메모리 출하 확대가 실적 개선을 이끌었고 파운드리 부문의 적자 폭은 전 분기 대비 축소된 것으로 "
+    "추정된다. 4분기에도 서버 수요 회복과 재고 정상화가 이어지며 이익 개선 흐름이 유지될 전망이다. "
+    "투자의견 매수와 목표주가 95,000원을 유지하며 업종 최선호주로 제시한다. 주가는 12개월 선행 기준 "
+    "주가순자산비율 1.3배 수준으로 역사적 평균을 밑돌고 있어 밸류에이션 부담도 크지 않다."
+)
+
+@pytest.fixture
+def db(sqlite_engine):
+    with Session(sqlite_engine) as db:
+        upsert(db, models.Ticker, [{"symbol": "005930", "name": "삼성전자"}, {"symbol": "000660", "name": "SK하이닉스"}],
+               ["symbol"])
+        upsert(db, models.Source, [{"name": n, "kind": "html", "url": f"http://{n}"} for n in ("a", "b", "c")], ["url"])
+        db.commit()
+        yield db
+
+def _source(db, name: str) -> int:
+    return db.query(models.Source.id).filter(models.Source.name == name).scalar()
+
+def _store(db, *items) -> list[models.Report]:
+    """Store (source name, text) reports, a minute apart, and scan them for mentions."""
+    start = datetime(2024, 1, 2) + timedelta(hours=db.query(models.Report).count())
+    reports = _store_reports(db, [
+        {"source_id": _source(db, name), "title": name, "published_at": start + timedelta(minutes=i), "raw_text": text}
+        for i, (name, text) in enumerate(items)
+    ])
+    create_mentions(db, reports)
+    return reports
+
+def _tickers(db, report) -> set[str]:
+    return {sym for (sym,) in db.query(models.Ticker.symbol).join(models.Mention, models.Mention.ticker_id == models.Ticker.id)
+            .filter(models.Mention.report_id == report.id)}
+
+def test_copy_from_another_source_is_clustered(db):
+    [original] = _store(db, ("a", NOTE))
+    [copy] = _store(db, ("b", NOTE + " 본 자료는 투자 참고용입니다."))
+    assert copy.duplicate_of == original.id
+    assert _tickers(db, copy) == set()  # never scanned
+
+def test_revision_from_the_same_source_keeps_its_new_mentions(db):
+    revised = NOTE + " SK하이닉스 역시 같은 업황 개선의 수혜가 예상된다."
+    assert minhash.similarity(minhash.signature(NOTE), minhash.signature(revised)) > settings.NEAR_DUP_THRESHOLD
+    [original] = _store(db, ("a", NOTE))
+    [revision] = _store(db, ("a", revised))
+    assert revision.duplicate_of is None
+    assert _tickers(db, revision) == {"005930", "000660"}
+
+def test_rerender_from_the_same_source_is_clustered(db):
+    [original] = _store(db, ("a", NOTE + " 조회수 120"))
+    [rerender] = _store(db, ("a", NOTE + " 조회수 4031"))  # numbers only
+    assert rerender.duplicate_of == original.id
+
+def test_canonical_is_the_first_stored(db):
+    first, second = _store(db, ("b", NOTE), ("a", NOTE + " 끝."))
+    [third] = _store(db, ("c", NOTE + " 출처: 리서치센터."))
+    assert first.id < second.id
+    assert (first.duplicate_of, second.duplicate_of, third.duplicate_of) == (None, first.id, first.id)
+    # a revision from the first copy's source of another source's copy is still its own report
+    [revision] = _store(db, ("b", NOTE + " SK하이닉스 역시 같은 업황 개선의 수혜가 예상된다."))
+    assert revision.duplicate_of is None
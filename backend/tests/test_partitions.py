@@ -0,0 +1,62 @@
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.migrate import upgrade
+from app.db.partitions import ensure_partitions, is_partitioned, partition_name, partition_ranges
+from tests.conftest import seed_reports
+
+TEXTS = ["삼성전자 1월 실적", "SK하이닉스 2월 전망", "삼성전자 SK하이닉스 2월 업황"]
+START = datetime(2024, 1, 31, 23, 59)  # one report in January, two in February
+
+def _placement(engine, table: str) -> dict:
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT tableoid::regclass::text, count(*) FROM {table} GROUP BY 1"))
+        return dict(rows.all())
+
+def test_partition_ranges():
+    assert partition_ranges(datetime(2024, 1, 15), datetime(2024, 3, 1), months=1) == [
+        (datetime(2024, 1, 1), datetime(2024, 2, 1)),
+        (datetime(2024, 2, 1), datetime(2024, 3, 1)),
+        (datetime(2024, 3, 1), datetime(2024, 4, 1)),
+    ]
+    assert partition_ranges(datetime(2024, 5, 1), datetime(2024, 7, 1), months=3) == [
+        (datetime(2024, 4, 1), datetime(2024, 7, 1)),
+        (datetime(2024, 7, 1), datetime(2024, 10, 1)),
+    ]
+    assert partition_name("reports", datetime(2024, 4, 1)) == "reports_p2024_04"
+
+def test_upgrade_is_idempotent(engine):
+    assert upgrade(engine) == []
+
+def test_upserts(engine):
+    with Session(engine) as db:
+        reports = seed_reports(db, TEXTS, published_at=START)
+        assert len(reports) == 3
+        # storing the same reports again hits the (source_id, published_at) constraint
+        assert seed_reports(db, TEXTS, published_at=START) == []
+        assert db.execute(text("SELECT count(*) FROM reports")).scalar() == 3
+        assert db.execute(text("SELECT count(*) FROM mentions")).scalar() == 4
+
+def test_rows_land_in_their_partitions(pg_engine):
+    assert is_partitioned(pg_engine)
+    upgrade(pg_engine)
+    with Session(pg_engine) as db:
+        seed_reports(db, TEXTS, published_at=START)
+    # partitions are created from now on, so these old rows went to the default partition
+    assert _placement(pg_engine, "reports") == {"reports_default": 3}
+    applied = ensure_partitions(pg_engine)
+    assert "create partition reports_p2024_01 (moved rows from reports_default)" in applied
+    assert "create partition mentions_p2024_02 (moved rows from mentions_default)" in applied
+    assert _placement(pg_engine, "reports") == {"reports_p2024_01": 1, "reports_p2024_02": 2}
+    assert _placement(pg_engine, "mentions") == {"mentions_p2024_01": 1, "mentions_p2024_02": 3}
+    assert ensure_partitions(pg_engine) == []
+    # new rows in a covered range go straight to their partition
+    with Session(pg_engine) as db:
+        seed_reports(db, ["삼성전자 3월"], published_at=datetime(2024, 2, 15))
+    assert _placement(pg_engine, "reports")["reports_p2024_02"] == 3
+
+def test_sqlite_is_not_partitioned(sqlite_engine):
+    assert not is_partitioned(sqlite_engine)
+    assert ensure_partitions(sqlite_engine) == []
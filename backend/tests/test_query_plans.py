@@ -0,0 +1,14 @@
+from app.db.migrate import check_query_plans, upgrade
+
+def test_hot_queries_use_indexes(sqlite_engine):
+    assert check_query_plans(sqlite_engine) == []
+
+def test_upgrade_is_idempotent(sqlite_engine):
+    assert upgrade(sqlite_engine) == []
+    assert check_query_plans(sqlite_engine) == []
+
+def test_missing_index_is_reported(sqlite_engine):
+    with sqlite_engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_reports_published_at")
+    sqlite_engine.dispose()  # pooled connections can still plan against the old schema
+    assert "list_reports: SCAN reports" in check_query_plans(sqlite_engine)
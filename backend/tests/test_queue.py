@@ -0,0 +1,232 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.engine import make_engine
+from app.jobs import queue, worker
+from app.jobs.checkpoints import QUEUE, RunInProgress, start_run
+
+ASOF = "2024-01-02"
+LEASE_S = 1
+
+# Multiprocess tests: real worker processes (spawned, so each has its own engine and settings
+# from the environment) against the `engine` database, SQLite and Postgres. On Postgres, the
+# concurrent claims go through FOR UPDATE SKIP LOCKED.
+SPAWN = multiprocessing.get_context("spawn")
+
+@pytest.fixture
+def db(sqlite_engine, monkeypatch):
+    monkeypatch.setattr("app.jobs.worker.get_db", lambda: Session(sqlite_engine))
+    monkeypatch.setattr("app.jobs.worker._ensure_default_tickers", lambda db: None)
+    monkeypatch.setattr("app.jobs.worker.PLANNERS", {**worker.PLANNERS, "fetch": lambda db, run: [("u1", {}), ("u2", {})]})
+    with Session(sqlite_engine) as db:
+        yield db
+
+def _age(db, run_id, seconds):
+    db.get(models.PipelineRun, run_id).heartbeat_at = datetime.utcnow() - timedelta(seconds=seconds)
+    db.commit()
+
+def test_enqueue_refuses_a_live_run_daily(db):
+    run = start_run(db, ASOF, owner="host:1:run-daily")
+    with pytest.raises(RunInProgress):
+        worker.enqueue_run(ASOF)
+    assert not queue.open_items(db)
+    # the run_daily process died: the queue takes the run over
+    _age(db, run.id, 3600)
+    assert worker.enqueue_run(ASOF) == run.id
+    db.expire_all()
+    assert db.get(models.PipelineRun, run.id).owner == QUEUE
+    assert queue.open_items(db, run.id) == 2
+
+def test_workers_keep_a_queue_run_from_run_daily(db):
+    run_id = worker.enqueue_run(ASOF)
+    _age(db, run_id, 3600)
+    assert worker.advance(db, run_id) == "running"  # any worker pass renews the heartbeat
+    with pytest.raises(RunInProgress):
+        start_run(db, ASOF)
+
+def test_items_of_an_adopted_run_are_not_run(db, monkeypatch):
+    run_id = worker.enqueue_run(ASOF)
+    items = queue.claim(db, "w1", limit=2)
+    # the workers went quiet and run_daily adopted the run
+    _age(db, run_id, 3600)
+    adopted = start_run(db, ASOF, owner="host:1:run-daily")
+    assert adopted.id == run_id
+
+    calls = []
+
+    async def handler(*args):
+        calls.append(args)
+        return {}
+    monkeypatch.setitem(worker.HANDLERS, "fetch", handler)
+    assert not asyncio.run(worker._process("w1", items[0], None))
+    assert not calls
+    db.expire_all()
+    item = db.get(models.WorkItem, items[0].id)
+    assert item.status == "failed" and "no longer queue-driven" in item.error
+    # nor planned any further
+    worker.advance(db, run_id)
+    assert db.get(models.PipelineRun, run_id).owner == "host:1:run-daily"
+    assert worker.advance_all(db) == 0
+
+# --- multiprocess ---
+
+@pytest.fixture
+def url(engine, monkeypatch):
+    for name, value in (("WORKER_LEASE_SECONDS", LEASE_S), ("WORKER_RETRY_BACKOFF_S", 0), ("PIPELINE_MAX_ATTEMPTS", 3)):
+        monkeypatch.setenv(name, str(value))  # for the spawned workers
+        monkeypatch.setattr(queue.settings, name, value)
+    return engine.url.render_as_string(hide_password=False)
+
+def _enqueue(url: str, n: int) -> list[int]:
+    engine = make_engine(url)
+    with Session(engine) as db:
+        run = start_run(db, ASOF, owner=QUEUE)
+        queue.enqueue(db, run.id, "fetch", [(f"u{i}", {}) for i in range(n)])
+        db.commit()
+        ids = sorted(db.scalars(text("SELECT id FROM work_items")))
+    engine.dispose()
+    return ids
+
+def _items(url: str) -> dict:
+    engine = make_engine(url)
+    with Session(engine) as db:
+        rows = {it.id: it for it in db.query(models.WorkItem)}
+        db.expunge_all()
+    engine.dispose()
+    return rows
+
+def _drain(url: str, name: str, fail: bool, start, results):
+    """Claim batches until nothing is claimable, completing (or failing) every item."""
+    engine = make_engine(url)
+    claimed = []
+    start.wait(60)  # all workers are up: claim at the same time
+    with Session(engine) as db:
+        while items := queue.claim(db, name, limit=3):
+            for it in items:
+                claimed.append(it.id)
+                ok = queue.fail(db, name, it.id, it.attempts, "boom") if fail else queue.complete(db, name, it.id)
+                assert ok
+            db.commit()
+    engine.dispose()
+    results.put(claimed)
+
+def _workers(url: str, n: int, fail: bool = False) -> Counter:
+    """Run n _drain processes; how often each item was claimed."""
+    start, results = SPAWN.Barrier(n), SPAWN.Queue()
+    procs = [SPAWN.Process(target=_drain, args=(url, f"w{i}", fail, start, results)) for i in range(n)]
+    for p in procs:
+        p.start()
+    counts = Counter(i for _ in procs for i in results.get(timeout=120))
+    for p in procs:
+        p.join(30)
+        assert p.exitcode == 0
+    return counts
+
+def _hold(url: str, name: str, heartbeat: bool, claimed, release):
+    """Claim one item, keep it (with or without lease heartbeats) until released, then complete it.
+    Exit code 0 when the lease was still held."""
+    engine = make_engine(url)
+    worker.get_db = lambda: Session(engine)
+    with Session(engine) as db:
+        item = queue.claim(db, name, limit=1)[0]
+    beat = worker._Heartbeat(name)
+    if heartbeat:
+        beat.held[item.id] = item.run_id
+        beat.start()
+    claimed.set()
+    release.wait(30)
+    beat.done.set()
+    with Session(engine) as db:
+        ok = queue.complete(db, name, item.id)
+        db.commit()
+    os._exit(0 if ok else 1)
+
+def _claim(url: str, name: str) -> list:
+    engine = make_engine(url)
+    with Session(engine) as db:
+        items = queue.claim(db, name, limit=1)
+    engine.dispose()
+    return items
+
+def test_concurrent_claims_hand_out_each_item_once(url):
+    ids = _enqueue(url, 120)
+    counts = _workers(url, 4)
+    assert sorted(counts) == ids and set(counts.values()) == {1}
+    items = _items(url)
+    assert {(it.status, it.attempts) for it in items.values()} == {("done", 1)}
+    assert len({it.lease_owner for it in items.values()}) > 1
+
+def test_retries_then_fails_across_workers(url):
+    ids = _enqueue(url, 30)
+    # every item was handed out PIPELINE_MAX_ATTEMPTS times in all, then failed for good
+    assert _workers(url, 3, fail=True) == {i: 3 for i in ids}
+    assert {(it.status, it.attempts, it.error) for it in _items(url).values()} == {("failed", 3, "boom")}
+
+def test_heartbeat_keeps_the_lease(url):
+    [item_id] = _enqueue(url, 1)
+    claimed, release = SPAWN.Event(), SPAWN.Event()
+    holder = SPAWN.Process(target=_hold, args=(url, "w1", True, claimed, release))
+    holder.start()
+    assert claimed.wait(30)
+    time.sleep(LEASE_S * 2.5)
+    assert _claim(url, "w2") == []
+    release.set()
+    holder.join(30)
+    assert holder.exitcode == 0
+    assert _items(url)[item_id].status == "done"
+
+def test_expired_lease_is_reclaimed(url):
+    [item_id] = _enqueue(url, 1)
+    claimed, release = SPAWN.Event(), SPAWN.Event()
+    hung = SPAWN.Process(target=_hold, args=(url, "w1", False, claimed, release))
+    hung.start()
+    assert claimed.wait(30)
+    assert _claim(url, "w2") == []  # leased to w1
+    time.sleep(LEASE_S + 0.2)
+    [item] = _claim(url, "w2")
+    assert (item.id, item.attempts) == (item_id, 2)
+    release.set()  # w1 wakes up after losing the item: its outcome is dropped
+    hung.join(30)
+    assert hung.exitcode == 1
+    assert _items(url)[item_id].lease_owner == "w2"
+
+def test_killed_worker_item_is_reclaimed_or_failed(url):
+    [item_id] = _enqueue(url, 1)
+    for attempt in (1, 2, 3):
+        claimed, release = SPAWN.Event(), SPAWN.Event()
+        doomed = SPAWN.Process(target=_hold, args=(url, f"w{attempt}", True, claimed, release))
+        doomed.start()
+        assert claimed.wait(30)
+        os.kill(doomed.pid, signal.SIGKILL)
+        doomed.join(30)
+        assert _items(url)[item_id].attempts == attempt
+        time.sleep(LEASE_S + 0.2)
+    # the lease ran out on the last attempt: reaped instead of handed out again
+    assert _claim(url, "w4") == []
+    item = _items(url)[item_id]
+    assert (item.status, item.error) == ("failed", "lease expired")
+
+def test_claim_skips_locked_rows(pg_engine):
+    from app.db.migrate import upgrade
+    upgrade(pg_engine)
+    url = pg_engine.url.render_as_string(hide_password=False)
+    first, second = _enqueue(url, 2)
+    with pg_engine.connect() as holder:
+        # another claimer between its SELECT ... FOR UPDATE and its commit
+        holder.execute(text("SELECT id FROM work_items WHERE id = :id FOR UPDATE"), {"id": first})
+        t0 = time.monotonic()
+        [item] = _claim(url, "w2")
+        assert item.id == second and time.monotonic() - t0 < 2  # skipped, not waited for
+        holder.rollback()
+    [item] = _claim(url, "w3")
+    assert item.id == first
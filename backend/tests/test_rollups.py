@@ -0,0 +1,48 @@
+import threading
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db import models, rollups
+from app.db.engine import make_engine
+from app.jobs.run_daily import write_mentions
+from tests.conftest import seed_reports
+
+WRITERS = 4
+ROUNDS = 10
+
+def _writer(engine, keys, n: int, start: threading.Barrier, errors: list):
+    try:
+        for i in range(ROUNDS):
+            start.wait()
+            # every writer touches the same (report, ticker) pairs, some of them new
+            found = {key: (n + i, [f"writer {n} round {i} {key}"]) for key in keys}
+            with Session(engine) as db:
+                write_mentions(db, found)
+                db.commit()
+    except Exception as e:  # surfaced by the test thread
+        errors.append(e)
+        start.abort()
+
+def test_concurrent_writers_keep_rollups_exact(engine):
+    if engine.dialect.name == "sqlite":
+        engine = make_engine(str(engine.url))  # WAL and busy_timeout, as in the app
+    with Session(engine) as db:
+        reports = seed_reports(db, ["삼성전자 목표주가 상향", "SK하이닉스 HBM", "삼성전자 SK하이닉스 업황"])
+        tickers = list(db.scalars(select(models.Ticker.id)))
+        keys = [(r.id, t) for r in reports for t in tickers]
+    start = threading.Barrier(WRITERS)
+    errors: list = []
+    threads = [threading.Thread(target=_writer, args=(engine, keys, n, start, errors)) for n in range(WRITERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    with Session(engine) as db:
+        assert rollups.differences(db) == []
+        snippets = db.scalar(select(models.Mention.snippets).where(models.Mention.report_id == keys[0][0],
+                                                                   models.Mention.ticker_id == keys[0][1]))
+        assert len(snippets.split("\n")) >= WRITERS * ROUNDS  # merged, none lost
+    if engine.dialect.name == "sqlite":
+        engine.dispose()
@@ -0,0 +1,29 @@
+from sqlalchemy.orm import Session
+
+from app.db.search import fts_query, search
+from tests.conftest import seed_reports
+
+TEXTS = ["삼성전자 실적 개선, 메모리 업황 회복", "SK하이닉스 HBM 증설", "반도체 장비 수주 전망"]
+
+def test_fts_query_prefixes_lone_hangul_characters():
+    assert fts_query("삼") == '"삼"*'
+    assert fts_query("삼성") == '"삼성"'
+    assert fts_query("sk하") == '"sk 하"*'
+    assert fts_query("삼성 전자") == '"삼성" AND "전자"'
+
+def test_single_hangul_character_matches(sqlite_engine):
+    with Session(sqlite_engine) as db:
+        seed_reports(db, TEXTS)
+        hits, _ = search(db, "삼")
+        assert [h["title"] for h in hits] == ["r0"]
+        assert "<mark>삼</mark>" in hits[0]["highlight"]
+        assert {h["title"] for h in search(db, "반")[0]} == {"r2"}
+        assert {h["title"] for h in search(db, "전")[0]} == {"r0", "r2"}  # 삼성전자, 전망
+        assert [h["symbol"] for h in search(db, "삼", scope="mentions")[0]] == ["005930"]
+
+def test_bigram_search_is_a_substring_match(sqlite_engine):
+    with Session(sqlite_engine) as db:
+        seed_reports(db, TEXTS)
+        assert [h["title"] for h in search(db, "성전")[0]] == ["r0"]
+        assert [h["title"] for h in search(db, "하이닉스 증설")[0]] == ["r1"]
+        assert search(db, "전자반도체")[0] == []
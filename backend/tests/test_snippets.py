@@ -0,0 +1,52 @@
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services import snippets
+from app.services.snippets import Candidate, count_tokens, select_snippets
+
+@pytest.fixture(autouse=True)
+def fresh_encoding():
+    snippets._encoding.cache_clear()
+    yield
+    snippets._encoding.cache_clear()
+
+class _Offline:
+    # tiktoken installed, but its BPE file cannot be downloaded
+    @staticmethod
+    def encoding_for_model(model):
+        raise OSError("Failed to resolve 'openaipublic.blob.core.windows.net'")
+
+    get_encoding = encoding_for_model
+
+def _estimate(text: str) -> int:
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return -(-ascii_chars // 4) + len(text) - ascii_chars
+
+def test_estimate_without_tiktoken(monkeypatch):
+    monkeypatch.setattr(snippets, "tiktoken", None)
+    assert count_tokens("삼성전자 PER 12.5x") == _estimate("삼성전자 PER 12.5x") == 4 + 3  # 4 Hangul + ceil(10 ASCII / 4)
+    assert count_tokens("") == 0
+
+def test_estimate_when_the_encoding_cannot_load(monkeypatch, caplog):
+    monkeypatch.setattr(snippets, "tiktoken", _Offline)
+    with caplog.at_level(logging.WARNING, logger="app.services.snippets"):
+        assert count_tokens("목표주가 상향") == _estimate("목표주가 상향")
+        assert count_tokens("영업이익") == 4
+    assert caplog.text.count("tiktoken encoding unavailable") == 1  # warned once, not per call
+
+def test_selection_fits_the_budget_with_the_estimate(monkeypatch):
+    monkeypatch.setattr(snippets, "tiktoken", _Offline)
+    now = datetime(2024, 1, 2)
+    texts = [f"삼성전자 {i}분기 영업이익 {i}조원, 목표주가 상향 ({i})" for i in range(1, 40)]
+    chosen = select_snippets([Candidate(t, now - timedelta(hours=i), i % 3, i) for i, t in enumerate(texts)], 120)
+    assert chosen
+    assert sum(count_tokens(t) for t in chosen) <= 120
+
+def test_tiktoken_counts_when_available():
+    if snippets.tiktoken is None or snippets._encoding() is None:
+        pytest.skip("tiktoken or its encoding file is not available")
+    text = "삼성전자 목표주가 95,000원"
+    assert count_tokens(text) == len(snippets._encoding().encode(text))
+    assert count_tokens(text) <= _estimate(text)
@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.summarizer import BATCH_PROMPT, SYSTEM_PROMPT, Summarizer, _parse_retry_after
+from benchmarks import stub_llm
+
+def _summarize(base: str, items: dict, concurrency: int = 8) -> tuple[dict, Summarizer]:
+    async def go():
+        async with Summarizer(concurrency=concurrency, base_url=base, api_key="test") as s:
+            return await s.summarize_many(items), s
+    return asyncio.run(go())
+
+@pytest.fixture
+def llm(request):
+    server, base = stub_llm.serve(**getattr(request, "param", {}))
+    yield server, base
+    server.shutdown()
+
+@pytest.mark.parametrize("llm", [{"latency": 0.0, "rate_limit_every": 2}], indirect=True)
+def test_429_is_retried_after_retry_after(llm):
+    server, base = llm
+    _summarize(base, {"a": ["삼성전자 목표주가 상향"]})
+    t0 = time.monotonic()
+    results, s = _summarize(base, {"b": ["SK하이닉스 HBM 출하 확대"]})  # the stub's 2nd request is a 429
+    elapsed = time.monotonic() - t0
+    assert results == {"b": {"summary": "(stub) 1 snippets", "bullets": ["(stub) point"], "confidence": 50}}
+    assert (s.stats.requests, s.stats.failures, server.counter["n"]) == (2, 0, 3)
+    assert 0.1 <= elapsed < 1.0  # the stub's Retry-After: 0.1, not the 1 s backoff floor
+
+def test_retry_after_header_forms():
+    assert _parse_retry_after("2.5") == 2.5
+    assert _parse_retry_after("-1") == 0.0
+    assert 0 < _parse_retry_after(time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30))) <= 30
+    assert _parse_retry_after("soon") is None and _parse_retry_after(None) is None
+
+@pytest.mark.parametrize("llm", [{"latency": 0.05}], indirect=True)
+def test_concurrency_is_bounded_by_the_semaphore(llm, monkeypatch):
+    server, base = llm
+    monkeypatch.setattr("app.services.summarizer.settings.SUMMARY_BATCH_MAX_TICKERS", 1)  # one request per key
+    results, s = _summarize(base, {i: [f"종목 {i} 스니펫"] for i in range(12)}, concurrency=3)
+    assert len(results) == 12 and s.stats.requests == 12
+    assert server.counter["peak"] == 3
+
+@pytest.mark.parametrize("llm", [{"latency": 0.0}], indirect=True)
+def test_small_payloads_are_batched_and_split_back_per_key(llm, monkeypatch):
+    server, base = llm
+    monkeypatch.setattr("app.services.summarizer.settings.SUMMARY_BATCH_MAX_CHARS", 100)
+    monkeypatch.setattr("app.services.summarizer.settings.SUMMARY_BATCH_MAX_TICKERS", 3)
+    items = {i: [f"종목 {i} 스니펫"] * (i % 3 + 1) for i in range(7)}
+    items[7] = ["긴 스니펫 " * 30]  # over SUMMARY_BATCH_MAX_CHARS: sent alone
+    plans = Summarizer()._plan(items)
+    assert [sorted(p) for p in plans] == [[0, 1, 2], [3, 4, 5], [7], [6]]
+
+    results, s = _summarize(base, items)
+    assert s.stats.requests == server.counter["n"] == 4
+    for key, snippets in items.items():
+        assert results[key]["summary"] == f"(stub) {len(snippets)} snippets"  # each key got its own section
+    assert {k: s.prompts[k] for k in items} == {**{k: BATCH_PROMPT for k in range(6)}, 6: SYSTEM_PROMPT, 7: SYSTEM_PROMPT}
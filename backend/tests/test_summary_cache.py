@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.jobs import run_daily
+from app.services import summarizer as summarizer_mod
+from app.services.summarizer import BATCH_PROMPT, SYSTEM_PROMPT, Summarizer
+from app.services.summary_cache import SummaryCache, cache_key
+from tests.conftest import seed_reports
+
+def _reply(content: str) -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}], "usage": {}})
+
+def _summaries(db, handler, force=False, cache=None) -> int:
+    async def go():
+        async with Summarizer(api_key="stub", base_url="http://llm") as s:
+            await s._client.aclose()
+            s._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            return await run_daily.create_summaries(db, "2024-01-02", s, cache or SummaryCache(db), force=force)
+    return asyncio.run(go())
+
+@pytest.fixture
+def db(sqlite_engine):
+    with Session(sqlite_engine) as db:
+        seed_reports(db, ["삼성전자 목표주가 상향, SK하이닉스 실적 개선 전망."])
+        yield db
+
+def test_non_json_reply_is_not_cached(db):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return _reply("죄송합니다, JSON을 만들 수 없습니다.")
+
+    assert _summaries(db, handler) == 2
+    assert db.query(models.SummaryCacheEntry).count() == 0
+    assert "JSON을 만들 수 없습니다" in db.query(models.TickerSummary.summary).first()[0]
+    n = len(calls)
+    _summaries(db, handler, force=True)
+    assert len(calls) > n  # asked again instead of reusing the fallback
+
+def test_batched_results_are_keyed_by_the_batch_prompt(db, monkeypatch):
+    calls = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        calls.append(body["messages"][0]["content"])
+        keys = [line[4:] for line in body["messages"][1]["content"].splitlines() if line.startswith("### ")]
+        return _reply(json.dumps({k: {"summary": f"요약 {k}", "bullets": [], "confidence": 70} for k in keys}))
+
+    _summaries(db, handler)
+    assert calls == [BATCH_PROMPT]
+    snippets = {t.symbol: run_daily.select_snippets(c) for t in db.query(models.Ticker)
+                for c in [run_daily._latest_snippets(db, [t.id])[t.id]]}
+    stored = {k for (k,) in db.query(models.SummaryCacheEntry.key)}
+    assert stored == {cache_key(s, BATCH_PROMPT) for s in snippets.values()}
+    assert not stored & {cache_key(s, SYSTEM_PROMPT) for s in snippets.values()}
+
+    _summaries(db, handler, force=True)
+    assert len(calls) == 1  # served from the cache
+
+    changed = BATCH_PROMPT + "\n종목별 한 줄 요약을 추가하라.\n"
+    monkeypatch.setattr(summarizer_mod, "BATCH_PROMPT", changed)
+    monkeypatch.setattr(run_daily, "BATCH_PROMPT", changed)
+    _summaries(db, handler, force=True)
+    assert calls[1:] == [changed]  # the prompt change invalidated the batched entries
+
+def test_hits_and_misses_count_tickers(db):
+    def handler(request):
+        body = json.loads(request.content)
+        keys = [line[4:] for line in body["messages"][1]["content"].splitlines() if line.startswith("### ")]
+        return _reply(json.dumps({k: {"summary": f"요약 {k}", "bullets": [], "confidence": 70} for k in keys}))
+
+    def run(force):
+        cache = SummaryCache(db)
+        _summaries(db, handler, force=force, cache=cache)
+        return cache.hits, cache.misses
+
+    assert run(False) == (0, 2)  # cold: two tickers, two misses (not one per prompt key)
+    assert run(True) == (2, 0)   # warm: both served from the cache
@@ -0,0 +1,42 @@
+import os
+import time
+
+import pytest
+
+from app.services import text_extract
+from app.services.text_extract import PdfExtractor
+from benchmarks import corpus
+
+def _hang(*args):
+    time.sleep(600)
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(corpus.to_pdf("삼성전자 목표주가 상향 " * 50))
+    return str(path)
+
+@pytest.mark.parametrize("stage", ["_extract_page_range", "_count_pages"])
+def test_hung_pdf_does_not_block_the_next(monkeypatch, pdf, stage):
+    with PdfExtractor(workers=1, timeout=1) as ex:
+        monkeypatch.setattr(text_extract, stage, _hang)
+        t0 = time.monotonic()
+        hung = ex.extract(pdf)
+        assert hung.truncated and hung.text == ""
+        assert time.monotonic() - t0 < 5
+        assert ex._pool is None  # recycled
+
+        monkeypatch.undo()
+        ok = ex.extract(pdf)
+        assert not ok.truncated and "삼성전자" in ok.text
+
+def test_recycle_kills_the_workers(monkeypatch, pdf):
+    with PdfExtractor(workers=1, timeout=1) as ex:
+        monkeypatch.setattr(text_extract, "_extract_page_range", _hang)
+        ex.pool.submit(int).result()
+        pids = list(ex.pool._processes)
+        ex.extract(pdf)
+    time.sleep(0.5)
+    for pid in pids:
+        with pytest.raises(OSError):
+            os.kill(pid, 0)
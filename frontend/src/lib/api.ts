@@ -15,15 +15,81 @@ export async function listTickers(): Promise<Ticker[]> {
   return r.json();
 }
 
+// One batch request per as-of date; the promise is memoized so every selection after the
+// first is served from memory. Empty asofDate means "today" on the server.
+const summaryBatches = new Map<string, Promise<Map<string, TickerSummary>>>();
+
+export async function listSummaries(symbols: string[] = [], asofDate?: string): Promise<TickerSummary[]> {
+  const params = new URLSearchParams();
+  if (asofDate) params.set("asof_date", asofDate);
+  if (symbols.length) params.set("symbols", symbols.join(","));
+  const r = await fetch(`${API_BASE}/summaries?${params}`);
+  if (!r.ok) throw new Error("Failed to fetch summaries");
+  return r.json();
+}
+
+export function prefetchSummaries(asofDate?: string): Promise<Map<string, TickerSummary>> {
+  const key = asofDate ?? "";
+  let batch = summaryBatches.get(key);
+  if (!batch) {
+    batch = listSummaries([], asofDate).then((rows) => new Map(rows.map((s) => [s.symbol, s])));
+    batch.catch(() => summaryBatches.delete(key)); // retry on next call
+    summaryBatches.set(key, batch);
+  }
+  return batch;
+}
+
+export function clearSummaryCache() {
+  summaryBatches.clear();
+}
+
 export async function getTickerSummary(symbol: string, asofDate?: string): Promise<TickerSummary> {
+  const cached = (await prefetchSummaries(asofDate).catch(() => null))?.get(symbol);
+  if (cached) return cached;
   const q = asofDate ? `?asof_date=${encodeURIComponent(asofDate)}` : "";
   const r = await fetch(`${API_BASE}/tickers/${symbol}/summary${q}`);
   if (!r.ok) throw new Error("Summary not found. Run daily job first.");
   return r.json();
 }
 
-export async function runDaily(): Promise<{ fetched_reports: number; mentions_created: number; summaries_created: number; asof_date: string }> {
+export type RunDailyResult = {
+  run_id: number;
+  status: "succeeded" | "partial" | "failed";
+  failed_items: number;
+  fetched_reports: number;
+  mentions_created: number;
+  summaries_created: number;
+  asof_date: string;
+};
+export type JobStage = { name: string; status: string; elapsed_s: number; detail: Record<string, unknown> };
+export type Job = {
+  id: string;
+  kind: string;
+  status: "queued" | "running" | "succeeded" | "failed";
+  stages: JobStage[];
+  result: RunDailyResult | null;
+  error: string | null;
+};
+
+// Enqueues a run (or joins the one already running) and returns the job immediately.
+export async function runDaily(): Promise<Job> {
   const r = await fetch(`${API_BASE}/tickers/run-daily`, { method: "POST" });
   if (!r.ok) throw new Error("Failed to run daily pipeline");
   return r.json();
 }
+
+export async function getJob(id: string): Promise<Job> {
+  const r = await fetch(`${API_BASE}/jobs/${id}`);
+  if (!r.ok) throw new Error("Job not found");
+  return r.json();
+}
+
+export async function waitForJob(id: string, onProgress?: (job: Job) => void, intervalMs = 1000): Promise<Job> {
+  for (;;) {
+    const job = await getJob(id);
+    onProgress?.(job);
+    if (job.status === "succeeded") return job;
+    if (job.status === "failed") throw new Error(job.error ?? "Daily pipeline failed");
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
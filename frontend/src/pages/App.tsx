@@ -1,5 +1,14 @@
 import React, { useEffect, useMemo, useState } from "react";
-import { listTickers, getTickerSummary, runDaily, Ticker, TickerSummary } from "../lib/api";
+import {
+  listTickers,
+  getTickerSummary,
+  prefetchSummaries,
+  clearSummaryCache,
+  runDaily,
+  waitForJob,
+  Ticker,
+  TickerSummary,
+} from "../lib/api";
 
 export default function App() {
   const [tickers, setTickers] = useState<Ticker[]>([]);
@@ -8,6 +17,7 @@ export default function App() {
   const [status, setStatus] = useState<string>("");
 
   useEffect(() => {
+    prefetchSummaries().catch(() => undefined); // warm the batch while tickers load
     listTickers()
       .then((t) => {
         setTickers(t);
@@ -35,8 +45,17 @@ export default function App() {
           onClick={async () => {
             setStatus("Running daily pipeline...");
             try {
-              const r = await runDaily();
-              setStatus(`Done. fetched=${r.fetched_reports}, mentions=${r.mentions_created}, summaries=${r.summaries_created}, asof=${r.asof_date}`);
+              const job = await runDaily();
+              const done = await waitForJob(job.id, (j) => {
+                const stage = j.stages[j.stages.length - 1];
+                setStatus(`Running daily pipeline... ${stage ? `${stage.name} (${stage.status})` : j.status}`);
+              });
+              const r = done.result!;
+              setStatus(
+                `Done (${r.status}). fetched=${r.fetched_reports}, mentions=${r.mentions_created}, summaries=${r.summaries_created}, asof=${r.asof_date}` +
+                  (r.failed_items ? `, failed items=${r.failed_items} (rerun to retry)` : "")
+              );
+              clearSummaryCache();
               const s = await getTickerSummary(selected);
               setSummary(s);
             } catch (e) {